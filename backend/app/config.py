@@ -1,18 +1,149 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Dict, Optional
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding='utf-8')
 
     GITHUB_TOKEN: str = "YOUR_GITHUB_TOKEN"
+    # Default-branch heads are reused for GITHUB_HEAD_TTL_SECS, then served stale while being rechecked
+    # in the background until GITHUB_HEAD_STALE_SECS
+    GITHUB_HEAD_TTL_SECS: float = 60.0
+    GITHUB_HEAD_STALE_SECS: float = 600.0
+    GITHUB_HEAD_CACHE_SIZE: int = 1024
     OPENAI_API_KEY: str = "YOUR_OPENAI_API_KEY"
 
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
+    # Connection pool of the asyncio Redis client; requests wait for a free connection beyond this
+    REDIS_MAX_CONNECTIONS: int = 50
+    # In-process tier of decoded cache values in front of Redis, kept consistent across workers via pub/sub
+    CACHE_LOCAL_ENABLED: bool = True
+    CACHE_LOCAL_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_LOCAL_TTL: float = 60.0
+    # Serialization of new cache values: "msgpack+zstd", "json+zstd", "json+zlib" or "json" (legacy text);
+    # values written with any codec stay readable
+    CACHE_CODEC: str = "msgpack+zstd"
+    CACHE_CODEC_LEVEL: int = 3
+    # clear_repo_cache also SCANs for keys written before the tag index existed; can be turned off
+    # once those have expired
+    CACHE_TAG_SCAN_FALLBACK: bool = True
     
     SUPABASE_URL: str = "YOUR_SUPABASE_URL"
     SUPABASE_ANON_KEY: str = "YOUR_SUPABASE_ANON_KEY"
 
+    # "openai" or "local" (deterministic offline stand-in for load tests and benchmarks)
+    LLM_PROVIDER: str = "openai"
+    LOCAL_LLM_LATENCY_MS: float = 0.0
+    LOCAL_LLM_TOKENS_PER_SEC: float = 0.0
+
+    # Process-wide LLM budgets per model (requests / tokens per minute)
+    LLM_RATE_LIMITS: Dict[str, Dict[str, int]] = {
+        "gpt-4o-mini": {"rpm": 500, "tpm": 200000},
+        "gpt-3.5-turbo": {"rpm": 500, "tpm": 200000},
+        "text-embedding-3-small": {"rpm": 3000, "tpm": 1000000},
+    }
+    LLM_DEFAULT_RATE_LIMIT: Dict[str, int] = {"rpm": 500, "tpm": 200000}
+    LLM_SCHEDULER_MAX_WAIT: float = 120.0
+
+    # Per-attempt request timeout, retry backoff and hedging for LLM calls
+    LLM_CALL_TIMEOUT_SECS: float = 60.0
+    LLM_CALL_DEADLINE_SECS: float = 180.0
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY_SECS: float = 0.5
+    LLM_RETRY_MAX_DELAY_SECS: float = 8.0
+    LLM_HEDGING_ENABLED: bool = True
+    LLM_HEDGE_DEFAULT_DELAY_SECS: float = 3.0
+
+    # Markdown chunking for the vector store (token estimate = UTF-8 bytes / 4)
+    CHUNK_MAX_TOKENS: int = 512
+    CHUNK_MIN_TOKENS: int = 128
+
+    # Symbol-level source code chunks indexed after the documentation (cached by blob SHA)
+    CODE_INDEX_ENABLED: bool = True
+    CODE_INDEX_MAX_FILES: int = 500
+    CODE_INDEX_MAX_FILE_BYTES: int = 200_000
+    CODE_INDEX_CONCURRENCY: int = 8
+    CODE_CHUNKS_CACHE_TTL: int = 30 * 24 * 3600
+
+    # Embedding requests are batched up to these provider limits and run with bounded parallelism
+    EMBEDDING_BATCH_SIZE: int = 256
+    EMBEDDING_BATCH_MAX_TOKENS: int = 250000
+    EMBEDDING_CONCURRENCY: int = 4
+    VECTOR_UPSERT_BATCH_SIZE: int = 500
+
+    # Chunk vector store: "supabase" (pgvector via match_documents) or "local" (in-process IVF index on memory-mapped files)
+    VECTOR_BACKEND: str = "supabase"
+    VECTOR_MATCH_THRESHOLD: float = 0.7
+    LOCAL_VECTOR_INDEX_DIR: str = "data/vector_index"
+    LOCAL_VECTOR_IVF_MIN_ROWS: int = 4096
+    LOCAL_VECTOR_NPROBE: int = 8
+    # Scanned representation of local vectors: "none" (float32), "int8" (4x smaller) or "pq" (16x with 4-dim sub-vectors)
+    LOCAL_VECTOR_QUANTIZATION: str = "none"
+    LOCAL_VECTOR_PQ_SUB_DIMS: int = 4
+    LOCAL_VECTOR_RERANK_FACTOR: int = 8
+    # Hybrid retrieval: BM25 over stored chunks (code-aware tokens) fused with vector results by reciprocal rank
+    HYBRID_SEARCH_ENABLED: bool = True
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    RRF_K: int = 60
+    LEXICAL_INDEX_TTL_SECS: int = 1800
+    LEXICAL_INDEX_MAX_REPOS: int = 64
+    # Retrieval is scoped to each repo's current commit; superseded commits' chunks are deleted after a grace period
+    COMMIT_POINTER_TTL: int = 90 * 24 * 3600
+    INDEX_GC_ENABLED: bool = True
+    INDEX_GC_GRACE_SECS: float = 300.0
+    # Q&A caches: question embeddings (in-process LRU + embedding cache) and answers per (repo, commit, question)
+    QUERY_EMBEDDING_CACHE_SIZE: int = 4096
+    QA_ANSWER_CACHE_ENABLED: bool = True
+    QA_ANSWER_CACHE_TTL: int = 24 * 3600
+    # Reuse the answer of an earlier question with at least this cosine similarity (None disables)
+    QA_SEMANTIC_CACHE_THRESHOLD: Optional[float] = None
+    QA_SEMANTIC_CACHE_MAX_ENTRIES: int = 512
+    # RAG context: candidates retrieved per question, then deduplicated, MMR-ordered, trimmed and merged
+    QA_CONTEXT_CANDIDATES: int = 12
+    QA_CONTEXT_MAX_CHUNKS: int = 8
+    QA_CONTEXT_MAX_TOKENS: int = 3000
+    QA_CONTEXT_MMR_ENABLED: bool = True
+    QA_CONTEXT_MMR_LAMBDA: float = 0.7
+    # Batch Q&A (/api/ask/batch): questions per request and concurrent LLM calls per batch
+    QA_BATCH_MAX_QUESTIONS: int = 50
+    QA_BATCH_CONCURRENCY: int = 4
+    # Conversational Q&A sessions (session_id on /api/ask): last turns verbatim, older turns summarized
+    QA_SESSIONS_ENABLED: bool = True
+    QA_SESSION_TTL: int = 3600
+    QA_SESSION_MAX_TURNS: int = 4
+    QA_SESSION_SUMMARY_MAX_TOKENS: int = 300
+    # Follow-ups at least this similar to the question that retrieved the session's chunks reuse them
+    QA_SESSION_TOPIC_THRESHOLD: float = 0.75
+    # Repository-specific suggested questions generated after each analysis; their answers are prewarmed
+    SUGGESTED_QUESTIONS_ENABLED: bool = True
+    SUGGESTED_QUESTIONS_COUNT: int = 5
+    SUGGESTED_QUESTIONS_TTL: int = 30 * 24 * 3600
+    SUGGESTED_QUESTIONS_PREWARM: bool = True
+    # Shortened embeddings (text-embedding-3 models accept e.g. 512 or 256); None keeps the native 1536
+    EMBEDDING_DIMENSIONS: Optional[int] = None
+
+    # Embedding cache keyed by (model, text hash): "redis", "disk" or "none"
+    EMBEDDING_CACHE_BACKEND: str = "redis"
+    EMBEDDING_CACHE_DTYPE: str = "float16"
+    EMBEDDING_CACHE_TTL: int = 30 * 24 * 3600
+    EMBEDDING_CACHE_PATH: str = "data/embedding_cache"
+
+    # Bulk documentation jobs (POST /api/analyze/batch)
+    BATCH_POLL_INTERVAL_SECS: float = 30.0
+    BATCH_PREPARE_CONCURRENCY: int = 8
+    # Batches still running after this are cancelled (the provider's completion window is 24h)
+    BATCH_MAX_WAIT_SECS: float = 26 * 3600
+
+    # How long the previous commit's documentation sections are kept for incremental regeneration
+    DOC_SECTIONS_CACHE_TTL: int = 7 * 24 * 3600
+
+    # Concurrent analyses of the same repo@commit run once (Redis lock with a renewed lease across workers);
+    # the other requests follow the leader's progress and get its result
+    ANALYSIS_FLIGHT_LEASE_SECS: float = 30.0
+    ANALYSIS_FLIGHT_POLL_INTERVAL: float = 1.0
+    ANALYSIS_FLIGHT_WAIT_TIMEOUT: float = 1800.0
+
     PYTHON_EXTERNAL_MODULES: List[str] = [
         'os', 'sys', 'json', 'datetime', 'time', 'requests', 'urllib',
         'fastapi', 'pydantic', 'sqlalchemy', 'redis', 'asyncio',
@@ -1,21 +1,44 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import asyncio
 import json
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 from app.services.github_service import GitHubService
 from app.services.analysis_service import AnalysisService
 from app.services.llm_service import LLMService
-from app.services.cache_service import CacheService
+from app.services.cache_service import AsyncCacheService
+from app.services.local_cache import LocalCache
+from app.services.cache_codecs import create_codec
+from app.services.cache_tags import repo_tag
 from app.services.vector_service import VectorService
 from app.services.qa_service import QAService
+from app.services.answer_cache import AnswerCache
+from app.services.conversation_store import ConversationStore
+from app.services.code_index_service import CodeIndexService
+from app.services.index_gc import IndexGarbageCollector
+from app.services.single_flight import SingleFlight
+from app.services.llm_scheduler import llm_scheduler
+from app.services.llm_resilience import llm_resilience
+from app.services.llm_providers import get_llm_provider
+from app.services.embedding_cache import create_embedding_cache
+from app.services.batch_service import BatchDocumentationService, get_batch_backend
+from app.services.documentation_sections import build_input_hashes, hash_content, assemble_documentation
 from app.config import settings
 from supabase import create_client, Client
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 다른 워커의 캐시 무효화를 구독 (구독 중에만 로컬 캐시 계층을 사용)
+    cache_service.start_invalidation_listener()
+    yield
+    await cache_service.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS 미들웨어 설정
 origins = [
@@ -37,12 +60,64 @@ app.add_middleware(
 supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
 
 # Initialize services
-github_service = GitHubService(settings.GITHUB_TOKEN)
+github_service = GitHubService(
+    settings.GITHUB_TOKEN,
+    head_ttl_secs=settings.GITHUB_HEAD_TTL_SECS,
+    head_stale_secs=settings.GITHUB_HEAD_STALE_SECS,
+    head_cache_size=settings.GITHUB_HEAD_CACHE_SIZE
+)
 analysis_service = AnalysisService(github_service)
-llm_service = LLMService(settings.OPENAI_API_KEY)
-cache_service = CacheService(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
-vector_service = VectorService()
-qa_service = QAService()
+llm_provider = get_llm_provider(settings.OPENAI_API_KEY)
+llm_service = LLMService(settings.OPENAI_API_KEY, provider=llm_provider)
+cache_service = AsyncCacheService(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    scan_fallback=settings.CACHE_TAG_SCAN_FALLBACK,
+    local_cache=LocalCache(settings.CACHE_LOCAL_MAX_BYTES, settings.CACHE_LOCAL_TTL) if settings.CACHE_LOCAL_ENABLED else None,
+    codec=create_codec(settings.CACHE_CODEC, settings.CACHE_CODEC_LEVEL)
+)
+vector_service = VectorService(provider=llm_provider, embedding_cache=create_embedding_cache(), cache_service=cache_service)
+answer_cache = AnswerCache(
+    cache_service,
+    ttl_secs=settings.QA_ANSWER_CACHE_TTL,
+    semantic_threshold=settings.QA_SEMANTIC_CACHE_THRESHOLD,
+    max_semantic_entries=settings.QA_SEMANTIC_CACHE_MAX_ENTRIES
+) if settings.QA_ANSWER_CACHE_ENABLED else None
+conversation_store = ConversationStore(
+    cache_service,
+    ttl_secs=settings.QA_SESSION_TTL,
+    max_turns=settings.QA_SESSION_MAX_TURNS,
+    summary_max_tokens=settings.QA_SESSION_SUMMARY_MAX_TOKENS,
+    topic_threshold=settings.QA_SESSION_TOPIC_THRESHOLD
+) if settings.QA_SESSIONS_ENABLED else None
+qa_service = QAService(provider=llm_provider, vector_service=vector_service, answer_cache=answer_cache,
+                       cache_service=cache_service, conversation_store=conversation_store)
+code_index_service = CodeIndexService(
+    github_service,
+    analysis_service,
+    vector_service,
+    cache_service,
+    max_tokens=settings.CHUNK_MAX_TOKENS,
+    concurrency=settings.CODE_INDEX_CONCURRENCY,
+    max_files=settings.CODE_INDEX_MAX_FILES,
+    max_file_bytes=settings.CODE_INDEX_MAX_FILE_BYTES,
+    cache_ttl_secs=settings.CODE_CHUNKS_CACHE_TTL
+)
+analysis_flights = SingleFlight(
+    cache_service.client,
+    lease_secs=settings.ANALYSIS_FLIGHT_LEASE_SECS,
+    poll_interval_secs=settings.ANALYSIS_FLIGHT_POLL_INTERVAL,
+    wait_timeout_secs=settings.ANALYSIS_FLIGHT_WAIT_TIMEOUT,
+    prefix="analysis_flight"
+)
+index_gc = IndexGarbageCollector(vector_service, grace_secs=settings.INDEX_GC_GRACE_SECS)
+batch_documentation_service = BatchDocumentationService(
+    llm_service,
+    get_batch_backend(llm_provider),
+    poll_interval_secs=settings.BATCH_POLL_INTERVAL_SECS,
+    max_wait_secs=settings.BATCH_MAX_WAIT_SECS
+)
 
 # Global repository history (in production, this should use a database)
 repo_history: List[Dict[str, Any]] = []
@@ -53,6 +128,15 @@ class AnalyzeRequest(BaseModel):
 class AskRequest(BaseModel):
     question: str
     repo_name: str
+    # 같은 session_id의 질문들은 이전 대화를 이어감 (없으면 단일 질문)
+    session_id: Optional[str] = None
+
+class BatchAskRequest(BaseModel):
+    questions: List[str]
+    repo_name: str
+
+class BatchAnalyzeRequest(BaseModel):
+    repo_urls: List[str]
 
 class DeleteRequest(BaseModel):
     task_ids: List[str]
@@ -66,70 +150,259 @@ async def update_task_status(task_id: str, status: str, data: Dict = None, error
         update_data["error"] = error
     
     await asyncio.to_thread(supabase.table("analysis_tasks").update(update_data).eq("id", task_id).execute)
+    # 같은 분석을 기다리는 태스크들도 진행 상태를 따라감 (완료/실패는 각자 결과와 함께 기록)
+    if status not in ("completed", "failed"):
+        await analysis_flights.report(task_id, status)
+
+async def prepare_analysis(task_id: str, repo_name: str) -> Optional[Dict[str, Any]]:
+    """Resolve the repository head. Completes the task from the cache and returns None on a hit."""
+    await update_task_status(task_id, "fetching_structure")
+    
+    # 최근에 본 리포지토리는 캐시된 head로 바로 결과 캐시를 확인 (head는 백그라운드에서 재확인)
+    head = await github_service.resolve_head(repo_name)
+    cached_result = await cache_service.get(f"{repo_name}:{head['commit_hash']}")
+    if not cached_result and head["cached"]:
+        # 새로 분석하기 전에는 최신 head인지 확인
+        head = await github_service.resolve_head(repo_name, revalidate=True)
+        cached_result = await cache_service.get(f"{repo_name}:{head['commit_hash']}")
+    commit_hash = head["commit_hash"]
+    cache_key = f"{repo_name}:{commit_hash}"
+
+    # Update commit_hash in the task table
+    await asyncio.to_thread(supabase.table("analysis_tasks").update({"commit_hash": commit_hash}).eq("id", task_id).execute)
+
+    if cached_result:
+        await update_task_status(task_id, "completed", data=cached_result)
+        return None
+
+    # 파일 트리는 캐시 미스일 때만 조회
+    head.pop("cached")
+    structure = {**head, "files": await github_service.get_repository_tree(repo_name, commit_hash)}
+    return {"structure": structure, "commit_hash": commit_hash, "cache_key": cache_key}
+
+async def collect_documentation_inputs(task_id: str, repo_name: str, structure: Dict[str, Any]) -> Dict[str, Any]:
+    """Fetch and analyze the priority files and gather everything documentation is generated from."""
+    await update_task_status(task_id, "analyzing_files")
+    priority_files = github_service.get_priority_files(structure["files"])[:5]
+    file_analysis = {}
+    readme_content = ""
+    readme_sha = None
+    for file_path in priority_files:
+        content = await github_service.get_file_content(repo_name, file_path)
+        if file_path.lower().endswith('.md'):
+            readme_content = content
+            readme_sha = structure["files"][file_path].get("sha")
+        lang = structure["files"][file_path]["type"]
+        if lang in ['python', 'javascript', 'typescript']:
+             file_analysis[file_path] = analysis_service.analyze_code(content, lang)
+
+    repo_info = {
+        "name": structure["name"],
+        "description": structure.get("description", "No description available"),
+        "main_language": structure["main_language"]
+    }
+    
+    architecture_analysis = analysis_service.analyze_project_architecture(file_analysis, repo_info)
+
+    # Sections whose input hashes still match are reused from the previous commit
+    previous = await cache_service.get(f"{repo_name}:sections") or {}
+    return {
+        "repo_info": repo_info,
+        "readme_content": readme_content,
+        "file_analysis": file_analysis,
+        "architecture": architecture_analysis,
+        "input_hashes": build_input_hashes(readme_sha or hash_content(readme_content), file_analysis, repo_info),
+        "previous_sections": previous.get("sections")
+    }
+
+async def generate_suggested_questions(inputs: Dict[str, Any], documentation: str) -> List[str]:
+    """Repository-specific Q&A suggestions; an empty list falls back to the default questions."""
+    if not settings.SUGGESTED_QUESTIONS_ENABLED:
+        return []
+    try:
+        return await asyncio.to_thread(
+            llm_service.run_question_suggestions,
+            inputs["repo_info"], documentation, inputs["architecture"], settings.SUGGESTED_QUESTIONS_COUNT
+        )
+    except Exception as e:
+        print(f"Warning: Failed to generate suggested questions: {e}")
+        return []
+
+async def finalize_analysis(task_id: str, repo_name: str, commit_hash: str, inputs: Dict[str, Any],
+                            sections: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Assemble the documentation, cache it, store its embeddings and complete the task. Returns the result."""
+    documentation = assemble_documentation(sections)
+    suggested_questions = await generate_suggested_questions(inputs, documentation)
+    await cache_service.set(
+        f"{repo_name}:sections",
+        {"commit_hash": commit_hash, "sections": sections},
+        expiration_secs=settings.DOC_SECTIONS_CACHE_TTL,
+        tags=[repo_tag(repo_name)]
+    )
+    
+    result = {
+        "result": documentation,
+        "architecture": inputs["architecture"],
+        "regenerated_sections": [key for key, section in sections.items() if section["regenerated"]],
+        "suggested_questions": suggested_questions
+    }
+    
+    await update_task_status(task_id, "storing_embeddings", data=result)
+    await cache_service.set(f"{repo_name}:{commit_hash}", result, tags=[repo_tag(repo_name)])
+    
+    store_result = await vector_service.store_document(repo_name, documentation, commit_hash)
+    
+    if store_result["success"]:
+        # 새 커밋의 청크가 모두 저장된 뒤에 검색 대상을 전환
+        await vector_service.set_current_commit(repo_name, commit_hash)
+    else:
+        print(f"Warning: Failed to store embeddings: {store_result.get('error', 'Unknown error')}")
+    await qa_service.save_suggested_questions(repo_name, commit_hash, suggested_questions)
+    
+    await update_task_status(task_id, "completed", data=result)
+    return result
+
+async def index_repository_code(repo_name: str, commit_hash: str, structure: Dict[str, Any]):
+    """Background stage after completion: embed symbol-level source chunks for Q&A."""
+    if not settings.CODE_INDEX_ENABLED:
+        return
+    result = await code_index_service.index_repository(repo_name, commit_hash, structure["files"])
+    if result["success"]:
+        print(f"Indexed code for {repo_name}@{commit_hash}: {result}")
+    else:
+        print(f"Warning: Failed to index code for {repo_name}: {result.get('error', 'Unknown error')}")
+
+async def prewarm_suggested_answers(repo_name: str):
+    """Background stage after indexing: answer the suggested questions so that clicking one hits the answer cache."""
+    if not settings.SUGGESTED_QUESTIONS_PREWARM:
+        return
+    questions = await qa_service.get_suggested_questions(repo_name)
+    stats = await qa_service.prewarm_answers(repo_name, questions)
+    print(f"Prewarmed suggested answers for {repo_name}: {stats}")
+
+async def collect_superseded_chunks(repo_name: str):
+    """Background stage after indexing: delete chunks of commits the current commit replaced."""
+    if not settings.INDEX_GC_ENABLED:
+        return
+    result = await index_gc.collect(repo_name)
+    if result["success"]:
+        if result["deleted_count"]:
+            print(f"Deleted superseded chunks of {repo_name}: {result}")
+    else:
+        print(f"Warning: Failed to collect superseded chunks for {repo_name}: {result.get('error', 'Unknown error')}")
 
 async def run_analysis_pipeline(task_id: str, repo_url: str):
     """The actual analysis pipeline that runs in the background."""
     try:
         repo_name = "/".join(repo_url.split("/")[-2:])
-        await update_task_status(task_id, "fetching_structure")
-        
-        structure = await github_service.get_repository_structure(repo_name)
-        commit_hash = structure["commit_hash"]
-        cache_key = f"{repo_name}:{commit_hash}"
+        prepared = await prepare_analysis(task_id, repo_name)
+        if prepared is None:
+            return
 
-        # Update commit_hash in the task table
-        await asyncio.to_thread(supabase.table("analysis_tasks").update({"commit_hash": commit_hash}).eq("id", task_id).execute)
+        async def analyze() -> Dict[str, Any]:
+            inputs = await collect_documentation_inputs(task_id, repo_name, prepared["structure"])
 
-        cached_result = cache_service.get(cache_key)
-        if cached_result:
-            await update_task_status(task_id, "completed", data=cached_result)
-            return
+            await update_task_status(task_id, "generating_documentation")
+            sections = await asyncio.to_thread(
+                llm_service.run_incremental_documentation_pipeline,
+                inputs["repo_info"], inputs["readme_content"], inputs["file_analysis"],
+                inputs["input_hashes"], inputs["previous_sections"]
+            )
 
-        await update_task_status(task_id, "analyzing_files")
-        priority_files = github_service.get_priority_files(structure["files"])[:5]
-        file_analysis = {}
-        readme_content = ""
-        for file_path in priority_files:
-            content = await github_service.get_file_content(repo_name, file_path)
-            if file_path.lower().endswith('.md'):
-                readme_content = content
-            lang = structure["files"][file_path]["type"]
-            if lang in ['python', 'javascript', 'typescript']:
-                 file_analysis[file_path] = analysis_service.analyze_code(content, lang)
-
-        await update_task_status(task_id, "generating_documentation")
-        repo_info = {
-            "name": structure["name"],
-            "description": structure.get("description", "No description available"),
-            "main_language": structure["main_language"]
-        }
-        
-        architecture_analysis = analysis_service.analyze_project_architecture(file_analysis, repo_info)
-        documentation = llm_service.run_documentation_pipeline(repo_info, readme_content, file_analysis)
-        
-        result = {
-            "result": documentation,
-            "architecture": architecture_analysis
-        }
-        
-        await update_task_status(task_id, "storing_embeddings", data=result)
-        cache_service.set(cache_key, result)
-        
-        store_result = await vector_service.store_document(repo_name, documentation, commit_hash)
-        
-        if not store_result["success"]:
-            print(f"Warning: Failed to store embeddings: {store_result.get('error', 'Unknown error')}")
-        
-        await update_task_status(task_id, "completed", data=result)
+            return await finalize_analysis(task_id, repo_name, prepared["commit_hash"], inputs, sections)
+
+        async def follow(status: str):
+            await update_task_status(task_id, status)
+
+        # 같은 repo@commit 분석이 진행 중이면 새로 실행하지 않고 그 결과를 받음
+        result, led = await analysis_flights.run(
+            prepared["cache_key"], task_id, analyze, lambda: cache_service.get(prepared["cache_key"]), follow
+        )
+        if not led:
+            await update_task_status(task_id, "completed", data=result)
+            return
 
     except Exception as e:
         print(f"Error during analysis pipeline for task {task_id}: {e}")
         await update_task_status(task_id, "failed", error=str(e))
+        return
+
+    # 태스크는 이미 완료 상태이므로 코드 인덱싱 실패는 결과에 영향을 주지 않음
+    await index_repository_code(repo_name, prepared["commit_hash"], prepared["structure"])
+    await prewarm_suggested_answers(repo_name)
+    await collect_superseded_chunks(repo_name)
+
+async def run_batch_analysis_pipeline(tasks: List[Dict[str, str]]):
+    """Bulk pipeline: documentation prompts of all repositories go through the batch API together."""
+    jobs = []
+    prepared_tasks = {}
+    semaphore = asyncio.Semaphore(settings.BATCH_PREPARE_CONCURRENCY)
+
+    async def prepare(task: Dict[str, str]):
+        task_id = task["task_id"]
+        async with semaphore:
+            try:
+                repo_name = "/".join(task["repo_url"].split("/")[-2:])
+                prepared = await prepare_analysis(task_id, repo_name)
+                if prepared is None:
+                    return
+                inputs = await collect_documentation_inputs(task_id, repo_name, prepared["structure"])
+                await update_task_status(task_id, "queued_for_batch")
+                prepared_tasks[task_id] = (repo_name, prepared["commit_hash"], inputs, prepared["structure"])
+                jobs.append({"id": task_id, **inputs})
+            except Exception as e:
+                print(f"Error preparing batch analysis for task {task_id}: {e}")
+                await update_task_status(task_id, "failed", error=str(e))
+
+    await asyncio.gather(*(prepare(task) for task in tasks))
+    if not jobs:
+        return
+
+    try:
+        completed, failed = await batch_documentation_service.generate(jobs)
+    except Exception as e:
+        print(f"Error during batch documentation generation: {e}")
+        completed, failed = {}, {job["id"]: str(e) for job in jobs}
+
+    finalized = []
+    for task_id, sections in completed.items():
+        repo_name, commit_hash, inputs, structure = prepared_tasks[task_id]
+        try:
+            await finalize_analysis(task_id, repo_name, commit_hash, inputs, sections)
+            finalized.append((repo_name, commit_hash, structure))
+        except Exception as e:
+            print(f"Error finalizing batch analysis for task {task_id}: {e}")
+            await update_task_status(task_id, "failed", error=str(e))
+
+    for task_id, error in failed.items():
+        await update_task_status(task_id, "failed", error=error)
+
+    for repo_name, commit_hash, structure in finalized:
+        await index_repository_code(repo_name, commit_hash, structure)
+        await prewarm_suggested_answers(repo_name)
+
+    # 포인터 전환 시각이 비슷하므로 유예 시간 대기는 사실상 첫 리포지토리에서만 발생
+    await asyncio.gather(*(collect_superseded_chunks(repo_name) for repo_name in {repo_name for repo_name, _, _ in finalized}))
 
 @app.get("/api/health")
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """Operational metrics (LLM queue depth, wait times, budgets, retries, hedging, cache hit rates and vector memory)."""
+    return {
+        "llm_scheduler": llm_scheduler.get_metrics(),
+        "llm_resilience": llm_resilience.get_metrics(),
+        "embedding_cache": vector_service.embedding_cache.get_metrics() if vector_service.embedding_cache else None,
+        "answer_cache": answer_cache.get_metrics() if answer_cache else None,
+        "cache_local": cache_service.get_local_metrics(),
+        "conversations": conversation_store.get_metrics() if conversation_store else None,
+        "analysis_flights": analysis_flights.get_metrics(),
+        "github_heads": github_service.get_head_metrics(),
+        "vector_backend": vector_service.backend.get_metrics()
+    }
+
 @app.post("/api/analyze")
 async def analyze_repository(request: AnalyzeRequest, background_tasks: BackgroundTasks):
     repo_name = "/".join(request.repo_url.split("/")[-2:])
@@ -154,6 +427,33 @@ async def analyze_repository(request: AnalyzeRequest, background_tasks: Backgrou
     background_tasks.add_task(run_analysis_pipeline, task_id, request.repo_url)
     return {"task_id": task_id}
 
+@app.post("/api/analyze/batch")
+async def analyze_repositories_batch(request: BatchAnalyzeRequest, background_tasks: BackgroundTasks):
+    """Bulk offline analysis: optimized for throughput per dollar rather than latency."""
+    if not request.repo_urls:
+        raise HTTPException(status_code=400, detail="No repository URLs provided")
+
+    repo_names = ["/".join(repo_url.split("/")[-2:]) for repo_url in request.repo_urls]
+    response = await asyncio.to_thread(supabase.table("analysis_tasks").insert([
+        {"repo_name": repo_name, "status": "pending"} for repo_name in repo_names
+    ]).execute)
+
+    if not response.data or len(response.data) != len(repo_names):
+        raise HTTPException(status_code=500, detail="Failed to create analysis tasks.")
+
+    tasks = [
+        {"task_id": row["id"], "repo_url": repo_url}
+        for row, repo_url in zip(response.data, request.repo_urls)
+    ]
+    for repo_name in repo_names:
+        repo_history.append({
+            "repo_name": repo_name,
+            "timestamp": datetime.now().isoformat()
+        })
+
+    background_tasks.add_task(run_batch_analysis_pipeline, tasks)
+    return {"task_ids": [task["task_id"] for task in tasks]}
+
 @app.get("/api/result/{task_id}")
 async def get_result(task_id: str):
     response = await asyncio.to_thread(supabase.table("analysis_tasks").select("*").eq("id", task_id).execute)
@@ -205,6 +505,7 @@ async def delete_analyses(request: DeleteRequest):
         
         deleted_tasks = []
         failed_deletes = []
+        cache_keys = []
         
         for task_id in request.task_ids:
             try:
@@ -233,12 +534,8 @@ async def delete_analyses(request: DeleteRequest):
                     if repo_name and commit_hash:
                         await vector_service.delete_repo_documents(repo_name, commit_hash)
                         
-                        # Clear cache
-                        cache_key = f"{repo_name}:{commit_hash}"
-                        try:
-                            cache_service.client.delete(cache_key)
-                        except Exception as cache_error:
-                            print(f"Warning: Failed to clear cache for {cache_key}: {cache_error}")
+                        # Cached results are cleared together after the loop
+                        cache_keys.append(f"{repo_name}:{commit_hash}")
                     
                     deleted_tasks.append(task_id)
                 else:
@@ -246,6 +543,12 @@ async def delete_analyses(request: DeleteRequest):
                     
             except Exception as e:
                 failed_deletes.append({"id": task_id, "reason": str(e)})
+
+        # Clear cache (one round trip for all deleted analyses)
+        try:
+            await cache_service.delete_multiple(cache_keys)
+        except Exception as cache_error:
+            print(f"Warning: Failed to clear cache for {cache_keys}: {cache_error}")
         
         return {
             "deleted_count": len(deleted_tasks),
@@ -281,12 +584,71 @@ async def ask_question(request: AskRequest):
     try:
         result = await qa_service.answer_question(
             question=request.question,
-            repo_name=request.repo_name
+            repo_name=request.repo_name,
+            session_id=request.session_id
         )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
 
+@app.post("/api/ask/stream")
+async def ask_question_stream(request: AskRequest, http_request: Request):
+    """질문 답변을 Server-Sent Events로 스트리밍 (sources 이벤트 후 token 이벤트들, 마지막에 done 또는 error)"""
+    async def events():
+        stream = qa_service.stream_answer(request.question, request.repo_name, session_id=request.session_id)
+        try:
+            async for event in stream:
+                # 클라이언트가 떠나면 스트림을 닫아 LLM 생성도 중단
+                if await http_request.is_disconnected():
+                    break
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/ask/batch")
+async def ask_questions_batch(request: BatchAskRequest, http_request: Request):
+    """여러 질문의 답변을 끝나는 순서대로 한 줄에 하나씩 JSON(NDJSON)으로 스트리밍 (index는 요청 내 질문 위치)"""
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="No questions provided")
+    if len(request.questions) > settings.QA_BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.QA_BATCH_MAX_QUESTIONS} questions per request")
+
+    async def lines():
+        stream = qa_service.answer_batch(request.questions, request.repo_name)
+        try:
+            async for result in stream:
+                # 클라이언트가 떠나면 남은 답변 생성을 취소
+                if await http_request.is_disconnected():
+                    break
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/api/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """대화 세션 기록 삭제 (새 대화 시작)"""
+    if conversation_store:
+        await conversation_store.clear(session_id)
+    return {"message": "Session cleared", "session_id": session_id}
+
+@app.delete("/api/cache/{repo_name:path}")
+async def clear_repository_cache(repo_name: str):
+    """리포지토리의 캐시 항목 전체 삭제 (분석 결과, 추천 질문, 답변 캐시 등)"""
+    deleted = await cache_service.clear_repo_cache(repo_name)
+    return {"message": "Repository cache cleared", "repo_name": repo_name, "deleted_count": deleted}
+
 @app.get("/api/suggestions/{repo_name:path}")
 async def get_suggested_questions(repo_name: str):
     """리포지토리에 대한 추천 질문들 반환"""
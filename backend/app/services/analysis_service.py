@@ -112,7 +112,8 @@ class AnalysisService:
             if name_node:
                 classes.append({
                     "name": name_node.text.decode('utf8'),
-                    "line": name_node.start_point[0] + 1
+                    "line": name_node.start_point[0] + 1,
+                    **self._node_span(class_node)
                 })
         return classes
 
@@ -131,10 +132,42 @@ class AnalysisService:
             if name_node:
                 functions.append({
                     "name": name_node.text.decode('utf8'),
-                    "line": name_node.start_point[0] + 1
+                    "line": name_node.start_point[0] + 1,
+                    **self._node_span(func_node)
                 })
         return functions
 
+    def _node_span(self, node) -> Dict[str, int]:
+        """심볼의 시작/끝 줄 (1-based, 데코레이터 포함)"""
+        if node.parent is not None and node.parent.type == 'decorated_definition':
+            node = node.parent
+        return {"start_line": node.start_point[0] + 1, "end_line": node.end_point[0] + 1}
+
+    def _block_end_line(self, lines: List[str], index: int, language: str) -> int:
+        """Fallback 분석용: index 줄에서 시작하는 블록의 끝 줄 (1-based)"""
+        if language == 'python':
+            indent = len(lines[index]) - len(lines[index].lstrip())
+            end = index
+            for i in range(index + 1, len(lines)):
+                if not lines[i].strip():
+                    continue
+                if len(lines[i]) - len(lines[i].lstrip()) <= indent and not lines[i].lstrip().startswith((')', ']', '}')):
+                    break
+                end = i
+            return end + 1
+
+        # JavaScript/TypeScript: 중괄호 균형으로 블록 끝을 찾음
+        depth = 0
+        opened = False
+        for i in range(index, len(lines)):
+            depth += lines[i].count('{') - lines[i].count('}')
+            opened = opened or '{' in lines[i]
+            if opened and depth <= 0:
+                return i + 1
+            if not opened and i > index and lines[i].rstrip().endswith(';'):
+                return i + 1
+        return len(lines) if opened else index + 1
+
     def analyze_project_architecture(self, file_analysis: Dict[str, Dict], repo_info: Dict) -> Dict[str, Any]:
         """프로젝트 아키텍처 및 컴포넌트 간 의존성 관계를 분석"""
         try:
@@ -332,16 +365,23 @@ class AnalysisService:
                 if match:
                     analysis["classes"].append({
                         "name": match.group(1),
-                        "line": i + 1
+                        "line": i + 1,
+                        "start_line": i + 1,
+                        "end_line": self._block_end_line(lines, i, language)
                     })
             
             # Find functions (including async def)
             for i, line in enumerate(lines):
                 match = re.match(r'^\s*(?:async\s+)?def\s+(\w+)', line)
                 if match:
+                    start = i
+                    while start > 0 and lines[start - 1].strip().startswith('@'):
+                        start -= 1
                     analysis["functions"].append({
                         "name": match.group(1),
-                        "line": i + 1
+                        "line": i + 1,
+                        "start_line": start + 1,
+                        "end_line": self._block_end_line(lines, i, language)
                     })
                     
         elif language in ['javascript', 'typescript']:
@@ -356,7 +396,9 @@ class AnalysisService:
                 if match:
                     analysis["classes"].append({
                         "name": match.group(1),
-                        "line": i + 1
+                        "line": i + 1,
+                        "start_line": i + 1,
+                        "end_line": self._block_end_line(lines, i, language)
                     })
             
             # Find functions
@@ -368,7 +410,9 @@ class AnalysisService:
                     if func_name:
                         analysis["functions"].append({
                             "name": func_name,
-                            "line": i + 1
+                            "line": i + 1,
+                            "start_line": i + 1,
+                            "end_line": self._block_end_line(lines, i, language)
                         })
         
         print(f"Fallback analysis for {language}: {len(analysis['imports'])} imports, {len(analysis['classes'])} classes, {len(analysis['functions'])} functions")
@@ -0,0 +1,230 @@
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so that dot products are cosine similarities."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+def _kmeans(data: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Euclidean k-means; returns (centroids, assignments)."""
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        distances = (centroids ** 2).sum(axis=1) - 2.0 * (data @ centroids.T)
+        assignments = np.argmin(distances, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, data)
+        counts = np.bincount(assignments, minlength=k)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    distances = (centroids ** 2).sum(axis=1) - 2.0 * (data @ centroids.T)
+    return centroids, np.argmin(distances, axis=1)
+
+
+class ScalarQuantizer:
+    """int8 scalar quantization with per-dimension ranges (4x smaller than float32)."""
+
+    kind = "int8"
+
+    def __init__(self, minimum: np.ndarray, step: np.ndarray):
+        self.minimum = minimum
+        self.step = step
+
+    @classmethod
+    def train(cls, vectors: np.ndarray) -> "ScalarQuantizer":
+        minimum = np.min(vectors, axis=0).astype(np.float32)
+        step = (np.max(vectors, axis=0) - minimum).astype(np.float32) / 255.0
+        return cls(minimum, np.where(step == 0, 1e-8, step).astype(np.float32))
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        levels = np.rint((np.asarray(vectors, dtype=np.float32) - self.minimum) / self.step)
+        return (np.clip(levels, 0, 255) - 128).astype(np.int8)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        # q . (min + (code + 128) * step), without decoding the vectors
+        weighted = query * self.step
+        offset = float(query @ self.minimum + 128.0 * weighted.sum())
+        return codes.astype(np.float32) @ weighted + offset
+
+    def to_arrays(self) -> dict:
+        return {"minimum": self.minimum, "step": self.step}
+
+
+class ProductQuantizer:
+    """Product quantization: each `sub_dims`-wide slice is replaced by one of 256 centroid ids.
+
+    With 4-dimensional sub-vectors a float32 vector shrinks 16x; queries are scored with
+    per-slice lookup tables (asymmetric distance computation).
+    """
+
+    kind = "pq"
+
+    def __init__(self, centroids: np.ndarray):
+        # (subvectors, clusters, sub_dims)
+        self.centroids = centroids
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, sub_dims: int = 4, iterations: int = 8, sample_size: int = 8192, seed: int = 0) -> "ProductQuantizer":
+        dimensions = vectors.shape[1]
+        sub_dims = max(1, min(sub_dims, dimensions))
+        while dimensions % sub_dims:
+            sub_dims -= 1
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), size=min(len(vectors), sample_size), replace=False))], dtype=np.float32)
+        clusters = min(256, len(sample))
+        centroids = np.stack([
+            _kmeans(sample[:, start:start + sub_dims], clusters, iterations, rng)[0]
+            for start in range(0, dimensions, sub_dims)
+        ])
+        return cls(centroids.astype(np.float32))
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        subvectors, _, sub_dims = self.centroids.shape
+        codes = np.empty((len(vectors), subvectors), dtype=np.uint8)
+        for start in range(0, len(vectors), 16384):
+            block = np.asarray(vectors[start:start + 16384], dtype=np.float32)
+            for j in range(subvectors):
+                centroids = self.centroids[j]
+                distances = (centroids ** 2).sum(axis=1) - 2.0 * (block[:, j * sub_dims:(j + 1) * sub_dims] @ centroids.T)
+                codes[start:start + len(block), j] = np.argmin(distances, axis=1)
+        return codes
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        subvectors, _, sub_dims = self.centroids.shape
+        tables = np.einsum("mks,ms->mk", self.centroids, query.reshape(subvectors, sub_dims))
+        return tables[np.arange(subvectors), codes].sum(axis=1)
+
+    def to_arrays(self) -> dict:
+        return {"centroids": self.centroids}
+
+
+QUANTIZERS = {ScalarQuantizer.kind: ScalarQuantizer, ProductQuantizer.kind: ProductQuantizer}
+
+
+def train_quantizer(kind: str, vectors: np.ndarray, pq_sub_dims: int = 4):
+    """Train the quantizer for a storage mode: "none", "int8" or "pq"."""
+    if kind == "none":
+        return None
+    if kind == "int8":
+        return ScalarQuantizer.train(vectors)
+    if kind == "pq":
+        return ProductQuantizer.train(vectors, sub_dims=pq_sub_dims)
+    raise ValueError(f"Unknown vector quantization: {kind}")
+
+
+def save_quantizer(quantizer, path: str):
+    if quantizer is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    np.savez(path, kind=quantizer.kind, **quantizer.to_arrays())
+
+
+def load_quantizer(path: str):
+    if not os.path.exists(path):
+        return None
+    data = np.load(path)
+    arrays = {name: data[name] for name in data.files if name != "kind"}
+    return QUANTIZERS[str(data["kind"])](**arrays)
+
+
+class IVFIndex:
+    """Inverted-file index over L2-normalized vectors (cosine similarity).
+
+    Vectors are clustered with spherical k-means; a query scans only the `nprobe` closest
+    lists. Small collections are searched exhaustively, which is already sub-millisecond.
+    """
+
+    def __init__(self, centroids: Optional[np.ndarray] = None, order: Optional[np.ndarray] = None, offsets: Optional[np.ndarray] = None):
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+
+    @property
+    def is_flat(self) -> bool:
+        return self.centroids is None
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, min_rows: int = 4096, nlist: Optional[int] = None, iterations: int = 10, seed: int = 0) -> "IVFIndex":
+        count = len(vectors)
+        if count < min_rows:
+            return cls()
+
+        nlist = nlist or max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(count, size=min(count, nlist * 64), replace=False)]
+        centroids = np.array(sample[rng.choice(len(sample), size=nlist, replace=False)], dtype=np.float32)
+
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty clusters with random sample points
+                sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()), replace=False)]
+            centroids = normalize_rows(sums)
+
+        assignments = np.empty(count, dtype=np.int64)
+        for start in range(0, count, 65536):
+            assignments[start:start + 65536] = np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=nlist))])
+        return cls(centroids, order, offsets)
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        """Sorted row ids in the `nprobe` lists closest to the query, or None for a flat index."""
+        if self.is_flat:
+            return None
+        probes = top_k(self.centroids @ query, min(nprobe, len(self.centroids)))
+        return np.sort(np.concatenate([self.order[self.offsets[p]:self.offsets[p + 1]] for p in probes]))
+
+    def search(self, vectors: np.ndarray, query: np.ndarray, k: int, nprobe: int = 8,
+               quantizer=None, codes: Optional[np.ndarray] = None, rerank_factor: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (row ids, cosine similarities) of the k nearest vectors.
+
+        With a quantizer, candidates are first scored on the compact `codes`; only the best
+        `k * rerank_factor` are read from the full-precision `vectors` and rescored exactly.
+        """
+        query = normalize_rows(query)
+        candidate_ids = self.candidates(query, nprobe)
+        if quantizer is not None:
+            approximate = quantizer.scores(codes if candidate_ids is None else codes[candidate_ids], query)
+            shortlist = top_k(approximate, k * rerank_factor)
+            # Sorted ids keep the memmap reads sequential
+            candidate_ids = np.sort(shortlist if candidate_ids is None else candidate_ids[shortlist])
+        if candidate_ids is None:
+            scores = np.asarray(vectors @ query)
+            best = top_k(scores, k)
+            return best, scores[best]
+        scores = np.asarray(vectors[candidate_ids] @ query)
+        best = top_k(scores, k)
+        return candidate_ids[best], scores[best]
+
+    def save(self, path: str):
+        if self.is_flat:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        np.savez(path, centroids=self.centroids, order=self.order, offsets=self.offsets)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        if not os.path.exists(path):
+            return cls()
+        data = np.load(path)
+        return cls(data["centroids"], data["order"], data["offsets"])
@@ -0,0 +1,126 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.ann_index import normalize_rows
+from app.services.cache_service import AsyncCacheService
+from app.services.cache_tags import repo_tag
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?？!.。]+$")
+
+
+def normalize_question(question: str) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a question, used as cache key."""
+    return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", question.strip().lower()))
+
+
+class AnswerCache:
+    """Answers keyed by (repo, commit, normalized question) in Redis.
+
+    The commit is part of the key, so answers about an older commit are never served after
+    the repo was re-analyzed. With `semantic_threshold` set, a miss on the exact key also
+    compares the question's embedding with the embeddings of questions answered before for
+    the same repo/commit (kept in process, at most `max_semantic_entries` per commit) and
+    reuses the answer of the closest one if its cosine similarity reaches the threshold.
+    """
+
+    VERSION = "v1"
+    PREFIX = "qa_answer"
+
+    def __init__(self, cache_service: AsyncCacheService, ttl_secs: int = 24 * 3600,
+                 semantic_threshold: Optional[float] = None, max_semantic_entries: int = 512, max_commits: int = 128):
+        self.cache_service = cache_service
+        self.ttl_secs = ttl_secs
+        self.semantic_threshold = semantic_threshold
+        self.max_semantic_entries = max_semantic_entries
+        self.max_commits = max_commits
+        self._lock = threading.Lock()
+        # (repo, commit) -> question hash -> normalized embedding
+        self._embeddings: "OrderedDict[Tuple[str, str], OrderedDict[str, np.ndarray]]" = OrderedDict()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.semantic_threshold is not None
+
+    def _key(self, repo_name: str, commit_hash: str, question_hash: str) -> str:
+        return f"{self.PREFIX}:{self.VERSION}:{repo_name}:{commit_hash}:{question_hash}"
+
+    def _question_hash(self, question: str) -> str:
+        return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+    def _nearest(self, repo_name: str, commit_hash: str, query_embedding: List[float]) -> Optional[str]:
+        with self._lock:
+            entries = self._embeddings.get((repo_name, commit_hash))
+            if not entries:
+                return None
+            hashes = list(entries)
+            matrix = np.stack(list(entries.values()))
+        scores = matrix @ normalize_rows(np.asarray(query_embedding, dtype=np.float32)[None, :])[0]
+        best = int(np.argmax(scores))
+        return hashes[best] if scores[best] >= self.semantic_threshold else None
+
+    async def get(self, repo_name: str, commit_hash: str, question: str,
+                  query_embedding: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
+        """Cached answer for the question (exact, then semantic if an embedding is given) or None."""
+        question_hash = self._question_hash(question)
+        cached = await self.cache_service.get(self._key(repo_name, commit_hash, question_hash))
+        if cached is not None:
+            self.stats["exact_hits"] += 1
+            return {**cached, "cached": "exact"}
+
+        if self.semantic_enabled and query_embedding is not None:
+            nearest = self._nearest(repo_name, commit_hash, query_embedding)
+            if nearest is not None:
+                cached = await self.cache_service.get(self._key(repo_name, commit_hash, nearest))
+                if cached is not None:
+                    self.stats["semantic_hits"] += 1
+                    return {**cached, "cached": "semantic"}
+
+        self.stats["misses"] += 1
+        return None
+
+    async def get_many(self, repo_name: str, commit_hash: str, questions: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Exact-match cached answers of several questions in one round trip (None where missing)."""
+        keys = [self._key(repo_name, commit_hash, self._question_hash(question)) for question in questions]
+        results = []
+        for cached in await self.cache_service.mget(keys):
+            self.stats["exact_hits" if cached is not None else "misses"] += 1
+            results.append({**cached, "cached": "exact"} if cached is not None else None)
+        return results
+
+    async def set(self, repo_name: str, commit_hash: str, question: str, answer: Dict[str, Any],
+                  query_embedding: Optional[List[float]] = None):
+        question_hash = self._question_hash(question)
+        await self.cache_service.set(self._key(repo_name, commit_hash, question_hash), answer, self.ttl_secs,
+                                     tags=[repo_tag(repo_name)])
+        if not self.semantic_enabled or query_embedding is None:
+            return
+        vector = normalize_rows(np.asarray(query_embedding, dtype=np.float32)[None, :])[0]
+        with self._lock:
+            entries = self._embeddings.setdefault((repo_name, commit_hash), OrderedDict())
+            self._embeddings.move_to_end((repo_name, commit_hash))
+            entries[question_hash] = vector
+            entries.move_to_end(question_hash)
+            while len(entries) > self.max_semantic_entries:
+                entries.popitem(last=False)
+            while len(self._embeddings) > self.max_commits:
+                self._embeddings.popitem(last=False)
+
+    async def invalidate_all(self) -> int:
+        """Drop the cached answers of every repository (e.g. after the prompt changed); returns the deleted count."""
+        with self._lock:
+            self._embeddings.clear()
+        return await self.cache_service.invalidate_prefix(f"{self.PREFIX}:")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            semantic_entries = sum(len(entries) for entries in self._embeddings.values())
+        lookups = sum(self.stats.values())
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        return {**self.stats, "hit_rate": round(hits / lookups, 4) if lookups else 0.0, "semantic_entries": semantic_entries}
@@ -0,0 +1,265 @@
+import asyncio
+import io
+import json
+import uuid
+from typing import Dict, Any, List, Tuple
+
+from app.config import settings
+from app.services.documentation_sections import DOCUMENTATION_SECTIONS, find_stale_sections
+from app.services.llm_providers import LLMProvider
+from app.services.llm_service import (
+    LLMService,
+    SUMMARIZATION_TEMPLATE,
+    STRUCTURE_ANALYSIS_TEMPLATE,
+    SECTION_TEMPLATE,
+)
+
+TERMINAL_FAILURE_STATUSES = {"failed", "expired", "cancelled"}
+
+
+class BatchBackend:
+    """Asynchronous bulk completion API: submit many prompts, poll, then fetch the results."""
+
+    async def submit(self, requests: List[Dict[str, Any]]) -> str:
+        raise NotImplementedError
+
+    async def poll(self, batch_id: str) -> str:
+        raise NotImplementedError
+
+    async def results(self, batch_id: str) -> Dict[str, str]:
+        raise NotImplementedError
+
+    async def cancel(self, batch_id: str):
+        raise NotImplementedError
+
+
+def build_batch_input(requests: List[Dict[str, Any]]) -> bytes:
+    """Render requests as the JSONL input file expected by the OpenAI Batch API."""
+    lines = []
+    for request in requests:
+        lines.append(json.dumps({
+            "custom_id": request["custom_id"],
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": request["model"],
+                "temperature": request.get("temperature", 0.3),
+                "messages": [{"role": "user", "content": request["prompt"]}],
+            },
+        }, ensure_ascii=False))
+    return "\n".join(lines).encode("utf-8")
+
+
+def parse_batch_output(text: str) -> Dict[str, str]:
+    """Extract the completion text per custom_id from an OpenAI Batch API output file."""
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            continue
+        choices = response.get("body", {}).get("choices") or []
+        if choices:
+            results[record["custom_id"]] = choices[0]["message"]["content"]
+    return results
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API: half the price of synchronous calls, completed within 24 hours."""
+
+    def __init__(self, api_key: str):
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=api_key)
+
+    async def submit(self, requests: List[Dict[str, Any]]) -> str:
+        input_file = await self.client.files.create(
+            file=("documentation_batch.jsonl", io.BytesIO(build_batch_input(requests))),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+
+    async def poll(self, batch_id: str) -> str:
+        batch = await self.client.batches.retrieve(batch_id)
+        return batch.status
+
+    async def results(self, batch_id: str) -> Dict[str, str]:
+        batch = await self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return {}
+        content = await self.client.files.content(batch.output_file_id)
+        return parse_batch_output(content.text)
+
+    async def cancel(self, batch_id: str):
+        await self.client.batches.cancel(batch_id)
+
+
+class LocalBatchBackend(BatchBackend):
+    """In-process stand-in for the batch API, backed by the provider's chat model."""
+
+    def __init__(self, provider: LLMProvider, concurrency: int = 8):
+        self.provider = provider
+        self.concurrency = concurrency
+        self._batches: Dict[str, Dict[str, Any]] = {}
+
+    async def submit(self, requests: List[Dict[str, Any]]) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex}"
+        batch = {"status": "in_progress", "results": {}}
+        batch["task"] = asyncio.create_task(self._process(batch, requests))
+        self._batches[batch_id] = batch
+        return batch_id
+
+    async def _process(self, batch: Dict[str, Any], requests: List[Dict[str, Any]]):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def complete(request):
+            async with semaphore:
+                llm = self.provider.chat_model(request["model"], temperature=request.get("temperature", 0.3))
+                response = await llm.ainvoke(request["prompt"])
+                batch["results"][request["custom_id"]] = response.content
+
+        try:
+            await asyncio.gather(*(complete(request) for request in requests))
+            batch["status"] = "completed"
+        except Exception as e:
+            print(f"Local batch failed: {e}")
+            batch["status"] = "failed"
+
+    async def poll(self, batch_id: str) -> str:
+        return self._batches[batch_id]["status"]
+
+    async def results(self, batch_id: str) -> Dict[str, str]:
+        return dict(self._batches.pop(batch_id)["results"])
+
+    async def cancel(self, batch_id: str):
+        batch = self._batches.pop(batch_id, None)
+        if batch is not None:
+            batch["task"].cancel()
+
+
+def get_batch_backend(provider: LLMProvider) -> BatchBackend:
+    """Use the local stand-in whenever the local provider is configured."""
+    if provider.name == "local":
+        return LocalBatchBackend(provider)
+    return OpenAIBatchBackend(settings.OPENAI_API_KEY)
+
+
+class BatchDocumentationService:
+    """Generates documentation for many repositories through a batch completion API.
+
+    The pipeline has two dependent stages, so it runs as two batches: README summaries and
+    structure analyses first, then the stale documentation sections of every repository.
+    Batches still running after `max_wait_secs` are cancelled and their jobs reported as failed.
+    """
+
+    def __init__(self, llm_service: LLMService, backend: BatchBackend, poll_interval_secs: float = 30.0,
+                 max_requests_per_batch: int = 50000, max_wait_secs: float = 26 * 3600):
+        self.llm_service = llm_service
+        self.backend = backend
+        self.poll_interval_secs = poll_interval_secs
+        self.max_requests_per_batch = max_requests_per_batch
+        self.max_wait_secs = max_wait_secs
+
+    def _request(self, custom_id: str, template: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "custom_id": custom_id,
+            "model": self.llm_service.model_name,
+            "temperature": self.llm_service.temperature,
+            "prompt": self.llm_service.format_prompt(template, inputs),
+        }
+
+    async def _run_batch(self, requests: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Submit requests (split to the provider's batch size limit) and wait for all results, at most `max_wait_secs`."""
+        if not requests:
+            return {}
+        chunks = [requests[i:i + self.max_requests_per_batch] for i in range(0, len(requests), self.max_requests_per_batch)]
+        batch_ids = [await self.backend.submit(chunk) for chunk in chunks]
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_secs
+        results = {}
+        pending = list(batch_ids)
+        while pending:
+            if loop.time() >= deadline:
+                # 결과가 없는 요청은 호출한 쪽에서 실패로 처리됨
+                for batch_id in pending:
+                    print(f"Batch {batch_id} still running after {self.max_wait_secs}s, cancelling")
+                    try:
+                        await self.backend.cancel(batch_id)
+                    except Exception as e:
+                        print(f"Error cancelling batch {batch_id}: {e}")
+                break
+            for batch_id in list(pending):
+                status = await self.backend.poll(batch_id)
+                if status == "completed":
+                    results.update(await self.backend.results(batch_id))
+                    pending.remove(batch_id)
+                elif status in TERMINAL_FAILURE_STATUSES:
+                    print(f"Batch {batch_id} ended with status {status}")
+                    pending.remove(batch_id)
+            if pending:
+                await asyncio.sleep(min(self.poll_interval_secs, max(0.0, deadline - loop.time())))
+        return results
+
+    async def generate(self, jobs: List[Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """Generate sections for every job.
+
+        Each job holds "id", "repo_info", "readme_content", "file_analysis", "input_hashes" and
+        optionally "previous_sections". Returns (sections per job id, error per failed job id).
+        """
+        stale = {job["id"]: set(find_stale_sections(job.get("previous_sections"), job["input_hashes"])) for job in jobs}
+
+        # Stage 1: intermediate summaries, only where a stale section needs them
+        stage_one = []
+        for job in jobs:
+            stale_sections = [s for s in DOCUMENTATION_SECTIONS if s["key"] in stale[job["id"]]]
+            if any("readme" in s["inputs"] for s in stale_sections):
+                stage_one.append(self._request(f"{job['id']}:summary", SUMMARIZATION_TEMPLATE,
+                                               self.llm_service.summarization_inputs(job["readme_content"])))
+            if any("files" in s["inputs"] for s in stale_sections):
+                stage_one.append(self._request(f"{job['id']}:structure", STRUCTURE_ANALYSIS_TEMPLATE,
+                                               self.llm_service.structure_analysis_inputs(job["file_analysis"])))
+        intermediate = await self._run_batch(stage_one)
+
+        # Jobs with missing summaries fail here instead of generating sections from empty inputs
+        failed = {}
+        for job in jobs:
+            missing = sorted(
+                request["custom_id"] for request in stage_one
+                if request["custom_id"].startswith(f"{job['id']}:") and request["custom_id"] not in intermediate
+            )
+            if missing:
+                failed[job["id"]] = f"Batch results missing for: {', '.join(missing)}"
+
+        # Stage 2: the stale sections themselves
+        stage_two = []
+        for job in jobs:
+            if job["id"] in failed:
+                continue
+            summary = intermediate.get(f"{job['id']}:summary", "")
+            structure_analysis = intermediate.get(f"{job['id']}:structure", "")
+            for section in DOCUMENTATION_SECTIONS:
+                if section["key"] in stale[job["id"]]:
+                    stage_two.append(self._request(
+                        f"{job['id']}:section:{section['key']}", SECTION_TEMPLATE,
+                        self.llm_service.section_inputs(section, job["repo_info"], summary, structure_analysis)
+                    ))
+        generated = await self._run_batch(stage_two)
+
+        completed = {}
+        for job in jobs:
+            if job["id"] in failed:
+                continue
+            sections = {key: generated.get(f"{job['id']}:section:{key}") for key in stale[job["id"]]}
+            missing = [key for key, content in sections.items() if content is None]
+            if missing:
+                failed[job["id"]] = f"Batch results missing for: {', '.join(sorted(missing))}"
+                continue
+            completed[job["id"]] = self.llm_service.build_sections(sections, job.get("previous_sections"), job["input_hashes"])
+        return completed, failed
@@ -0,0 +1,153 @@
+import json
+import threading
+import zlib
+from typing import Any, Dict, Tuple, Union
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Header of binary cache values: magic, format version, codec id. Legacy values are plain JSON
+# text, which never starts with a NUL byte.
+MAGIC = b"\x00LW"
+FORMAT_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+
+class CacheCodec:
+    """Serializes cache values; `codec_id` is written to the header so any codec can read any value."""
+
+    name = ""
+    codec_id = 0
+
+    def dumps(self, value: Any) -> bytes:
+        return MAGIC + bytes([FORMAT_VERSION, self.codec_id]) + self.encode(value)
+
+    def encode(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, payload: bytes) -> Tuple[Any, int]:
+        """(value, uncompressed payload size)"""
+        raise NotImplementedError
+
+
+class LegacyJsonCodec(CacheCodec):
+    """Plain JSON text without header, the format written before codecs existed."""
+
+    name = "json"
+
+    def dumps(self, value: Any) -> str:
+        return json.dumps(value)
+
+
+class JsonZlibCodec(CacheCodec):
+    name = "json+zlib"
+    codec_id = 1
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def encode(self, value: Any) -> bytes:
+        return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), self.level)
+
+    def decode(self, payload: bytes) -> Tuple[Any, int]:
+        data = zlib.decompress(payload)
+        return json.loads(data), len(data)
+
+
+class _Zstd:
+    """zstd (de)compressor objects are not thread-safe, so each thread gets its own."""
+
+    def __init__(self, level: int):
+        self.level = level
+        self._local = threading.local()
+
+    def compress(self, data: bytes) -> bytes:
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return self._local.compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        if not hasattr(self._local, "decompressor"):
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.decompressor.decompress(data)
+
+
+class JsonZstdCodec(CacheCodec):
+    name = "json+zstd"
+    codec_id = 2
+
+    def __init__(self, level: int = 3):
+        self.zstd = _Zstd(level)
+
+    def encode(self, value: Any) -> bytes:
+        return self.zstd.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+    def decode(self, payload: bytes) -> Tuple[Any, int]:
+        data = self.zstd.decompress(payload)
+        return json.loads(data), len(data)
+
+
+class MsgpackZstdCodec(CacheCodec):
+    name = "msgpack+zstd"
+    codec_id = 3
+
+    def __init__(self, level: int = 3):
+        self.zstd = _Zstd(level)
+
+    def encode(self, value: Any) -> bytes:
+        return self.zstd.compress(msgpack.packb(value, use_bin_type=True))
+
+    def decode(self, payload: bytes) -> Tuple[Any, int]:
+        data = self.zstd.decompress(payload)
+        return msgpack.unpackb(data, raw=False, strict_map_key=False), len(data)
+
+
+def available_codecs(level: int = 3) -> Dict[str, CacheCodec]:
+    """Codecs whose optional dependencies are installed, by name."""
+    codecs = [LegacyJsonCodec(), JsonZlibCodec()]
+    if ZSTD_AVAILABLE:
+        codecs.append(JsonZstdCodec(level))
+        if MSGPACK_AVAILABLE:
+            codecs.append(MsgpackZstdCodec(level))
+    return {codec.name: codec for codec in codecs}
+
+
+def create_codec(name: str, level: int = 3) -> CacheCodec:
+    """Codec for writing; falls back to the best available one if its dependencies are missing."""
+    codecs = available_codecs(level)
+    if name in codecs:
+        return codecs[name]
+    if name not in ("json+zstd", "msgpack+zstd"):
+        raise ValueError(f"Unknown cache codec: {name}")
+    fallback = codecs.get("json+zstd") or codecs["json+zlib"]
+    print(f"Warning: cache codec {name} needs msgpack/zstandard, using {fallback.name}")
+    return fallback
+
+
+# Readers accept every known codec, whatever the writer is configured with
+_DECODERS = {codec.codec_id: codec for codec in available_codecs().values() if codec.codec_id}
+
+
+def decode_value(raw: Union[bytes, str]) -> Tuple[Any, int]:
+    """(value, uncompressed size) of a stored value in any codec or the legacy JSON format."""
+    if isinstance(raw, bytes) and raw.startswith(MAGIC):
+        version, codec_id = raw[len(MAGIC)], raw[len(MAGIC) + 1]
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cache format version {version}")
+        codec = _DECODERS.get(codec_id)
+        if codec is None:
+            raise ValueError(f"Cache codec {codec_id} is not available")
+        try:
+            return codec.decode(raw[HEADER_SIZE:])
+        except Exception as e:
+            raise ValueError(f"Corrupt {codec.name} cache value: {e}") from e
+    return json.loads(raw), len(raw)
@@ -1,82 +1,224 @@
 import redis
+import redis.asyncio
+import asyncio
 import json
+import uuid
 from typing import Optional, Dict, Any, List
 
-class CacheService:
-    def __init__(self, host: str, port: int, db: int = 0):
-        self.client = redis.Redis(host=host, port=port, db=db, decode_responses=True)
+from app.services.cache_codecs import CacheCodec, LegacyJsonCodec, decode_value
+from app.services.cache_tags import (
+    BATCH_SIZE, add_tags, claimed_key, decode_keys, prefix_pattern, repo_tag, tag_key
+)
+from app.services.local_cache import LocalCache
 
-    def get(self, key: str) -> Optional[Dict[str, Any]]:
-        """Retrieve a value from the cache."""
-        try:
-            value = self.client.get(key)
-            return json.loads(value) if value else None
-        except (redis.RedisError, json.JSONDecodeError) as e:
-            print(f"Error getting cache key {key}: {e}")
+class AsyncCacheService:
+    """Values in Redis (`redis.asyncio`, bounded connection pool), optionally behind an in-process
+    tier of decoded values (`local_cache`) kept consistent across workers via pub/sub.
+
+    Cache I/O never blocks the event loop. Multi-key access (`mget`, `mset`, `delete_multiple`)
+    goes to Redis in one pipelined round trip; keys served by the local tier are skipped.
+    """
+
+    def __init__(self, host: str, port: int, db: int = 0, local_cache: Optional[LocalCache] = None,
+                 invalidation_channel: str = "cache:invalidate", codec: Optional[CacheCodec] = None,
+                 max_connections: int = 50, pool_timeout_secs: float = 5.0, scan_fallback: bool = True):
+        # 연결이 모두 사용 중이면 새로 만들지 않고 반납을 기다림
+        self.pool = redis.asyncio.BlockingConnectionPool(
+            host=host, port=port, db=db, max_connections=max_connections, timeout=pool_timeout_secs
+        )
+        self.client = redis.asyncio.Redis(connection_pool=self.pool)
+        self.codec = codec or LegacyJsonCodec()
+        self.local_cache = local_cache
+        self.invalidation_channel = invalidation_channel
+        self.instance_id = uuid.uuid4().hex
+        self._subscribed = asyncio.Event()
+        self.scan_fallback = scan_fallback
+        self._listener: Optional[asyncio.Task] = None
+
+    def _local_enabled(self) -> bool:
+        return self.local_cache is not None and self._subscribed.is_set()
+
+    @staticmethod
+    def _local_ttl(pttl: int) -> Optional[float]:
+        return pttl / 1000 if pttl > 0 else None
+
+    def _drop_local(self, keys: Optional[List[str]]) -> str:
+        """Drop keys (None: everything) from the local tier; returns the invalidation message for other workers."""
+        if keys is None:
+            self.local_cache.clear()
+        else:
+            self.local_cache.delete(*keys)
+        return json.dumps({"origin": self.instance_id, "keys": keys})
+
+    def _on_invalidation(self, data: str):
+        message = json.loads(data)
+        if message.get("origin") == self.instance_id:
+            return
+        if message.get("keys") is None:
+            self.local_cache.clear()
+        else:
+            self.local_cache.delete(*message["keys"])
+
+    def get_local_metrics(self) -> Optional[Dict[str, Any]]:
+        if self.local_cache is None:
             return None
+        return {**self.local_cache.get_metrics(), "subscribed": self._subscribed.is_set()}
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retrieve a value from the cache (the local tier first, if enabled)."""
+        return (await self.mget([key]))[0]
 
-    def set(self, key: str, value: Dict[str, Any], expiration_secs: int = 3600):
-        """Set a value in the cache with an expiration time."""
+    async def mget(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Values of several keys (None where missing) with at most one round trip to Redis."""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(keys)
+        use_local = self._local_enabled()
+        missing = []
+        for position, key in enumerate(keys):
+            cached = self.local_cache.get(key) if use_local else None
+            if cached is None:
+                missing.append(position)
+            else:
+                results[position] = cached
+        if not missing:
+            return results
+
+        generation = self.local_cache.generation if use_local else None
+        missing_keys = [keys[position] for position in missing]
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.mget(missing_keys)
+            if use_local:
+                for key in missing_keys:
+                    pipe.pttl(key)
+            replies = await pipe.execute()
+        except redis.RedisError as e:
+            print(f"Error getting cache keys {missing_keys[:3]}...: {e}")
+            return results
+
+        for offset, (position, raw) in enumerate(zip(missing, replies[0])):
+            if not raw:
+                continue
+            try:
+                value, size = decode_value(raw)
+            except (ValueError, TypeError) as e:
+                print(f"Error decoding cache key {keys[position]}: {e}")
+                continue
+            results[position] = value
+            if use_local:
+                self.local_cache.set(keys[position], value, size, self._local_ttl(replies[1 + offset]), generation)
+        return results
+
+    async def set(self, key: str, value: Dict[str, Any], expiration_secs: int = 3600,
+                  tags: Optional[List[str]] = None) -> bool:
+        """Set a value in the cache with an expiration time, indexed under `tags`."""
+        if tags:
+            return await self.mset({key: value}, expiration_secs, tags)
         try:
-            self.client.set(key, json.dumps(value), ex=expiration_secs)
+            await self.client.set(key, self.codec.dumps(value), ex=expiration_secs)
+            await self._invalidate([key])
             return True
-        except (redis.RedisError, json.JSONEncodeError) as e:
+        except (redis.RedisError, TypeError, ValueError) as e:
             print(f"Error setting cache key {key}: {e}")
             return False
 
-    def delete(self, key: str) -> bool:
-        """Delete a specific key from the cache."""
+    async def mset(self, values: Dict[str, Dict[str, Any]], expiration_secs: int = 3600,
+                   tags: Optional[List[str]] = None) -> bool:
+        """Set several values with the same expiration (and `tags`) in one pipelined round trip."""
+        if not values:
+            return True
         try:
-            result = self.client.delete(key)
-            return result > 0  # Returns True if key was deleted, False if key didn't exist
-        except redis.RedisError as e:
-            print(f"Error deleting cache key {key}: {e}")
+            pipe = self.client.pipeline(transaction=False)
+            for key, value in values.items():
+                pipe.set(key, self.codec.dumps(value), ex=expiration_secs)
+                add_tags(pipe, key, tags or [], expiration_secs)
+            await pipe.execute()
+            await self._invalidate(list(values))
+            return True
+        except (redis.RedisError, TypeError, ValueError) as e:
+            print(f"Error setting {len(values)} cache keys: {e}")
             return False
 
-    def delete_multiple(self, keys: List[str]) -> int:
+    async def delete(self, key: str) -> bool:
+        """Delete a specific key from the cache."""
+        return await self.delete_multiple([key]) > 0
+
+    async def delete_multiple(self, keys: List[str]) -> int:
         """Delete multiple keys from the cache. Returns number of keys deleted."""
         if not keys:
             return 0
-        
         try:
-            result = self.client.delete(*keys)
+            result = await self.client.delete(*keys)
+            await self._invalidate(keys)
             return result
         except redis.RedisError as e:
             print(f"Error deleting multiple cache keys: {e}")
             return 0
 
-    def exists(self, key: str) -> bool:
+    async def exists(self, key: str) -> bool:
         """Check if a key exists in the cache."""
         try:
-            return self.client.exists(key) > 0
+            return await self.client.exists(key) > 0
         except redis.RedisError as e:
             print(f"Error checking cache key existence {key}: {e}")
             return False
 
-    def get_keys_pattern(self, pattern: str) -> List[str]:
-        """Get all keys matching a pattern."""
+    async def get_keys_pattern(self, pattern: str) -> List[str]:
+        """Get all keys matching a pattern (incremental SCAN, so Redis is not blocked like with KEYS)."""
         try:
-            return self.client.keys(pattern)
+            return decode_keys([key async for key in self.client.scan_iter(match=pattern, count=1000)])
         except redis.RedisError as e:
             print(f"Error getting keys with pattern {pattern}: {e}")
             return []
 
-    def clear_repo_cache(self, repo_name: str) -> int:
-        """Clear all cache entries for a specific repository."""
+    async def invalidate_tag(self, tag: str) -> int:
+        """Delete every key written with `tag`, BATCH_SIZE keys per round trip. Returns number of keys deleted."""
+        claimed = claimed_key(tag)
         try:
-            pattern = f"{repo_name}:*"
-            keys = self.get_keys_pattern(pattern)
-            if keys:
-                return self.delete_multiple(keys)
+            await self.client.rename(tag_key(tag), claimed)
+        except redis.ResponseError:
             return 0
-        except Exception as e:
-            print(f"Error clearing repo cache for {repo_name}: {e}")
+        except redis.RedisError as e:
+            print(f"Error invalidating cache tag {tag}: {e}")
             return 0
+        deleted, batch = 0, []
+        try:
+            async for key in self.client.sscan_iter(claimed, count=BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= BATCH_SIZE:
+                    deleted += await self.delete_multiple(decode_keys(batch))
+                    batch = []
+            deleted += await self.delete_multiple(decode_keys(batch))
+            await self.client.delete(claimed)
+        except redis.RedisError as e:
+            print(f"Error invalidating cache tag {tag}: {e}")
+        return deleted
+
+    async def invalidate_prefix(self, prefix: str) -> int:
+        """Delete every key starting with `prefix` (incremental SCAN), for namespaces that are not tagged."""
+        deleted, batch = 0, []
+        try:
+            async for key in self.client.scan_iter(match=prefix_pattern(prefix), count=BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= BATCH_SIZE:
+                    deleted += await self.delete_multiple(decode_keys(batch))
+                    batch = []
+            deleted += await self.delete_multiple(decode_keys(batch))
+        except redis.RedisError as e:
+            print(f"Error invalidating cache prefix {prefix}: {e}")
+        return deleted
 
-    def get_cache_info(self) -> Dict[str, Any]:
+    async def clear_repo_cache(self, repo_name: str) -> int:
+        """Clear all cache entries for a specific repository."""
+        deleted = await self.invalidate_tag(repo_tag(repo_name))
+        if self.scan_fallback:
+            # 태그 인덱스 도입 전에 저장된 키
+            deleted += await self.delete_multiple(await self.get_keys_pattern(f"{repo_name}:*"))
+        return deleted
+
+    async def get_cache_info(self) -> Dict[str, Any]:
         """Get cache information and statistics."""
         try:
-            info = self.client.info()
+            info = await self.client.info()
             return {
                 "connected_clients": info.get("connected_clients", 0),
                 "used_memory": info.get("used_memory", 0),
@@ -89,19 +231,65 @@ class CacheService:
             print(f"Error getting cache info: {e}")
             return {}
 
-    def flush_all(self) -> bool:
+    async def flush_all(self) -> bool:
         """Clear all cache entries. Use with caution!"""
         try:
-            self.client.flushdb()
+            await self.client.flushdb()
+            await self._invalidate(None)
             return True
         except redis.RedisError as e:
             print(f"Error flushing cache: {e}")
             return False
 
-    def ping(self) -> bool:
+    async def ping(self) -> bool:
         """Test Redis connection."""
         try:
-            return self.client.ping()
+            return await self.client.ping()
         except redis.RedisError as e:
             print(f"Redis connection failed: {e}")
             return False
+
+    async def _invalidate(self, keys: Optional[List[str]]):
+        if self.local_cache is None:
+            return
+        message = self._drop_local(keys)
+        try:
+            await self.client.publish(self.invalidation_channel, message)
+        except redis.RedisError as e:
+            # 다른 워커가 무효화를 놓치면 로컬 TTL이 지난 뒤에야 새 값을 보게 됨
+            print(f"Error publishing cache invalidation: {e}")
+
+    async def _listen(self):
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.invalidation_channel)
+                # 구독이 끊긴 동안의 무효화를 놓쳤을 수 있으므로 로컬 계층을 비우고 시작
+                self.local_cache.clear()
+                self._subscribed.set()
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._on_invalidation(message["data"])
+            except (redis.RedisError, OSError, ValueError) as e:
+                print(f"Cache invalidation listener error, retrying: {e}")
+                await asyncio.sleep(5.0)
+            finally:
+                self._subscribed.clear()
+                await pubsub.aclose()
+
+    def start_invalidation_listener(self):
+        """Subscribe to invalidations in a background task; the local tier is used while subscribed."""
+        if self.local_cache is None or self._listener is not None:
+            return
+        self._listener = asyncio.create_task(self._listen())
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self.client.aclose()
+        await self.pool.disconnect()
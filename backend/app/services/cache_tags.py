@@ -0,0 +1,68 @@
+import uuid
+from typing import Callable, Iterable, List, Optional
+
+import redis
+
+# Tag index: one Redis set per tag holding the keys written with that tag, so a repository
+# is invalidated in O(its keys) instead of a keyspace-wide KEYS/SCAN. Namespaces that are not
+# scoped to a repository (embeddings of a model, answers, code symbols) are not tagged: their
+# set would only ever grow. They are invalidated with SCAN MATCH on their key prefix instead.
+TAG_PREFIX = "cache:tag:"
+BATCH_SIZE = 500
+
+
+def tag_key(tag: str) -> str:
+    return f"{TAG_PREFIX}{tag}"
+
+
+def repo_tag(repo_name: str) -> str:
+    return f"repo:{repo_name}"
+
+
+def add_tags(pipe, key: str, tags: Iterable[str], ttl_secs: Optional[int]):
+    """Queue the index updates of `key` on a (sync or asyncio) pipeline.
+
+    A tag set lives as long as its longest-lived member: EXPIRE NX sets the TTL of a new
+    set and EXPIRE GT only ever extends it (Redis 7). Members of keys that expired on their
+    own stay in the set until the tag is invalidated; deleting them then is a no-op.
+    """
+    for tag in tags:
+        pipe.sadd(tag_key(tag), key)
+        if ttl_secs is None:
+            pipe.persist(tag_key(tag))
+        else:
+            pipe.expire(tag_key(tag), ttl_secs, nx=True)
+            pipe.expire(tag_key(tag), ttl_secs, gt=True)
+
+
+def claimed_key(tag: str) -> str:
+    """Private name a tag set is renamed to before its members are deleted.
+
+    Keys tagged while the invalidation runs go to a fresh set and survive it, as they are
+    newer than the invalidation.
+    """
+    return f"{tag_key(tag)}:invalidating:{uuid.uuid4().hex}"
+
+
+def decode_keys(keys: Iterable) -> List[str]:
+    return [key.decode("utf-8") if isinstance(key, bytes) else key for key in keys]
+
+
+def prefix_pattern(prefix: str) -> str:
+    """SCAN MATCH pattern of the keys starting with `prefix` (glob characters in it are escaped)."""
+    escaped = "".join(f"\\{char}" if char in "*?[]\\" else char for char in prefix)
+    return f"{escaped}*"
+
+
+def invalidate_prefix(client: redis.Redis, prefix: str, delete_batch: Callable[[List[str]], int]) -> int:
+    """Delete every key starting with `prefix` via `delete_batch`, SCANning BATCH_SIZE keys at a time."""
+    deleted, batch = 0, []
+    for key in client.scan_iter(match=prefix_pattern(prefix), count=BATCH_SIZE):
+        batch.append(key)
+        if len(batch) >= BATCH_SIZE:
+            deleted += delete_batch(decode_keys(batch))
+            batch = []
+    if batch:
+        deleted += delete_batch(decode_keys(batch))
+    return deleted
+
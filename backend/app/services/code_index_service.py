@@ -0,0 +1,199 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.services.analysis_service import AnalysisService
+from app.services.cache_service import AsyncCacheService
+from app.services.github_service import GitHubService
+from app.services.llm_scheduler import estimate_tokens
+from app.services.vector_service import VectorService
+
+CODE_LANGUAGES = ('python', 'javascript', 'typescript')
+
+# Code chunks share the github_documents key (repo_name, commit_hash, chunk_index) with the documentation chunks
+CODE_CHUNK_INDEX_OFFSET = 1_000_000
+
+
+class CodeIndexService:
+    """Indexes symbol-level source chunks (classes and functions) for retrieval.
+
+    Symbols are extracted per file blob and cached by blob SHA, so a file that did not change
+    between commits is neither fetched nor parsed again; its chunk texts are identical, so
+    the embedding cache also skips re-embedding them.
+    """
+
+    # 블롭 SHA 키는 리포지토리와 무관하므로 태그하지 않음 (버전을 올리거나 접두사로 무효화)
+    CACHE_VERSION = "v1"
+
+    def __init__(
+        self,
+        github_service: GitHubService,
+        analysis_service: AnalysisService,
+        vector_service: VectorService,
+        cache_service: AsyncCacheService,
+        max_tokens: int = 512,
+        concurrency: int = 8,
+        max_files: int = 500,
+        max_file_bytes: int = 200_000,
+        cache_ttl_secs: int = 30 * 24 * 3600,
+    ):
+        self.github_service = github_service
+        self.analysis_service = analysis_service
+        self.vector_service = vector_service
+        self.cache_service = cache_service
+        self.max_tokens = max_tokens
+        self.concurrency = concurrency
+        self.max_files = max_files
+        self.max_file_bytes = max_file_bytes
+        self.cache_ttl_secs = cache_ttl_secs
+
+    def select_files(self, files: Dict[str, Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Source files worth indexing: supported languages, known blob SHA, bounded size and count."""
+        selected = [
+            (path, info) for path, info in sorted(files.items())
+            if info.get("type") in CODE_LANGUAGES and info.get("sha") and info.get("size", 0) <= self.max_file_bytes
+        ]
+        return selected[:self.max_files]
+
+    def _split_lines(self, lines: List[str], start_line: int) -> List[Tuple[int, int, str]]:
+        """Split an oversized symbol into consecutive line ranges within the token budget."""
+        pieces, piece, piece_start, tokens = [], [], start_line, 0
+        for offset, line in enumerate(lines):
+            line_tokens = estimate_tokens(line) + 1
+            if piece and tokens + line_tokens > self.max_tokens:
+                pieces.append((piece_start, piece_start + len(piece) - 1, "\n".join(piece)))
+                piece, piece_start, tokens = [], start_line + offset, 0
+            piece.append(line)
+            tokens += line_tokens
+        if piece:
+            pieces.append((piece_start, piece_start + len(piece) - 1, "\n".join(piece)))
+        return pieces
+
+    def extract_symbols(self, content: str, language: str) -> List[Dict[str, Any]]:
+        """Symbol chunks of one file, using the class/function boundaries from AnalysisService.
+
+        A class that fits the token budget is one chunk including its methods; a larger class
+        becomes a header chunk (signature, docstring, attributes) plus one chunk per method.
+        """
+        analysis = self.analysis_service.analyze_code(content, language)
+        lines = content.split("\n")
+        symbols = sorted(
+            [{"kind": "class", **symbol} for symbol in analysis.get("classes", [])]
+            + [{"kind": "function", **symbol} for symbol in analysis.get("functions", [])],
+            key=lambda symbol: (symbol.get("start_line", 0), -symbol.get("end_line", 0))
+        )
+        symbols = [symbol for symbol in symbols if symbol.get("start_line") and symbol.get("end_line")]
+
+        spans: List[Tuple[str, str, int, int]] = []
+        covered_until = 0
+        for symbol in symbols:
+            start, end = symbol["start_line"], symbol["end_line"]
+            if end <= covered_until:
+                continue
+            if symbol["kind"] == "class":
+                nested = [other for other in symbols if other is not symbol and start < other["start_line"] and other["end_line"] <= end]
+                body_tokens = estimate_tokens("\n".join(lines[start - 1:end]))
+                if not nested or body_tokens <= self.max_tokens:
+                    spans.append(("class", symbol["name"], start, end))
+                    covered_until = end
+                    continue
+                header_end = min(other["start_line"] for other in nested) - 1
+                spans.append(("class", symbol["name"], start, header_end))
+                for method in nested:
+                    if method["kind"] == "function":
+                        spans.append(("method", f"{symbol['name']}.{method['name']}", method["start_line"], method["end_line"]))
+                covered_until = end
+                continue
+            # 함수 안에 중첩된 함수는 바깥 함수 청크에 이미 포함됨
+            spans.append(("function", symbol["name"], start, end))
+            covered_until = end
+
+        chunks = []
+        for kind, name, start, end in spans:
+            for piece_start, piece_end, code in self._split_lines(lines[start - 1:end], start):
+                if code.strip():
+                    chunks.append({"kind": kind, "symbol": name, "start_line": piece_start, "end_line": piece_end, "code": code})
+        return chunks
+
+    def render_chunk(self, path: str, language: str, blob_sha: str, symbol: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Chunk text (with a location header so that paths and names are searchable) and metadata."""
+        content = (
+            f"{path}:{symbol['start_line']}-{symbol['end_line']} {symbol['kind']} {symbol['symbol']}\n"
+            f"```{language}\n{symbol['code']}\n```"
+        )
+        return content, {
+            "source": "code",
+            "path": path,
+            "language": language,
+            "kind": symbol["kind"],
+            "symbol": symbol["symbol"],
+            "start_line": symbol["start_line"],
+            "end_line": symbol["end_line"],
+            "blob_sha": blob_sha,
+        }
+
+    def _cache_key(self, blob_sha: str) -> str:
+        return f"code_chunks:{self.CACHE_VERSION}:{blob_sha}"
+
+    async def file_symbols(self, repo_name: str, path: str, info: Dict[str, Any],
+                           cached: Optional[Dict[str, Any]] = None) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """Return (symbol chunks or None if the file could not be fetched, served from the blob cache).
+
+        `cached` is the blob cache entry when it was already looked up in bulk.
+        """
+        cache_key = self._cache_key(info["sha"])
+        if cached is None:
+            cached = await self.cache_service.get(cache_key)
+        if cached is not None:
+            return cached["symbols"], True
+
+        content = await self.github_service.get_file_content(repo_name, path)
+        if content.startswith("Error:"):
+            # 가져오기 실패는 캐시하지 않음
+            return None, False
+        symbols = await asyncio.to_thread(self.extract_symbols, content, info["type"])
+        await self.cache_service.set(cache_key, {"symbols": symbols}, self.cache_ttl_secs)
+        return symbols, False
+
+    async def iter_chunks(self, repo_name: str, files: List[Tuple[str, Dict[str, Any]]], stats: Dict[str, int]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yield chunks file by file in path order while up to `concurrency` files are fetched ahead."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # 변경되지 않은 파일의 블롭 캐시는 한 번에 조회
+        cached_entries = await self.cache_service.mget([self._cache_key(info["sha"]) for _, info in files]) if files else []
+
+        async def load(path: str, info: Dict[str, Any], cached: Optional[Dict[str, Any]]):
+            if cached is not None:
+                return cached["symbols"], True
+            async with semaphore:
+                try:
+                    return await self.file_symbols(repo_name, path, info, cached)
+                except Exception as e:
+                    print(f"Error indexing {repo_name}/{path}: {e}")
+                    return None, False
+
+        tasks = [asyncio.create_task(load(path, info, cached)) for (path, info), cached in zip(files, cached_entries)]
+        try:
+            for (path, info), task in zip(files, tasks):
+                symbols, from_cache = await task
+                if symbols is None:
+                    stats["files_failed"] += 1
+                    continue
+                stats["files_from_cache" if from_cache else "files_parsed"] += 1
+                for symbol in symbols:
+                    yield self.render_chunk(path, info["type"], info["sha"], symbol)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def index_repository(self, repo_name: str, commit_hash: str, files: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Embed and store the code chunks of a commit after its documentation."""
+        selected = self.select_files(files)
+        stats = {"files_from_cache": 0, "files_parsed": 0, "files_failed": 0}
+        try:
+            chunks_stored = await self.vector_service.store_chunks(
+                repo_name, commit_hash, self.iter_chunks(repo_name, selected, stats),
+                start_index=CODE_CHUNK_INDEX_OFFSET
+            )
+            return {"success": True, "files": len(selected), **stats, "chunks_stored": chunks_stored}
+        except Exception as e:
+            print(f"Error indexing code for {repo_name}: {e}")
+            return {"success": False, "error": str(e), **stats}
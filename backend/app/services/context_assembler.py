@@ -0,0 +1,109 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.ann_index import normalize_rows
+from app.services.llm_scheduler import estimate_tokens
+
+
+def merge_overlap(first: str, second: str, min_overlap: int = 16, max_overlap: int = 1000) -> str:
+    """Concatenate two consecutive chunks, dropping the longest suffix of `first` repeated at the start of `second`."""
+    if len(second) >= min_overlap:
+        probe = second[:min_overlap]
+        start = max(0, len(first) - max_overlap)
+        position = first.find(probe, start)
+        while position != -1:
+            # 처음 찾은 위치가 가장 긴 겹침
+            if second.startswith(first[position:]):
+                return first + second[len(first) - position:]
+            position = first.find(probe, position + 1)
+    return first.rstrip() + "\n\n" + second.lstrip()
+
+
+def mmr_order(query_vector: np.ndarray, vectors: np.ndarray, lambda_: float = 0.7, k: Optional[int] = None) -> List[int]:
+    """Maximal marginal relevance: greedily pick rows maximizing
+    lambda * sim(query, row) - (1 - lambda) * max sim(row, already picked)."""
+    vectors = normalize_rows(vectors)
+    relevance = vectors @ normalize_rows(query_vector[None, :])[0]
+    redundancy = np.full(len(vectors), -np.inf, dtype=np.float32)
+    available = np.ones(len(vectors), dtype=bool)
+    order: List[int] = []
+    for _ in range(min(k or len(vectors), len(vectors))):
+        scores = lambda_ * relevance - (1.0 - lambda_) * np.maximum(redundancy, 0.0)
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        order.append(best)
+        available[best] = False
+        # 선택된 행과의 유사도로 중복도를 한 번에 갱신
+        np.maximum(redundancy, vectors @ vectors[best], out=redundancy)
+    return order
+
+
+class ContextAssembler:
+    """Turns retrieved chunks into a compact prompt context.
+
+    Exact duplicates are dropped, the remaining chunks are ordered by MMR (when their
+    embeddings are given) so that near-identical chunks do not crowd out other information,
+    chunks are accepted while they fit `max_tokens`, and accepted chunks that are consecutive
+    in the same document (same commit and source, adjacent `chunk_index`) are merged into one
+    passage with their overlapping text removed.
+    """
+
+    def __init__(self, max_tokens: int = 3000, max_chunks: int = 8, mmr_lambda: float = 0.7):
+        self.max_tokens = max_tokens
+        self.max_chunks = max_chunks
+        self.mmr_lambda = mmr_lambda
+
+    def _document_key(self, row: Dict[str, Any]):
+        metadata = row.get("metadata") or {}
+        return row.get("commit_hash"), metadata.get("source"), metadata.get("path")
+
+    def _merge(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge runs of consecutive chunks of the same document; passages keep the rank of their best chunk."""
+        ranked = {id(row): rank for rank, row in enumerate(rows)}
+        mergeable = sorted(
+            (row for row in rows if row.get("chunk_index") is not None),
+            key=lambda row: (str(self._document_key(row)), row["chunk_index"])
+        )
+        passages: List[Dict[str, Any]] = []
+        previous = None
+        for row in mergeable:
+            if (previous is not None and self._document_key(previous) == self._document_key(row)
+                    and row["chunk_index"] == previous["chunk_index"] + 1):
+                passage = passages[-1]
+                passage["content"] = merge_overlap(passage["content"], row["content"])
+                passage["chunks"].append(row)
+                passage["rank"] = min(passage["rank"], ranked[id(row)])
+            else:
+                passages.append({"content": row["content"], "chunks": [row], "rank": ranked[id(row)]})
+            previous = row
+        passages.extend(
+            {"content": row["content"], "chunks": [row], "rank": ranked[id(row)]}
+            for row in rows if row.get("chunk_index") is None
+        )
+        passages.sort(key=lambda passage: passage["rank"])
+        return passages
+
+    def assemble(self, rows: List[Dict[str, Any]], query_vector: Optional[List[float]] = None,
+                 vectors: Optional[List[List[float]]] = None) -> List[Dict[str, Any]]:
+        """Return passages {"content", "chunks", "rank"} in relevance order within the token budget."""
+        unique: Dict[str, int] = {}
+        for index, row in enumerate(rows):
+            unique.setdefault(row["content"].strip(), index)
+        indices = sorted(unique.values())
+
+        if query_vector is not None and vectors is not None and len(indices) > 1:
+            matrix = np.asarray([vectors[index] for index in indices], dtype=np.float32)
+            order = mmr_order(np.asarray(query_vector, dtype=np.float32), matrix, self.mmr_lambda)
+            indices = [indices[position] for position in order]
+
+        selected, used = [], 0
+        for index in indices:
+            if len(selected) >= self.max_chunks:
+                break
+            tokens = estimate_tokens(rows[index]["content"])
+            if used + tokens > self.max_tokens:
+                continue
+            selected.append(rows[index])
+            used += tokens
+        return self._merge(selected)
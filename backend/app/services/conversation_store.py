@@ -0,0 +1,105 @@
+import copy
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.services.ann_index import normalize_rows
+from app.services.cache_service import AsyncCacheService
+from app.services.llm_scheduler import estimate_tokens
+
+_SENTENCE_END = re.compile(r"(?<=[.!?。])\s")
+
+
+def _first_sentence(text: str, max_chars: int) -> str:
+    sentence = _SENTENCE_END.split(text.strip(), maxsplit=1)[0]
+    return sentence if len(sentence) <= max_chars else sentence[:max_chars].rstrip() + "..."
+
+
+class ConversationStore:
+    """Bounded Q&A conversation memory per session, stored in Redis with a sliding TTL.
+
+    A session keeps the last `max_turns` question/answer pairs verbatim (answers cut to
+    `max_answer_chars`); older turns are folded into an extractive summary (question and
+    first sentence of the answer) trimmed to `summary_max_tokens`, so the history added to
+    the prompt stays bounded however long the conversation gets. The retrieved chunks of
+    the last search are kept with the question embedding that retrieved them and reused
+    for follow-ups on the same topic (cosine similarity at least `topic_threshold`) about
+    the same commit.
+    """
+
+    VERSION = "v1"
+
+    def __init__(self, cache_service: AsyncCacheService, ttl_secs: int = 3600, max_turns: int = 4,
+                 max_answer_chars: int = 600, summary_max_tokens: int = 300, topic_threshold: float = 0.75):
+        self.cache_service = cache_service
+        self.ttl_secs = ttl_secs
+        self.max_turns = max_turns
+        self.max_answer_chars = max_answer_chars
+        self.summary_max_tokens = summary_max_tokens
+        self.topic_threshold = topic_threshold
+        self.stats = {"context_reused": 0, "context_retrieved": 0}
+
+    def _key(self, session_id: str) -> str:
+        return f"qa_session:{self.VERSION}:{session_id}"
+
+    async def load(self, session_id: str, repo_name: str) -> Dict[str, Any]:
+        """Stored session state, or a new one if it expired or belonged to another repository."""
+        session = await self.cache_service.get(self._key(session_id))
+        if session is None or session.get("repo_name") != repo_name:
+            return {"repo_name": repo_name, "summary": [], "turns": [], "context": None}
+        # 로컬 캐시 계층의 값은 공유되므로 수정할 복사본을 반환
+        return copy.deepcopy(session)
+
+    async def save(self, session_id: str, session: Dict[str, Any]):
+        await self.cache_service.set(self._key(session_id), session, self.ttl_secs)
+
+    async def clear(self, session_id: str) -> bool:
+        return await self.cache_service.delete(self._key(session_id))
+
+    def add_turn(self, session: Dict[str, Any], question: str, answer: str):
+        answer = answer if len(answer) <= self.max_answer_chars else answer[:self.max_answer_chars].rstrip() + "..."
+        session["turns"].append({"question": question, "answer": answer})
+        while len(session["turns"]) > self.max_turns:
+            folded = session["turns"].pop(0)
+            session["summary"].append(f"- Q: {folded['question']} / A: {_first_sentence(folded['answer'], 200)}")
+        # 요약이 예산을 넘으면 가장 오래된 줄부터 버림
+        while session["summary"] and estimate_tokens("\n".join(session["summary"])) > self.summary_max_tokens:
+            session["summary"].pop(0)
+
+    def history(self, session: Dict[str, Any]) -> str:
+        """Conversation so far as prompt text ("" for a new session)."""
+        parts = []
+        if session["summary"]:
+            parts.append("이전 대화 요약:\n" + "\n".join(session["summary"]))
+        parts.extend(f"질문: {turn['question']}\n답변: {turn['answer']}" for turn in session["turns"])
+        return "\n\n".join(parts)
+
+    def reusable_context(self, session: Dict[str, Any], commit_hash: Optional[str],
+                         query_embedding: List[float]) -> Optional[List[Dict[str, Any]]]:
+        """Chunks retrieved earlier in the session if the question stays on their topic, else None."""
+        context = session.get("context")
+        if not context or context.get("commit_hash") != commit_hash:
+            return None
+        vectors = normalize_rows(np.asarray([context["query_embedding"], query_embedding], dtype=np.float32))
+        if float(vectors[0] @ vectors[1]) < self.topic_threshold:
+            return None
+        self.stats["context_reused"] += 1
+        return context["rows"]
+
+    def remember_context(self, session: Dict[str, Any], commit_hash: Optional[str], query_embedding: List[float],
+                         rows: List[Dict[str, Any]]):
+        self.stats["context_retrieved"] += 1
+        session["context"] = {
+            "commit_hash": commit_hash,
+            "query_embedding": np.round(np.asarray(query_embedding, dtype=np.float64), 5).tolist(),
+            # 컨텍스트 구성에 필요한 필드만 저장
+            "rows": [
+                {key: row[key] for key in ("content", "metadata", "chunk_index", "commit_hash") if key in row}
+                for row in rows
+            ],
+        }
+
+    def get_metrics(self) -> Dict[str, Any]:
+        lookups = sum(self.stats.values())
+        return {**self.stats, "reuse_rate": round(self.stats["context_reused"] / lookups, 4) if lookups else 0.0}
@@ -0,0 +1,103 @@
+import hashlib
+import json
+from typing import Dict, Any, List, Optional
+
+# Ordered documentation sections. "inputs" lists the input groups a section is
+# generated from; a section is only regenerated when one of them changes.
+DOCUMENTATION_SECTIONS: List[Dict[str, Any]] = [
+    {
+        "key": "overview",
+        "title": "Overview",
+        "inputs": ["readme", "repo_info"],
+        "instructions": "Expand on the summary, including use cases and key differentiators.",
+    },
+    {
+        "key": "architecture",
+        "title": "Architecture & Core Components",
+        "inputs": ["files", "repo_info"],
+        "instructions": "Detail the core components, their responsibilities and how they interact.",
+    },
+    {
+        "key": "concepts",
+        "title": "Key Concepts",
+        "inputs": ["readme", "files"],
+        "instructions": "Explain the fundamental concepts and design principles of the project.",
+    },
+    {
+        "key": "workflows",
+        "title": "Primary Workflows",
+        "inputs": ["readme", "repo_info"],
+        "instructions": "Document installation, setup, and basic usage.",
+    },
+    {
+        "key": "api",
+        "title": "API Reference",
+        "inputs": ["files"],
+        "instructions": "Outline the main classes and functions, if applicable.",
+    },
+]
+
+SECTION_KEYS = [section["key"] for section in DOCUMENTATION_SECTIONS]
+
+# Symbol line spans only locate code chunks; they shift with every edit above a symbol
+SPAN_KEYS = ("start_line", "end_line")
+
+
+def hash_content(value: Any) -> str:
+    """Return a stable SHA-256 hex digest for a string or JSON-serializable value."""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def without_line_spans(file_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """file_analysis as the documentation sees it (hashed and prompted): symbols without their line spans."""
+    documented = {}
+    for path, analysis in file_analysis.items():
+        if isinstance(analysis, dict):
+            analysis = {
+                key: [
+                    {name: value for name, value in symbol.items() if name not in SPAN_KEYS} if isinstance(symbol, dict) else symbol
+                    for symbol in symbols
+                ] if key in ("classes", "functions") and isinstance(symbols, list) else symbols
+                for key, symbols in analysis.items()
+            }
+        documented[path] = analysis
+    return documented
+
+
+def build_input_hashes(readme_sha: Optional[str], file_analysis: Dict[str, Any], repo_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Collect the hashes of every input the documentation is generated from."""
+    return {
+        "readme": readme_sha or "",
+        "files": {path: hash_content(analysis) for path, analysis in sorted(without_line_spans(file_analysis).items())},
+        "repo_info": hash_content(repo_info),
+    }
+
+
+def section_input_hashes(section: Dict[str, Any], input_hashes: Dict[str, Any]) -> Dict[str, Any]:
+    """Select the subset of input hashes a section depends on."""
+    return {name: input_hashes.get(name) for name in section["inputs"]}
+
+
+def find_stale_sections(previous_sections: Optional[Dict[str, Dict[str, Any]]], input_hashes: Dict[str, Any]) -> List[str]:
+    """Return the keys of sections whose inputs changed since they were generated."""
+    previous_sections = previous_sections or {}
+    stale = []
+    for section in DOCUMENTATION_SECTIONS:
+        previous = previous_sections.get(section["key"])
+        if not previous or not previous.get("content"):
+            stale.append(section["key"])
+        elif previous.get("input_hashes") != section_input_hashes(section, input_hashes):
+            stale.append(section["key"])
+    return stale
+
+
+def assemble_documentation(sections: Dict[str, Dict[str, Any]]) -> str:
+    """Join the generated sections into a single Markdown document, in section order."""
+    parts = []
+    for section in DOCUMENTATION_SECTIONS:
+        content = (sections.get(section["key"]) or {}).get("content", "").strip()
+        if content:
+            parts.append(content)
+    return "\n\n".join(parts)
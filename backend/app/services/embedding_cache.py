@@ -0,0 +1,156 @@
+import dbm
+import hashlib
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import redis
+
+from app.config import settings
+from app.services.cache_tags import invalidate_prefix
+
+
+class RedisEmbeddingStore:
+    """Raw vector bytes in Redis, read with MGET and written through a pipeline.
+
+    One model's vectors are dropped with SCAN MATCH on their namespace prefix; they are not
+    tagged, as a per-model tag set would hold every vector key ever written.
+    """
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self.client.mget(keys)
+
+    def set_many(self, items: Dict[str, bytes], ttl_secs: Optional[int]):
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipeline.set(key, value, ex=ttl_secs)
+        pipeline.execute()
+
+    def invalidate(self, namespace: str) -> int:
+        return invalidate_prefix(self.client, f"{namespace}:", lambda keys: self.client.delete(*keys))
+
+
+class DiskEmbeddingStore:
+    """Raw vector bytes in a local dbm file, for single-node deployments without Redis."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = dbm.open(path, "c")
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            return [self._db.get(key.encode("utf-8")) for key in keys]
+
+    def set_many(self, items: Dict[str, bytes], ttl_secs: Optional[int]):
+        with self._lock:
+            for key, value in items.items():
+                self._db[key.encode("utf-8")] = value
+
+    def invalidate(self, namespace: str) -> int:
+        """Delete the keys under `namespace` (a key prefix) by iterating the file."""
+        prefix = f"{namespace}:".encode("utf-8")
+        with self._lock:
+            keys = [key for key in self._db.keys() if key.startswith(prefix)]
+            for key in keys:
+                del self._db[key]
+        return len(keys)
+
+
+class EmbeddingCache:
+    """Embedding vectors keyed by (embedding model, SHA-256 of the text).
+
+    Vectors are stored as raw float16 (default) or float32 bytes: 3 KB per 1536-dim
+    float16 vector instead of ~30 KB of JSON.
+    """
+
+    def __init__(self, store, dtype: str = "float16", ttl_secs: Optional[int] = None):
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+        self.store = store
+        self.dtype = np.dtype(dtype)
+        self.ttl_secs = ttl_secs
+        self._lock = threading.Lock()
+        self._metrics = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    def namespace(self, model: str) -> str:
+        """Key prefix of one model's vectors."""
+        return f"emb:{model}:{self.dtype.name}"
+
+    def key(self, model: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.namespace(model)}:{digest}"
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._metrics[name] += amount
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Return the cached vector for each text, or None where it is not cached."""
+        if not texts:
+            return []
+        try:
+            values = self.store.get_many([self.key(model, text) for text in texts])
+        except Exception as e:
+            print(f"Error reading embedding cache: {e}")
+            self._count("errors")
+            self._count("misses", len(texts))
+            return [None] * len(texts)
+
+        vectors = [
+            np.frombuffer(value, dtype=self.dtype).astype(np.float32).tolist() if value else None
+            for value in values
+        ]
+        hits = sum(vector is not None for vector in vectors)
+        self._count("hits", hits)
+        self._count("misses", len(texts) - hits)
+        return vectors
+
+    def set_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        if not texts:
+            return
+        try:
+            self.store.set_many(
+                {self.key(model, text): np.asarray(vector, dtype=self.dtype).tobytes() for text, vector in zip(texts, vectors)},
+                self.ttl_secs
+            )
+            self._count("writes", len(texts))
+        except Exception as e:
+            print(f"Error writing embedding cache: {e}")
+            self._count("errors")
+
+    def invalidate_model(self, model: str) -> int:
+        """Drop every cached vector of `model` (e.g. after its embeddings changed); returns the deleted count."""
+        try:
+            return self.store.invalidate(self.namespace(model))
+        except Exception as e:
+            print(f"Error invalidating embedding cache for {model}: {e}")
+            self._count("errors")
+            return 0
+
+    def get_metrics(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._metrics["hits"] + self._metrics["misses"]
+            return {
+                **self._metrics,
+                "hit_rate": round(self._metrics["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+def create_embedding_cache() -> Optional[EmbeddingCache]:
+    """Build the embedding cache selected by `settings.EMBEDDING_CACHE_BACKEND`."""
+    backend = settings.EMBEDDING_CACHE_BACKEND
+    if backend == "none":
+        return None
+    if backend == "redis":
+        # Vectors are binary, so this client must not decode responses
+        store = RedisEmbeddingStore(redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT))
+    elif backend == "disk":
+        store = DiskEmbeddingStore(settings.EMBEDDING_CACHE_PATH)
+    else:
+        raise ValueError(f"Unknown embedding cache backend: {backend}")
+    return EmbeddingCache(store, dtype=settings.EMBEDDING_CACHE_DTYPE, ttl_secs=settings.EMBEDDING_CACHE_TTL)
@@ -1,85 +1,75 @@
 import asyncio
 import base64
 import re
+import time
+from collections import OrderedDict
 from typing import Dict, Any, List
 from pathlib import Path
 import httpx
 
 class GitHubService:
+    """GitHub REST API client.
+
+    The head commit of a repository's default branch is cached with stale-while-revalidate
+    semantics (see `resolve_head`), so repeated analyses of a recently seen repository can
+    check the result cache without waiting for GitHub.
+    """
+
     BASE_URL = "https://api.github.com"
 
-    def __init__(self, github_token: str):
+    def __init__(self, github_token: str, head_ttl_secs: float = 60.0, head_stale_secs: float = 600.0,
+                 head_cache_size: int = 1024):
         self.headers = {
             "Authorization": f"Bearer {github_token}",
             "Accept": "application/vnd.github.v3+json"
         }
         self.client = httpx.AsyncClient(headers=self.headers, timeout=30.0)
+        self.head_ttl_secs = head_ttl_secs
+        self.head_stale_secs = head_stale_secs
+        self.head_cache_size = head_cache_size
+        # repo -> {"head", "fetched_at"} (LRU)
+        self._heads: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._head_fetches: Dict[str, asyncio.Task] = {}
+        self.head_stats = {"fresh_hits": 0, "stale_hits": 0, "misses": 0, "fetches": 0, "fetch_errors": 0}
 
-    async def get_repository_structure(self, repo_name: str) -> Dict[str, Any]:
-        try:
-            # 1. Get repo details
-            repo_url = f"{self.BASE_URL}/repos/{repo_name}"
-            repo_res = await self.client.get(repo_url)
-            repo_res.raise_for_status()
-            print(f"DEBUG: Type of repo_res: {type(repo_res)}")
-            json_result = repo_res.json()
-            if asyncio.iscoroutine(json_result):
-                print("DEBUG: repo_res.json() returned a coroutine. Awaiting...")
-                repo_data = await json_result
-            else:
-                print("DEBUG: repo_res.json() returned a dict directly. Not awaiting.")
-                repo_data = json_result
-            print(f"DEBUG: Type of repo_data: {type(repo_data)}")
-
-            default_branch = repo_data["default_branch"]
-
-            # 2. Get commit hash
-            branch_url = f"{self.BASE_URL}/repos/{repo_name}/branches/{default_branch}"
-            branch_res = await self.client.get(branch_url)
-            print(f"DEBUG: Type of branch_res: {type(branch_res)}")
-            branch_res.raise_for_status()
-            json_result = branch_res.json()
-            if asyncio.iscoroutine(json_result):
-                print("DEBUG: branch_res.json() returned a coroutine. Awaiting...")
-                branch_data = await json_result
-            else:
-                print("DEBUG: branch_res.json() returned a dict directly. Not awaiting.")
-                branch_data = json_result
-            print(f"DEBUG: Type of branch_data: {type(branch_data)}")
-            commit_hash = branch_data["commit"]["sha"]
-
-            # 3. Get file tree
-            tree_url = f"{self.BASE_URL}/repos/{repo_name}/git/trees/{commit_hash}?recursive=1"
-            tree_res = await self.client.get(tree_url)
-            print(f"DEBUG: Type of tree_res: {type(tree_res)}")
-            tree_res.raise_for_status()
-            json_result = tree_res.json()
-            if asyncio.iscoroutine(json_result):
-                print("DEBUG: tree_res.json() returned a coroutine. Awaiting...")
-                tree_data = await json_result
-            else:
-                print("DEBUG: tree_res.json() returned a dict directly. Not awaiting.")
-                tree_data = json_result
-            print(f"DEBUG: Type of tree_data: {type(tree_data)}")
-
-            files = {
-                item["path"]: {
-                    "size": item.get("size", 0),
-                    "type": self._get_file_type(item["path"]),
-                    "sha": item["sha"]
-                }
-                for item in tree_data["tree"] if item["type"] == "blob"
-            }
+    async def _get_json(self, url: str) -> Any:
+        response = await self.client.get(url)
+        response.raise_for_status()
+        json_result = response.json()
+        if asyncio.iscoroutine(json_result):
+            return await json_result
+        return json_result
 
-            return {
-                "name": repo_data["name"],
-                "description": repo_data["description"],
-                "main_language": repo_data["language"],
-                "topics": repo_data.get("topics", []),
-                "default_branch": default_branch,
-                "files": files,
-                "commit_hash": commit_hash
+    async def get_repository_head(self, repo_name: str) -> Dict[str, Any]:
+        """Repository details and the head commit of its default branch."""
+        repo_data = await self._get_json(f"{self.BASE_URL}/repos/{repo_name}")
+        default_branch = repo_data["default_branch"]
+        branch_data = await self._get_json(f"{self.BASE_URL}/repos/{repo_name}/branches/{default_branch}")
+        return {
+            "name": repo_data["name"],
+            "description": repo_data["description"],
+            "main_language": repo_data["language"],
+            "topics": repo_data.get("topics", []),
+            "default_branch": default_branch,
+            "commit_hash": branch_data["commit"]["sha"]
+        }
+
+    async def get_repository_tree(self, repo_name: str, commit_hash: str) -> Dict[str, Dict[str, Any]]:
+        """Files (blobs) of the commit's tree by path."""
+        tree_data = await self._get_json(f"{self.BASE_URL}/repos/{repo_name}/git/trees/{commit_hash}?recursive=1")
+        return {
+            item["path"]: {
+                "size": item.get("size", 0),
+                "type": self._get_file_type(item["path"]),
+                "sha": item["sha"]
             }
+            for item in tree_data["tree"] if item["type"] == "blob"
+        }
+
+    async def get_repository_structure(self, repo_name: str) -> Dict[str, Any]:
+        try:
+            head = await self.get_repository_head(repo_name)
+            return {**head, "files": await self.get_repository_tree(repo_name, head["commit_hash"])}
         except httpx.HTTPStatusError as e:
             print(f"HTTP error fetching repository structure for {repo_name}: {e}")
             raise
@@ -87,6 +77,59 @@ class GitHubService:
             print(f"An unexpected error occurred in get_repository_structure: {e}")
             raise
 
+    async def resolve_head(self, repo_name: str, revalidate: bool = False) -> Dict[str, Any]:
+        """`get_repository_head` with stale-while-revalidate caching.
+
+        A head fetched less than `head_ttl_secs` ago is returned as is. Up to `head_stale_secs`
+        it is still returned immediately, while a background fetch rechecks it. Older heads,
+        unknown repositories and `revalidate=True` wait for a fetch. Concurrent fetches of the
+        same repository are shared. "cached" in the result tells whether it came from the cache.
+        """
+        entry = self._heads.get(repo_name)
+        if entry is not None and not revalidate:
+            age = time.monotonic() - entry["fetched_at"]
+            if age <= self.head_ttl_secs:
+                self.head_stats["fresh_hits"] += 1
+                self._heads.move_to_end(repo_name)
+                return {**entry["head"], "cached": True}
+            if age <= self.head_stale_secs:
+                self.head_stats["stale_hits"] += 1
+                self._fetch_head(repo_name)
+                return {**entry["head"], "cached": True}
+        self.head_stats["misses"] += 1
+        # 기다리던 요청이 취소돼도 공유 중인 조회는 계속 진행
+        head = await asyncio.shield(self._fetch_head(repo_name))
+        return {**head, "cached": False}
+
+    def _fetch_head(self, repo_name: str) -> asyncio.Task:
+        task = self._head_fetches.get(repo_name)
+        if task is None:
+            task = asyncio.create_task(self._store_head(repo_name))
+            self._head_fetches[repo_name] = task
+            task.add_done_callback(lambda done: self._head_fetched(repo_name, done))
+        return task
+
+    async def _store_head(self, repo_name: str) -> Dict[str, Any]:
+        self.head_stats["fetches"] += 1
+        head = await self.get_repository_head(repo_name)
+        self._heads[repo_name] = {"head": head, "fetched_at": time.monotonic()}
+        self._heads.move_to_end(repo_name)
+        while len(self._heads) > self.head_cache_size:
+            self._heads.popitem(last=False)
+        return head
+
+    def _head_fetched(self, repo_name: str, task: asyncio.Task):
+        self._head_fetches.pop(repo_name, None)
+        # 백그라운드 재확인 실패는 여기서 기록 (만료 전까지는 이전 head를 계속 사용)
+        if not task.cancelled() and task.exception() is not None:
+            self.head_stats["fetch_errors"] += 1
+            print(f"Error fetching head of {repo_name}: {task.exception()}")
+
+    def get_head_metrics(self) -> Dict[str, Any]:
+        lookups = self.head_stats["fresh_hits"] + self.head_stats["stale_hits"] + self.head_stats["misses"]
+        hits = lookups - self.head_stats["misses"]
+        return {**self.head_stats, "hit_rate": round(hits / lookups, 4) if lookups else 0.0, "repos": len(self._heads)}
+
     def _get_file_type(self, file_path: str) -> str:
         ext = Path(file_path).suffix.lower()
         type_map = {
@@ -0,0 +1,60 @@
+import asyncio
+import time
+from typing import Any, Dict
+
+from app.services.vector_backends import ivfflat_lists
+from app.services.vector_service import VectorService
+
+
+class IndexGarbageCollector:
+    """Deletes the chunks of commits superseded by a repo's current commit.
+
+    Queries resolve the current commit pointer when they start, so chunks of the previous
+    commit are only deleted `grace_secs` after the pointer moved. Rows written after the
+    pointer moved (an analysis still in progress) are never touched. Resizing the pgvector
+    index to the new row count is an admin step (`VectorService.rebuild_vector_index_sql`);
+    after deletions the `lists` value suggested for the remaining rows is logged.
+    """
+
+    def __init__(self, vector_service: VectorService, grace_secs: float = 300.0):
+        self.vector_service = vector_service
+        self.grace_secs = grace_secs
+
+    async def collect(self, repo_name: str) -> Dict[str, Any]:
+        """Wait out the grace period of the current pointer, then delete the superseded chunks."""
+        try:
+            pointer = await self.vector_service.get_current_commit(repo_name)
+            # 대기 중에 포인터가 다시 바뀌면 새 포인터 기준으로 다시 기다린다
+            while pointer is not None:
+                wait = pointer["updated_at"] + self.grace_secs - time.time()
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+                pointer = await self.vector_service.get_current_commit(repo_name)
+            if pointer is None:
+                return {"success": True, "deleted_count": 0}
+
+            backend = self.vector_service.backend
+            deleted_count = await backend.delete_superseded(repo_name, pointer["commit_hash"], pointer["updated_at"])
+            result = {"success": True, "current_commit": pointer["commit_hash"], "deleted_count": deleted_count}
+            if deleted_count:
+                self.vector_service.lexical_retriever.invalidate(repo_name)
+                await self._suggest_index_lists(result)
+            return result
+
+        except Exception as e:
+            print(f"Error collecting superseded chunks for {repo_name}: {e}")
+            return {"success": False, "error": str(e)}
+
+    async def _suggest_index_lists(self, result: Dict[str, Any]):
+        try:
+            row_count = await self.vector_service.backend.row_count()
+        except Exception as e:
+            # 삭제는 이미 끝났으므로 행 수 조회 실패는 경고로만 남김
+            print(f"Warning: Failed to count vector rows: {e}")
+            return
+        if row_count is None:
+            return
+        result["suggested_index_lists"] = ivfflat_lists(row_count)
+        print(f"Vector index holds {row_count} rows after GC; suggested ivfflat lists = {result['suggested_index_lists']} "
+              f"(rebuild with VectorService.rebuild_vector_index_sql if it differs a lot from the current value)")
@@ -0,0 +1,147 @@
+import asyncio
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.ann_index import top_k
+
+_IDENTIFIER = re.compile(r"\w+")
+# camelCase / PascalCase / ACRONYMWord / digits / non-Latin words (e.g. 한글)
+_SUBWORD = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+|[^\W\d_A-Za-z]+")
+
+
+@lru_cache(maxsize=200000)
+def _identifier_tokens(identifier: str) -> Tuple[str, ...]:
+    parts = [part.lower() for piece in identifier.split("_") for part in _SUBWORD.findall(piece)]
+    whole = identifier.strip("_").lower()
+    if whole and (len(parts) != 1 or parts[0] != whole):
+        return (whole, *parts)
+    return tuple(parts)
+
+
+def code_tokenize(text: str) -> List[str]:
+    """Lowercased tokens with identifiers also split into their camelCase/snake_case parts.
+
+    `getUserName` and `get_user_name` both yield `get`, `user`, `name`, plus the whole
+    identifier so that exact-name matches score highest.
+    """
+    tokens = []
+    for identifier in _IDENTIFIER.findall(text):
+        tokens.extend(_identifier_tokens(identifier))
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of documents.
+
+    Postings are stored as flat NumPy arrays grouped by term (CSR layout), so a query is a
+    few slices plus one weighted bincount over the matching postings.
+    """
+
+    def __init__(self, documents: List[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(documents)
+        self.vocabulary: Dict[str, int] = {}
+
+        term_ids, doc_ids, frequencies = [], [], []
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for doc_id, document in enumerate(documents):
+            counts = Counter(code_tokenize(document))
+            lengths[doc_id] = sum(counts.values())
+            for term, count in counts.items():
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                doc_ids.append(doc_id)
+                frequencies.append(count)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind="stable")
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int64)[order]
+        self.frequencies = np.asarray(frequencies, dtype=np.float32)[order]
+        document_frequency = np.bincount(term_ids, minlength=len(self.vocabulary))
+        self.offsets = np.concatenate([[0], np.cumsum(document_frequency)])
+        self.idf = np.log(1.0 + (self.size - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+        average_length = float(lengths.mean()) if self.size else 0.0
+        self.length_norm = k1 * (1.0 - b + b * lengths / (average_length or 1.0))
+
+    def scores(self, query: str) -> np.ndarray:
+        term_ids = sorted({self.vocabulary[term] for term in code_tokenize(query) if term in self.vocabulary})
+        if not term_ids:
+            return np.zeros(self.size, dtype=np.float32)
+        postings = np.concatenate([np.arange(self.offsets[t], self.offsets[t + 1]) for t in term_ids])
+        idf = np.repeat(self.idf[term_ids], np.diff(self.offsets)[term_ids])
+        docs = self.doc_ids[postings]
+        tf = self.frequencies[postings]
+        weights = idf * tf * (self.k1 + 1.0) / (tf + self.length_norm[docs])
+        return np.bincount(docs, weights=weights, minlength=self.size)
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """Return (document id, score) pairs for the k best matching documents."""
+        scores = self.scores(query)
+        return [(int(doc_id), float(scores[doc_id])) for doc_id in top_k(scores, k) if scores[doc_id] > 0]
+
+
+def reciprocal_rank_fusion(rankings: List[List[Hashable]], k: int = 60) -> List[Tuple[Hashable, float]]:
+    """Fuse ranked lists of keys: score = sum of 1 / (k + rank) over the lists containing the key."""
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+class LexicalRetriever:
+    """Per-repo/commit BM25 indexes over stored chunks, built lazily and kept for a bounded time.
+
+    `fetch_rows(repo_name, commit_hash)` returns the chunk rows (at least `content`) of a repo,
+    or only of one commit. Indexes are dropped when the repo's documents change, after
+    `ttl_secs` (other workers may have written new chunks) and beyond `max_repos` (least
+    recently used first).
+    """
+
+    def __init__(self, fetch_rows: Callable[[str, Optional[str]], Awaitable[List[Dict[str, Any]]]],
+                 ttl_secs: float = 300.0, max_repos: int = 64, k1: float = 1.2, b: float = 0.75):
+        self.fetch_rows = fetch_rows
+        self.ttl_secs = ttl_secs
+        self.max_repos = max_repos
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._indexes: "OrderedDict[Tuple[str, Optional[str]], Tuple[float, List[Dict[str, Any]], BM25Index]]" = OrderedDict()
+
+    def invalidate(self, repo_name: str):
+        with self._lock:
+            for key in [key for key in self._indexes if key[0] == repo_name]:
+                del self._indexes[key]
+
+    def _cached(self, key: Tuple[str, Optional[str]]) -> Optional[Tuple[List[Dict[str, Any]], BM25Index]]:
+        with self._lock:
+            entry = self._indexes.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_secs:
+                return None
+            self._indexes.move_to_end(key)
+            return entry[1], entry[2]
+
+    async def _index(self, repo_name: str, commit_hash: Optional[str]) -> Tuple[List[Dict[str, Any]], BM25Index]:
+        key = (repo_name, commit_hash)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        rows = await self.fetch_rows(repo_name, commit_hash)
+        index = await asyncio.to_thread(BM25Index, [row["content"] for row in rows], self.k1, self.b)
+        with self._lock:
+            self._indexes[key] = (time.monotonic(), rows, index)
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_repos:
+                self._indexes.popitem(last=False)
+        return rows, index
+
+    async def search(self, query: str, repo_name: str, limit: int, commit_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Best BM25 matches as row dicts with a `bm25_score` field."""
+        rows, index = await self._index(repo_name, commit_hash)
+        return [{**rows[doc_id], "bm25_score": score} for doc_id, score in index.search(query, limit)]
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import random
+import re
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from app.config import settings
+
+
+class LLMProvider:
+    """Creates the chat models and embedding clients used by the services."""
+
+    name = "base"
+
+    def chat_model(self, model: str, temperature: float) -> BaseChatModel:
+        raise NotImplementedError
+
+    def embeddings(self, model: str, dimensions: Optional[int] = None) -> Embeddings:
+        """`dimensions` requests shortened vectors from models that support it."""
+        raise NotImplementedError
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    def chat_model(self, model: str, temperature: float) -> BaseChatModel:
+        # Retries are handled by LLMResilience so that backoff and deadlines are applied uniformly
+        # stream_usage: 스트리밍 응답의 마지막 청크에도 토큰 사용량이 포함되도록 함
+        return ChatOpenAI(api_key=self.api_key, model=model, temperature=temperature,
+                          timeout=settings.LLM_CALL_TIMEOUT_SECS, max_retries=0, stream_usage=True)
+
+    def embeddings(self, model: str, dimensions: Optional[int] = None) -> Embeddings:
+        return OpenAIEmbeddings(api_key=self.api_key, model=model, dimensions=dimensions,
+                                timeout=settings.LLM_CALL_TIMEOUT_SECS, max_retries=0)
+
+
+def _simulated_delay(latency_ms: float, tokens_per_sec: float, tokens: int) -> float:
+    delay = latency_ms / 1000.0
+    if tokens_per_sec > 0:
+        delay += tokens / tokens_per_sec
+    return delay
+
+
+class LocalChatModel(BaseChatModel):
+    """Deterministic offline chat model.
+
+    The response is derived from a hash of the prompt and built from the prompt's own
+    vocabulary, so identical prompts always produce identical answers.
+    """
+
+    model_name: str = "local-chat"
+    latency_ms: float = 0.0
+    tokens_per_sec: float = 0.0
+    response_tokens: int = 200
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-stand-in"
+
+    def _respond(self, messages: List[BaseMessage]) -> Tuple[str, int, int]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        digest = hashlib.sha256(f"{self.model_name}\n{prompt}".encode("utf-8")).hexdigest()
+        rng = random.Random(int(digest[:16], 16))
+        vocabulary = re.findall(r"[A-Za-z_][A-Za-z0-9_]{2,}", prompt) or ["local", "response"]
+        words = [rng.choice(vocabulary) for _ in range(self.response_tokens)]
+        sentences = [" ".join(words[i:i + 12]).capitalize() + "." for i in range(0, len(words), 12)]
+        content = f"## Local response {digest[:8]}\n\n" + " ".join(sentences)
+        return content, len(prompt) // 4, self.response_tokens
+
+    def _result(self, content: str, input_tokens: int, output_tokens: int) -> ChatResult:
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        content, input_tokens, output_tokens = self._respond(messages)
+        time.sleep(_simulated_delay(self.latency_ms, self.tokens_per_sec, output_tokens))
+        return self._result(content, input_tokens, output_tokens)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        content, input_tokens, output_tokens = self._respond(messages)
+        await asyncio.sleep(_simulated_delay(self.latency_ms, self.tokens_per_sec, output_tokens))
+        return self._result(content, input_tokens, output_tokens)
+
+    def _chunks(self, messages: List[BaseMessage]) -> Iterator[Tuple[float, ChatGenerationChunk]]:
+        """(delay before the chunk, chunk): the latency before the first word, then one word per token interval."""
+        content, input_tokens, output_tokens = self._respond(messages)
+        words = re.findall(r"\S+\s*|\s+", content)
+        token_delay = _simulated_delay(0.0, self.tokens_per_sec, 1)
+        for index, word in enumerate(words):
+            delay = self.latency_ms / 1000.0 if index == 0 else token_delay
+            yield delay, ChatGenerationChunk(message=AIMessageChunk(content=word))
+        # 사용량은 OpenAI 스트림처럼 마지막 청크에 포함
+        yield 0.0, ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }))
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for delay, chunk in self._chunks(messages):
+            if delay:
+                time.sleep(delay)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        for delay, chunk in self._chunks(messages):
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+
+
+@lru_cache(maxsize=100000)
+def _token_feature(token: str, dimensions: int) -> Tuple[int, float]:
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dimensions, 1.0 if (value >> 63) & 1 else -1.0
+
+
+class LocalEmbeddings(Embeddings):
+    """Deterministic offline embeddings using signed feature hashing of word tokens.
+
+    Texts sharing vocabulary get similar vectors, which keeps retrieval meaningful in tests
+    and benchmarks. Vectors are L2-normalized like OpenAI embeddings.
+    """
+
+    def __init__(self, dimensions: int = 1536, latency_ms: float = 0.0, tokens_per_sec: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+        self.tokens_per_sec = tokens_per_sec
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        rows, columns, signs = [], [], []
+        token_count = 0
+        for row, text in enumerate(texts):
+            tokens = re.findall(r"\w+", text.lower()) or [text]
+            token_count += len(tokens)
+            for token in tokens:
+                column, sign = _token_feature(token, self.dimensions)
+                rows.append(row)
+                columns.append(column)
+                signs.append(sign)
+
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        np.add.at(vectors, (np.asarray(rows, dtype=np.intp), np.asarray(columns, dtype=np.intp)), np.asarray(signs, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1.0, norms)
+
+        time.sleep(_simulated_delay(self.latency_ms, self.tokens_per_sec, token_count))
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+
+class LocalProvider(LLMProvider):
+    """Offline stand-in for load tests and benchmarks; no network access required."""
+
+    name = "local"
+
+    def __init__(self, latency_ms: float = 0.0, tokens_per_sec: float = 0.0, embedding_dimensions: int = 1536):
+        self.latency_ms = latency_ms
+        self.tokens_per_sec = tokens_per_sec
+        self.embedding_dimensions = embedding_dimensions
+
+    def chat_model(self, model: str, temperature: float) -> BaseChatModel:
+        return LocalChatModel(model_name=model, latency_ms=self.latency_ms, tokens_per_sec=self.tokens_per_sec)
+
+    def embeddings(self, model: str, dimensions: Optional[int] = None) -> Embeddings:
+        return LocalEmbeddings(dimensions=dimensions or self.embedding_dimensions, latency_ms=self.latency_ms,
+                               tokens_per_sec=self.tokens_per_sec)
+
+
+def get_llm_provider(api_key: Optional[str] = None) -> LLMProvider:
+    """Return the provider selected by `settings.LLM_PROVIDER`."""
+    if settings.LLM_PROVIDER == "local":
+        return LocalProvider(
+            latency_ms=settings.LOCAL_LLM_LATENCY_MS,
+            tokens_per_sec=settings.LOCAL_LLM_TOKENS_PER_SEC
+        )
+    if settings.LLM_PROVIDER != "openai":
+        raise ValueError(f"Unknown LLM provider: {settings.LLM_PROVIDER}")
+    return OpenAIProvider(api_key or settings.OPENAI_API_KEY)
@@ -0,0 +1,171 @@
+import asyncio
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import openai
+
+from app.config import settings
+from app.services.llm_scheduler import RateLimitTimeout
+
+T = TypeVar("T")
+
+# Transient failures worth retrying; client errors (bad request, auth) are raised immediately
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    TimeoutError,
+    ConnectionError,
+)
+# A request that already waited the scheduler's max wait would only wait again
+NON_RETRYABLE_ERRORS = (RateLimitTimeout,)
+
+
+class LLMResilience:
+    """Retries with jittered exponential backoff, and hedged requests for latency-sensitive calls."""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay_secs: float = 0.5,
+        max_delay_secs: float = 8.0,
+        deadline_secs: float = 120.0,
+        hedge_default_delay_secs: float = 3.0,
+        hedge_min_samples: int = 20,
+        hedge_percentile: float = 0.95,
+    ):
+        self.max_retries = max_retries
+        self.base_delay_secs = base_delay_secs
+        self.max_delay_secs = max_delay_secs
+        self.deadline_secs = deadline_secs
+        self.hedge_default_delay_secs = hedge_default_delay_secs
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_percentile = hedge_percentile
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=500))
+        self._metrics: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def _count(self, operation: str, name: str):
+        with self._lock:
+            self._metrics[operation][name] += 1
+
+    def record_latency(self, operation: str, seconds: float):
+        with self._lock:
+            self._latencies[operation].append(seconds)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.max_delay_secs, self.base_delay_secs * (2 ** attempt)))
+
+    def hedge_delay(self, operation: str) -> float:
+        """Fire the hedge once the primary is slower than the recent p95 latency."""
+        with self._lock:
+            samples = sorted(self._latencies[operation])
+        if len(samples) < self.hedge_min_samples:
+            return self.hedge_default_delay_secs
+        return samples[min(len(samples) - 1, int(len(samples) * self.hedge_percentile))]
+
+    def _retry_delay(self, operation: str, attempt: int, deadline: float, error: Exception) -> Optional[float]:
+        """Backoff before the next attempt, or None once the retries or the deadline are used up."""
+        delay = self.backoff_delay(attempt)
+        if isinstance(error, NON_RETRYABLE_ERRORS) or attempt >= self.max_retries or time.monotonic() + delay > deadline:
+            self._count(operation, "gave_up")
+            return None
+        print(f"Retrying {operation} after error ({error}); attempt {attempt + 1}/{self.max_retries}")
+        self._count(operation, "retries")
+        return delay
+
+    def call_with_retries(self, operation: str, fn: Callable[[], T]) -> T:
+        """Run a blocking call, retrying transient errors until the overall deadline."""
+        deadline = time.monotonic() + self.deadline_secs
+        attempt = 0
+        while True:
+            started_at = time.monotonic()
+            try:
+                result = fn()
+                self.record_latency(operation, time.monotonic() - started_at)
+                self._count(operation, "calls")
+                return result
+            except RETRYABLE_ERRORS as e:
+                delay = self._retry_delay(operation, attempt, deadline, e)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+
+    async def acall_with_retries(self, operation: str, make_call: Callable[[], Awaitable[T]]) -> T:
+        """Async form of `call_with_retries`; each attempt is cancelled once the overall deadline passes."""
+        deadline = time.monotonic() + self.deadline_secs
+        attempt = 0
+        while True:
+            started_at = time.monotonic()
+            try:
+                result = await asyncio.wait_for(make_call(), timeout=max(0.0, deadline - started_at))
+                self.record_latency(operation, time.monotonic() - started_at)
+                self._count(operation, "calls")
+                return result
+            except RETRYABLE_ERRORS as e:
+                delay = self._retry_delay(operation, attempt, deadline, e)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def hedged(self, operation: str, make_call: Callable[[], Awaitable[T]], hedge_delay: Optional[float] = None) -> T:
+        """Run `make_call`, and a duplicate if it is slower than the hedge delay. The first success wins.
+
+        The losing attempt is cancelled, which aborts its request when `make_call` awaits an async
+        client; a call running in a worker thread would finish in the background instead.
+        """
+        delay = self.hedge_delay(operation) if hedge_delay is None else hedge_delay
+        started_at = time.monotonic()
+        primary = asyncio.ensure_future(make_call())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self._count(operation, "hedges_fired")
+                tasks.add(asyncio.ensure_future(make_call()))
+
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if not task.exception()), None)
+                if winner is not None:
+                    self._count(operation, "primary_wins" if winner is primary else "hedge_wins")
+                    self.record_latency(operation, time.monotonic() - started_at)
+                    return winner.result()
+                if not tasks:
+                    self._count(operation, "failures")
+                    raise next(iter(done)).exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            operations = set(self._metrics) | set(self._latencies)
+            metrics = {}
+            for operation in operations:
+                counts = dict(self._metrics[operation])
+                hedges = counts.get("hedges_fired", 0)
+                metrics[operation] = {
+                    **counts,
+                    "hedge_win_rate": round(counts.get("hedge_wins", 0) / hedges, 4) if hedges else 0.0,
+                    "latency_samples": len(self._latencies[operation]),
+                }
+        for operation in metrics:
+            metrics[operation]["hedge_delay_secs"] = round(self.hedge_delay(operation), 4)
+        return metrics
+
+
+llm_resilience = LLMResilience(
+    max_retries=settings.LLM_MAX_RETRIES,
+    base_delay_secs=settings.LLM_RETRY_BASE_DELAY_SECS,
+    max_delay_secs=settings.LLM_RETRY_MAX_DELAY_SECS,
+    deadline_secs=settings.LLM_CALL_DEADLINE_SECS,
+    hedge_default_delay_secs=settings.LLM_HEDGE_DEFAULT_DELAY_SECS,
+)
@@ -0,0 +1,232 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+from app.config import settings
+
+# Request priorities: lower values are served first
+INTERACTIVE = 0
+BATCH = 1
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+
+class RateLimitTimeout(TimeoutError):
+    """A request waited longer than the scheduler's max wait for its budget."""
+
+
+def _wake(waker: asyncio.Future):
+    if not waker.done():
+        waker.set_result(None)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 UTF-8 bytes per token) used for budgeting."""
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+class _RateBucket:
+    """Token bucket refilled continuously at `limit_per_minute / 60` per second."""
+
+    def __init__(self, limit_per_minute: int):
+        self.capacity = float(limit_per_minute)
+        self.rate = self.capacity / 60.0
+        self.available = self.capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float):
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def clamp(self, amount: float) -> float:
+        # A single request larger than the whole budget could never run otherwise
+        return min(amount, self.capacity)
+
+    def seconds_until(self, amount: float) -> float:
+        missing = self.clamp(amount) - self.available
+        return max(0.0, missing / self.rate) if self.rate > 0 else float("inf")
+
+
+class _ModelState:
+    def __init__(self, limits: Dict[str, int]):
+        self.requests = _RateBucket(limits["rpm"])
+        self.tokens = _RateBucket(limits["tpm"])
+        self.queue = []
+        # queue entry -> (loop, future) of coroutines waiting in acquire_async
+        self.waiters: Dict[tuple, Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self.metrics = {
+            "requests": {name: 0 for name in PRIORITY_NAMES.values()},
+            "tokens_reserved": 0,
+            "max_queue_depth": 0,
+            "total_wait_secs": 0.0,
+            "max_wait_secs": 0.0,
+            "timeouts": 0,
+        }
+
+
+class LLMScheduler:
+    """Process-wide requests-per-minute / tokens-per-minute limiter for LLM and embedding calls.
+
+    Callers wait in `acquire` (threads) or `acquire_async` (coroutines) until the model's budget
+    allows the request. Both share one queue per model served in priority order, so interactive
+    traffic overtakes queued batch jobs.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, int]], default_limits: Dict[str, int], max_wait_secs: float = 120.0):
+        self.limits = limits
+        self.default_limits = default_limits
+        self.max_wait_secs = max_wait_secs
+        self._condition = threading.Condition()
+        self._models: Dict[str, _ModelState] = {}
+        self._sequence = itertools.count()
+
+    def _state(self, model: str) -> _ModelState:
+        if model not in self._models:
+            self._models[model] = _ModelState(self.limits.get(model, self.default_limits))
+        return self._models[model]
+
+    def _enqueue(self, state: _ModelState, priority: int) -> tuple:
+        entry = (priority, next(self._sequence))
+        heapq.heappush(state.queue, entry)
+        state.metrics["max_queue_depth"] = max(state.metrics["max_queue_depth"], len(state.queue))
+        return entry
+
+    def _dequeue(self, state: _ModelState, entry: tuple):
+        if entry in state.queue:
+            state.queue.remove(entry)
+            heapq.heapify(state.queue)
+        self._notify(state)
+
+    def _notify(self, state: _ModelState):
+        """Wake sync waiters and the async waiter at the head of the queue (call with the lock held)."""
+        self._condition.notify_all()
+        if state.queue and state.queue[0] in state.waiters:
+            loop, waker = state.waiters[state.queue[0]]
+            loop.call_soon_threadsafe(_wake, waker)
+
+    def _try_reserve(self, model: str, state: _ModelState, entry: tuple, tokens: int, deadline: float) -> float:
+        """Reserve the budget if `entry` is at the head and it is available (returns 0), else the seconds to wait."""
+        now = time.monotonic()
+        state.requests.refill(now)
+        state.tokens.refill(now)
+        if state.queue[0] == entry:
+            delay = max(state.requests.seconds_until(1), state.tokens.seconds_until(tokens))
+            if delay == 0:
+                state.requests.available -= 1
+                state.tokens.available -= state.tokens.clamp(tokens)
+                return 0.0
+            if now + delay > deadline:
+                state.metrics["timeouts"] += 1
+                raise RateLimitTimeout(f"LLM rate limit wait for {model} exceeded {self.max_wait_secs}s")
+            return delay
+        # Not at the head of the queue: wait to be notified, at most until the deadline
+        if now >= deadline:
+            state.metrics["timeouts"] += 1
+            raise RateLimitTimeout(f"LLM rate limit wait for {model} exceeded {self.max_wait_secs}s")
+        return deadline - now
+
+    def _record(self, state: _ModelState, priority: int, tokens: int, waited: float) -> float:
+        metrics = state.metrics
+        metrics["requests"][PRIORITY_NAMES.get(priority, str(priority))] += 1
+        metrics["tokens_reserved"] += tokens
+        metrics["total_wait_secs"] += waited
+        metrics["max_wait_secs"] = max(metrics["max_wait_secs"], waited)
+        return waited
+
+    def acquire(self, model: str, tokens: int, priority: int = BATCH) -> float:
+        """Block the calling thread until `tokens` can be spent on `model`. Returns the time waited in seconds.
+
+        For synchronous callers (worker threads); coroutines use `acquire_async`.
+        """
+        started_at = time.monotonic()
+        deadline = started_at + self.max_wait_secs
+        with self._condition:
+            state = self._state(model)
+            entry = self._enqueue(state, priority)
+            try:
+                while True:
+                    delay = self._try_reserve(model, state, entry, tokens, deadline)
+                    if delay == 0:
+                        break
+                    self._condition.wait(timeout=delay)
+            finally:
+                self._dequeue(state, entry)
+            return self._record(state, priority, tokens, time.monotonic() - started_at)
+
+    def settle(self, model: str, reserved_tokens: int, actual_tokens: Optional[int]):
+        """Correct the token budget once the real usage of a request is known."""
+        if actual_tokens is None:
+            return
+        with self._condition:
+            state = self._state(model)
+            state.tokens.available = min(state.tokens.capacity, state.tokens.available + reserved_tokens - actual_tokens)
+            state.metrics["tokens_reserved"] += actual_tokens - reserved_tokens
+            self._notify(state)
+
+    @contextmanager
+    def slot(self, model: str, tokens: int, priority: int = BATCH):
+        """Context manager form of `acquire` for synchronous callers."""
+        self.acquire(model, tokens, priority)
+        yield
+
+    async def acquire_async(self, model: str, tokens: int, priority: int = BATCH) -> float:
+        """Awaitable form of `acquire` that waits on the event loop, not in a worker thread.
+
+        The waiter sleeps on a future woken by `loop.call_later` at its refill time, or earlier
+        when it becomes the head of the queue or tokens are refunded. A cancelled waiter leaves
+        the queue without reserving anything.
+        """
+        loop = asyncio.get_running_loop()
+        started_at = time.monotonic()
+        deadline = started_at + self.max_wait_secs
+        # 잠금은 큐/버킷 갱신 동안만 잡으므로 이벤트 루프를 막지 않음
+        with self._condition:
+            state = self._state(model)
+            entry = self._enqueue(state, priority)
+        try:
+            while True:
+                waker = loop.create_future()
+                with self._condition:
+                    delay = self._try_reserve(model, state, entry, tokens, deadline)
+                    if delay == 0:
+                        break
+                    state.waiters[entry] = (loop, waker)
+                timer = loop.call_later(delay, _wake, waker)
+                try:
+                    await waker
+                finally:
+                    timer.cancel()
+                    with self._condition:
+                        state.waiters.pop(entry, None)
+        finally:
+            with self._condition:
+                self._dequeue(state, entry)
+        with self._condition:
+            return self._record(state, priority, tokens, time.monotonic() - started_at)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, wait times and budget usage per model."""
+        with self._condition:
+            metrics = {}
+            for model, state in self._models.items():
+                total_requests = sum(state.metrics["requests"].values())
+                metrics[model] = {
+                    **state.metrics,
+                    "requests": dict(state.metrics["requests"]),
+                    "queue_depth": len(state.queue),
+                    "avg_wait_secs": round(state.metrics["total_wait_secs"] / total_requests, 4) if total_requests else 0.0,
+                    "available_requests": round(state.requests.available, 2),
+                    "available_tokens": round(state.tokens.available, 2),
+                }
+            return metrics
+
+
+llm_scheduler = LLMScheduler(
+    limits=settings.LLM_RATE_LIMITS,
+    default_limits=settings.LLM_DEFAULT_RATE_LIMIT,
+    max_wait_secs=settings.LLM_SCHEDULER_MAX_WAIT
+)
@@ -1,26 +1,21 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import json
+import re
 
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import Runnable
 
-class LLMService:
-    def __init__(self, openai_api_key: str):
-        self.llm = ChatOpenAI(
-            openai_api_key=openai_api_key,
-            model_name="gpt-4o-mini",
-            temperature=0.3
-        )
-
-    def _get_prompt_template(self, template_str: str) -> PromptTemplate:
-        return PromptTemplate.from_template(template_str)
+from app.services.llm_providers import LLMProvider, get_llm_provider
+from app.services.llm_resilience import llm_resilience
+from app.services.llm_scheduler import llm_scheduler, estimate_tokens, BATCH
+from app.services.documentation_sections import (
+    DOCUMENTATION_SECTIONS,
+    find_stale_sections,
+    section_input_hashes,
+    without_line_spans,
+)
 
-    def _create_chain(self, prompt_template: PromptTemplate) -> Runnable:
-        return prompt_template | self.llm
-
-    def run_summarization(self, readme_content: str) -> str:
-        template = """
+SUMMARIZATION_TEMPLATE = """
         You are a technical writer. Summarize the following README content to provide a high-level overview of the project.
         Focus on the project's purpose, key features, and target audience.
 
@@ -29,13 +24,8 @@ class LLMService:
 
         Summary:
         """
-        prompt = self._get_prompt_template(template)
-        chain = self._create_chain(prompt)
-        response = chain.invoke({"readme_content": readme_content})
-        return response.content
 
-    def run_structure_analysis(self, file_analysis: Dict[str, Any]) -> str:
-        template = """
+STRUCTURE_ANALYSIS_TEMPLATE = """
         Based on the following file analysis, describe the overall architecture, core components, and key data flows of the project.
 
         File Analysis:
@@ -43,9 +33,113 @@ class LLMService:
 
         Architectural Overview:
         """
-        prompt = self._get_prompt_template(template)
+
+SECTION_TEMPLATE = """
+        You are an expert technical documentation writer creating one section of the documentation for a GitHub repository in the style of DeepWiki.
+
+        ## Context
+        Repository: {repo_name}
+        Description: {repo_description}
+        Main Language: {main_language}
+
+        ## High-Level Summary
+        {summary}
+
+        ## Architectural Analysis
+        {structure_analysis}
+
+        ## Your Task
+        Write only the "{section_title}" section of the documentation.
+        {section_instructions}
+
+        ## Formatting Requirements
+        - Start with a level-two header: ## {section_title}
+        - Use ### and #### for subsections.
+        - Include code examples in ```language blocks where appropriate.
+        - Keep paragraphs concise and clear.
+
+        Generate the Markdown for this section now.
+        """
+
+SUGGESTED_QUESTIONS_TEMPLATE = """
+        You are helping developers explore the GitHub repository {repo_name} ({repo_description}).
+
+        ## Documentation Outline
+        {outline}
+
+        ## Main Components
+        {components}
+
+        ## Your Task
+        Write {count} questions a developer new to this repository would ask, answerable from its documentation and code.
+        Refer to the actual components, files or workflows above rather than asking generic questions.
+        Write each question in Korean on its own line, without numbering or any other text.
+        """
+
+_QUESTION_PREFIX = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+class LLMService:
+    # Completion budget reserved per call until the real usage is known
+    EXPECTED_OUTPUT_TOKENS = 1500
+
+    def __init__(self, openai_api_key: str, provider: Optional[LLMProvider] = None):
+        self.model_name = "gpt-4o-mini"
+        self.provider = provider or get_llm_provider(openai_api_key)
+        self.temperature = 0.3
+        self.llm = self.provider.chat_model(self.model_name, temperature=self.temperature)
+
+    def _get_prompt_template(self, template_str: str) -> PromptTemplate:
+        return PromptTemplate.from_template(template_str)
+
+    def _create_chain(self, prompt_template: PromptTemplate) -> Runnable:
+        return prompt_template | self.llm
+
+    def _invoke(self, chain: Runnable, inputs: Dict[str, Any], priority: int = BATCH):
+        """Invoke a chain within the process-wide LLM rate budget, retrying transient errors."""
+        reserved = estimate_tokens(json.dumps(inputs, ensure_ascii=False, default=str)) + self.EXPECTED_OUTPUT_TOKENS
+
+        def attempt():
+            llm_scheduler.acquire(self.model_name, reserved, priority)
+            return chain.invoke(inputs)
+
+        response = llm_resilience.call_with_retries("documentation", attempt)
+        usage = getattr(response, "usage_metadata", None)
+        if isinstance(usage, dict):
+            llm_scheduler.settle(self.model_name, reserved, usage.get("total_tokens"))
+        return response
+
+    def format_prompt(self, template_str: str, inputs: Dict[str, Any]) -> str:
+        """Render a prompt without invoking the model (used for batch submission)."""
+        return self._get_prompt_template(template_str).format(**inputs)
+
+    def summarization_inputs(self, readme_content: str) -> Dict[str, Any]:
+        return {"readme_content": readme_content}
+
+    def structure_analysis_inputs(self, file_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        return {"file_analysis_json": json.dumps(without_line_spans(file_analysis), indent=2)}
+
+    def section_inputs(self, section: Dict[str, Any], repo_info: Dict, summary: str, structure_analysis: str) -> Dict[str, Any]:
+        return {
+            "repo_name": repo_info.get('name', ''),
+            "repo_description": repo_info.get('description', ''),
+            "main_language": repo_info.get('main_language', ''),
+            "summary": summary,
+            "structure_analysis": structure_analysis,
+            "section_title": section["title"],
+            "section_instructions": section["instructions"]
+        }
+
+    def run_summarization(self, readme_content: str) -> str:
+        prompt = self._get_prompt_template(SUMMARIZATION_TEMPLATE)
+        chain = self._create_chain(prompt)
+        response = self._invoke(chain, self.summarization_inputs(readme_content))
+        return response.content
+
+    def run_structure_analysis(self, file_analysis: Dict[str, Any]) -> str:
+        prompt = self._get_prompt_template(STRUCTURE_ANALYSIS_TEMPLATE)
         chain = self._create_chain(prompt)
-        response = chain.invoke({"file_analysis_json": json.dumps(file_analysis, indent=2)})
+        response = self._invoke(chain, self.structure_analysis_inputs(file_analysis))
         return response.content
 
     def run_draft_generation(self, repo_info: Dict, summary: str, structure_analysis: str) -> str:
@@ -80,7 +174,7 @@ class LLMService:
         """
         prompt = self._get_prompt_template(template)
         chain = self._create_chain(prompt)
-        response = chain.invoke({
+        response = self._invoke(chain, {
             "repo_name": repo_info.get('name', ''),
             "repo_description": repo_info.get('description', ''),
             "main_language": repo_info.get('main_language', ''),
@@ -100,7 +194,97 @@ class LLMService:
         # Step 3: Generate the main draft
         final_documentation = self.run_draft_generation(repo_info, summary, structure_analysis)
 
-        # Ensure the final documentation is a clean string
+        return self._clean_documentation(final_documentation)
+
+    def run_section_generation(self, section: Dict[str, Any], repo_info: Dict, summary: str, structure_analysis: str) -> str:
+        prompt = self._get_prompt_template(SECTION_TEMPLATE)
+        chain = self._create_chain(prompt)
+        response = self._invoke(chain, self.section_inputs(section, repo_info, summary, structure_analysis))
+        return response.content
+
+    def run_incremental_documentation_pipeline(
+        self,
+        repo_info: Dict,
+        readme_content: str,
+        file_analysis: Dict,
+        input_hashes: Dict[str, Any],
+        previous_sections: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Generates documentation section by section, reusing sections whose inputs are unchanged.
+
+        Returns a mapping of section key to {"content", "input_hashes", "regenerated"}.
+        """
+        previous_sections = previous_sections or {}
+        stale_keys = set(find_stale_sections(previous_sections, input_hashes))
+        stale_sections = [s for s in DOCUMENTATION_SECTIONS if s["key"] in stale_keys]
+
+        # Only pay for the intermediate steps that a stale section actually needs
+        summary = ""
+        if any("readme" in s["inputs"] for s in stale_sections):
+            summary = self.run_summarization(readme_content)
+        structure_analysis = ""
+        if any("files" in s["inputs"] for s in stale_sections):
+            structure_analysis = self.run_structure_analysis(file_analysis)
+
+        generated = {
+            section["key"]: self.run_section_generation(section, repo_info, summary, structure_analysis)
+            for section in stale_sections
+        }
+        return self.build_sections(generated, previous_sections, input_hashes)
+
+    def build_sections(
+        self,
+        generated: Dict[str, Any],
+        previous_sections: Optional[Dict[str, Dict[str, Any]]],
+        input_hashes: Dict[str, Any]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Combine freshly generated section contents with the reused previous sections."""
+        previous_sections = previous_sections or {}
+        sections = {}
+        for section in DOCUMENTATION_SECTIONS:
+            key = section["key"]
+            if key in generated:
+                content = self._clean_documentation(generated[key])
+            else:
+                content = previous_sections[key]["content"]
+            sections[key] = {
+                "content": content,
+                "input_hashes": section_input_hashes(section, input_hashes),
+                "regenerated": key in generated
+            }
+        return sections
+
+    def suggested_questions_inputs(self, repo_info: Dict, documentation: str, architecture: Dict[str, Any], count: int) -> Dict[str, Any]:
+        headings = [line.lstrip("#").strip() for line in documentation.splitlines() if line.startswith(("## ", "### "))]
+        components = sorted(
+            (architecture.get("components") or {}).values(),
+            key=lambda component: len(component.get("classes", [])) + len(component.get("functions", [])),
+            reverse=True
+        )[:10]
+        return {
+            "repo_name": repo_info.get('name', ''),
+            "repo_description": repo_info.get('description', ''),
+            "outline": "\n".join(f"- {heading}" for heading in headings[:30]) or "- (none)",
+            "components": "\n".join(
+                f"- {component['file_path']}: " + ", ".join(
+                    [item.get("name", "") for item in component.get("classes", [])[:5]]
+                    + [item.get("name", "") for item in component.get("functions", [])[:5]]
+                )
+                for component in components
+            ) or "- (none)",
+            "count": count
+        }
+
+    def run_question_suggestions(self, repo_info: Dict, documentation: str, architecture: Dict[str, Any], count: int = 5) -> List[str]:
+        """Repository-specific questions for the Q&A panel, grounded in the documentation outline and components."""
+        prompt = self._get_prompt_template(SUGGESTED_QUESTIONS_TEMPLATE)
+        chain = self._create_chain(prompt)
+        response = self._invoke(chain, self.suggested_questions_inputs(repo_info, documentation, architecture, count))
+        questions = [_QUESTION_PREFIX.sub("", line).strip() for line in str(response.content).splitlines()]
+        return list(dict.fromkeys(question for question in questions if question))[:count]
+
+    def _clean_documentation(self, final_documentation: Any) -> str:
+        """Ensure generated documentation is a clean string."""
         if final_documentation is None:
             return "No documentation could be generated for this repository."
         
@@ -124,4 +308,4 @@ class LLMService:
         if not final_documentation.strip():
             return "No documentation could be generated for this repository. It might be too small or lack sufficient code for analysis."
 
-        return final_documentation
\ No newline at end of file
+        return final_documentation
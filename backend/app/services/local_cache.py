@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class LocalCache:
+    """In-process LRU of already decoded cache values, bounded by total encoded size and per-entry TTL.
+
+    Values are shared between callers and must be treated as read-only. Every invalidation
+    bumps `generation`; a value read from Redis is only stored if no invalidation happened
+    since the read started, so a concurrent write cannot be shadowed by the older value.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl_secs: float = 60.0):
+        self.max_bytes = max_bytes
+        self.ttl_secs = ttl_secs
+        # 한 항목이 계층 전체를 밀어내지 않도록 큰 값은 저장하지 않음
+        self.max_entry_bytes = max_bytes // 4
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def set(self, key: str, value: Any, size: int, ttl_secs: Optional[float] = None, generation: Optional[int] = None):
+        """Store a value whose encoded form is `size` bytes, unless invalidated since `generation` was read."""
+        ttl = self.ttl_secs if ttl_secs is None else min(ttl_secs, self.ttl_secs)
+        if size > self.max_entry_bytes or ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def delete(self, *keys: str):
+        with self._lock:
+            self.generation += 1
+            self.stats["invalidations"] += len(keys)
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,186 @@
+import re
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from app.services.llm_scheduler import estimate_tokens
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s{0,3}(`{3,}|~{3,})(.*)$")
+_WORD = re.compile(r"\S+\s*|\s+")
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+class MarkdownChunk(NamedTuple):
+    content: str
+    section_path: Tuple[str, ...]
+    tokens: int
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Lines of `text` (with line endings) without building a list of them."""
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        end = len(text) if end == -1 else end + 1
+        yield text[start:end]
+        start = end
+
+
+def _common_prefix(paths: List[Tuple[str, ...]]) -> Tuple[str, ...]:
+    prefix = paths[0]
+    for path in paths[1:]:
+        length = 0
+        while length < min(len(prefix), len(path)) and prefix[length] == path[length]:
+            length += 1
+        prefix = prefix[:length]
+    return prefix
+
+
+class MarkdownChunker:
+    """Splits Markdown along its structure: headings, paragraphs and fenced code blocks.
+
+    Blocks (a paragraph, a list, a whole code block) are packed into chunks of up to
+    `max_tokens` (estimated as UTF-8 bytes / 4, like the LLM scheduler). A new heading starts
+    a new chunk unless the current one is still below `min_tokens`, so tiny sections are
+    merged with their neighbours instead of becoming chunks of their own. A block is only
+    split when it alone exceeds the budget: code on line boundaries with each piece
+    re-fenced, prose between words. There is no overlap between chunks.
+    """
+
+    def __init__(self, max_tokens: int = 512, min_tokens: int = 128):
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+
+    def _blocks(self, text: str) -> Iterator[Tuple[str, Tuple[str, ...], bool]]:
+        """Yield (block text, section path, starts a section) in document order."""
+        headings: List[Tuple[int, str]] = []
+        block: List[str] = []
+        fence = None
+
+        def path() -> Tuple[str, ...]:
+            return tuple(title for _, title in headings)
+
+        for line in iter_lines(text):
+            fence_match = _FENCE.match(line)
+            if fence is not None:
+                block.append(line)
+                if fence_match and fence_match.group(1)[0] == fence[0] and len(fence_match.group(1)) >= len(fence) and not fence_match.group(2).strip():
+                    yield "".join(block), path(), False
+                    block, fence = [], None
+                continue
+
+            if fence_match:
+                if block:
+                    yield "".join(block), path(), False
+                block, fence = [line], fence_match.group(1)
+                continue
+
+            heading = _HEADING.match(line)
+            if heading:
+                if block:
+                    yield "".join(block), path(), False
+                level = len(heading.group(1))
+                while headings and headings[-1][0] >= level:
+                    headings.pop()
+                headings.append((level, heading.group(2)))
+                block = []
+                yield (line if line.endswith("\n") else line + "\n") + "\n", path(), True
+                continue
+
+            if not line.strip():
+                if block:
+                    block.append(line)
+                    yield "".join(block), path(), False
+                    block = []
+                continue
+            block.append(line)
+
+        if block:
+            yield "".join(block), path(), False
+
+    def _pack(self, units: Iterator[str], budget: int, wrap=lambda text: text) -> Iterator[str]:
+        """Greedily pack units (lines or words) into pieces of at most `budget` bytes."""
+        piece: List[str] = []
+        size = 0
+        for unit in units:
+            unit_size = _size(unit)
+            if piece and size + unit_size > budget:
+                yield wrap("".join(piece))
+                piece, size = [], 0
+            if unit_size > budget:
+                # 단어 하나가 예산보다 큰 경우(minified 코드 등)에만 문자 단위로 자른다
+                step = max(1, len(unit) * budget // unit_size)
+                for start in range(0, len(unit), step):
+                    yield wrap(unit[start:start + step])
+                continue
+            piece.append(unit)
+            size += unit_size
+        if piece:
+            yield wrap("".join(piece))
+
+    def _split_oversized(self, block: str) -> Iterator[str]:
+        """Split a block larger than the budget: code on line boundaries (re-fenced), prose on words."""
+        budget = self.max_tokens * 4
+        lines = list(iter_lines(block))
+        fence_match = _FENCE.match(lines[0])
+        if not fence_match:
+            words = (word for line in lines for word in _WORD.findall(line))
+            yield from self._pack(words, budget)
+            return
+
+        opening = lines[0]
+        has_closing = len(lines) > 1 and _FENCE.match(lines[-1]) is not None
+        closing = lines[-1] if has_closing else fence_match.group(1) + "\n"
+        if not closing.endswith("\n"):
+            closing += "\n"
+        body = lines[1:-1] if has_closing else lines[1:]
+        yield from self._pack(iter(body), budget - _size(opening + closing), lambda text: opening + text + closing)
+
+    def _sized_blocks(self, text: str) -> Iterator[Tuple[str, Tuple[str, ...], bool]]:
+        for block, section_path, starts_section in self._blocks(text):
+            if _size(block) <= self.max_tokens * 4:
+                yield block, section_path, starts_section
+            else:
+                for piece in self._split_oversized(block):
+                    yield piece, section_path, False
+
+    def iter_chunks(self, text: str) -> Iterator[MarkdownChunk]:
+        """Yield chunks in document order; only the current chunk's blocks are held in memory."""
+        max_bytes, min_bytes = self.max_tokens * 4, self.min_tokens * 4
+        # (block, section path, is heading)
+        parts: List[Tuple[str, Tuple[str, ...], bool]] = []
+        size = 0
+
+        def chunk(blocks) -> Optional[MarkdownChunk]:
+            content = "".join(block for block, _, _ in blocks).strip()
+            if not content:
+                return None
+            return MarkdownChunk(content, _common_prefix([path for _, path, _ in blocks]), estimate_tokens(content))
+
+        for block, section_path, is_heading in self._sized_blocks(text):
+            block_size = _size(block)
+            if is_heading and size >= min_bytes:
+                flushed, parts = parts, []
+            elif size + block_size > max_bytes:
+                # 끝에 걸린 헤딩은 다음 청크의 본문과 함께 보낸다
+                keep = len(parts)
+                while keep > 0 and parts[keep - 1][2]:
+                    keep -= 1
+                flushed, parts = parts[:keep], parts[keep:]
+            else:
+                flushed = []
+
+            if flushed:
+                result = chunk(flushed)
+                if result:
+                    yield result
+                size = sum(_size(part) for part, _, _ in parts)
+
+            parts.append((block, section_path, is_heading))
+            size += block_size
+
+        result = chunk(parts) if parts else None
+        if result:
+            yield result
@@ -1,18 +1,48 @@
 import asyncio
-from typing import Dict, Any, List
-from langchain_openai import ChatOpenAI
+import contextlib
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from langchain_core.prompts import PromptTemplate
 from app.config import settings
+from app.services.answer_cache import AnswerCache, normalize_question
+from app.services.cache_service import AsyncCacheService
+from app.services.cache_tags import repo_tag
+from app.services.context_assembler import ContextAssembler
+from app.services.conversation_store import ConversationStore
 from app.services.vector_service import VectorService
+from app.services.llm_providers import LLMProvider, get_llm_provider
+from app.services.llm_resilience import llm_resilience
+from app.services.llm_scheduler import llm_scheduler, estimate_tokens, INTERACTIVE, BATCH
+
+NO_DOCUMENTS_ANSWER = "해당 리포지토리에 대한 문서를 찾을 수 없습니다. 먼저 리포지토리를 분석해주세요."
+
+# 분석 시 생성한 추천 질문이 없을 때 사용
+DEFAULT_SUGGESTED_QUESTIONS = [
+    "이 프로젝트는 어떤 기능을 제공하나요?",
+    "프로젝트를 설치하고 실행하는 방법은?",
+    "주요 API 엔드포인트들은 무엇인가요?",
+    "프로젝트의 아키텍처는 어떻게 구성되어 있나요?",
+    "어떤 기술 스택을 사용하고 있나요?"
+]
 
 class QAService:
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            api_key=settings.OPENAI_API_KEY,
-            model="gpt-3.5-turbo",
-            temperature=0.1
+    # Completion budget reserved per answer until the real usage is known
+    EXPECTED_OUTPUT_TOKENS = 800
+
+    def __init__(self, provider: Optional[LLMProvider] = None, vector_service: Optional[VectorService] = None,
+                 answer_cache: Optional[AnswerCache] = None, cache_service: Optional[AsyncCacheService] = None,
+                 conversation_store: Optional[ConversationStore] = None):
+        self.model_name = "gpt-3.5-turbo"
+        self.provider = provider or get_llm_provider()
+        self.llm = self.provider.chat_model(self.model_name, temperature=0.1)
+        self.vector_service = vector_service or VectorService(provider=self.provider)
+        self.answer_cache = answer_cache
+        self.cache_service = cache_service
+        self.conversation_store = conversation_store
+        self.context_assembler = ContextAssembler(
+            max_tokens=settings.QA_CONTEXT_MAX_TOKENS,
+            max_chunks=settings.QA_CONTEXT_MAX_CHUNKS,
+            mmr_lambda=settings.QA_CONTEXT_MMR_LAMBDA
         )
-        self.vector_service = VectorService()
         
         # RAG 프롬프트 템플릿
         self.qa_prompt = PromptTemplate.from_template("""
@@ -34,51 +64,219 @@ class QAService:
 답변:
 """)
 
-    async def answer_question(self, question: str, repo_name: str) -> Dict[str, Any]:
-        """사용자 질문에 대해 RAG를 사용하여 답변 생성"""
+        # 세션의 후속 질문용: 이전 대화를 함께 제공
+        self.qa_session_prompt = PromptTemplate.from_template("""
+당신은 GitHub 리포지토리 문서화 전문 AI 어시스턴트입니다. 
+주어진 문서 내용과 이전 대화를 바탕으로 사용자의 질문에 정확하고 도움이 되는 답변을 제공하세요.
+
+관련 문서 내용:
+{context}
+
+이전 대화:
+{history}
+
+사용자 질문: {question}
+
+답변 지침:
+1. 주어진 문서 내용을 기반으로만 답변하세요
+2. 질문이 이전 대화를 가리키면(그것, 위의 함수 등) 이전 대화에서 대상을 찾으세요
+3. 문서에 명시되지 않은 내용은 추측하지 마세요
+4. 관련 파일명이나 함수명을 언급할 때는 구체적으로 명시하세요
+5. 답변을 찾을 수 없는 경우 솔직히 말씀하세요
+
+답변:
+""")
+
+    async def _current_commit(self, repo_name: str) -> Optional[str]:
+        """답변 캐시 키에 쓸 현재 커밋 (알 수 없으면 캐시를 사용하지 않음)"""
+        try:
+            pointer = await self.vector_service.get_current_commit(repo_name)
+            return pointer.get("commit_hash") if pointer else None
+        except Exception as e:
+            print(f"Error resolving current commit for {repo_name}: {e}")
+            return None
+
+    async def _cached_answer(self, repo_name: str, commit_hash: Optional[str], question: str) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+        """(캐시된 답변 또는 None, 의미 기반 조회에 사용한 질문 임베딩)"""
+        query_embedding = None
+        if not commit_hash:
+            return None, None
         try:
-            # 1. Vector Store에서 관련 문서 검색
-            relevant_docs = await self.vector_service.search_similar_content(
+            cached = await self.answer_cache.get(repo_name, commit_hash, question)
+            if cached is None and self.answer_cache.semantic_enabled:
+                query_embedding = await self.vector_service.embed_query(question)
+                cached = await self.answer_cache.get(repo_name, commit_hash, question, query_embedding)
+            return cached, query_embedding
+        except Exception as e:
+            print(f"Error reading answer cache: {e}")
+            return None, query_embedding
+
+    async def _store_answer(self, repo_name: str, commit_hash: Optional[str], question: str, result: Dict[str, Any],
+                            query_embedding: Optional[List[float]]):
+        if not commit_hash or not result["success"]:
+            return
+        try:
+            await self.answer_cache.set(repo_name, commit_hash, question, result, query_embedding)
+        except Exception as e:
+            print(f"Error writing answer cache: {e}")
+
+    async def _load_session(self, session_id: Optional[str], repo_name: str) -> Optional[Dict[str, Any]]:
+        if not session_id or not self.conversation_store:
+            return None
+        try:
+            return await self.conversation_store.load(session_id, repo_name)
+        except Exception as e:
+            print(f"Error loading conversation session: {e}")
+            return None
+
+    async def _save_session(self, session_id: Optional[str], session: Optional[Dict[str, Any]], question: str,
+                            result: Dict[str, Any]):
+        if session is None:
+            return
+        if result["success"]:
+            self.conversation_store.add_turn(session, question, result["answer"])
+        try:
+            await self.conversation_store.save(session_id, session)
+        except Exception as e:
+            print(f"Error saving conversation session: {e}")
+
+    async def _is_suggestion(self, repo_name: str, question: str) -> bool:
+        normalized = normalize_question(question)
+        return any(normalize_question(suggestion) == normalized for suggestion in await self.get_suggested_questions(repo_name))
+
+    async def _answer_mode(self, session: Optional[Dict[str, Any]], question: str,
+                           repo_name: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """(답변 캐시 사용 여부, 답변 생성에 쓸 세션)
+
+        이전 대화가 있으면 답변이 대화에 따라 달라지므로 답변 캐시를 사용하지 않는다. 단 추천 질문은
+        대화와 무관한 독립 질문이므로 세션 중에도 이전 대화 없이 답변하고 (미리 생성된) 답변 캐시를 사용한다.
+        """
+        if not (session and self.conversation_store.history(session)):
+            return self.answer_cache is not None, session
+        if self.answer_cache is not None and await self._is_suggestion(repo_name, question):
+            return True, None
+        return False, session
+
+    async def answer_question(self, question: str, repo_name: str, priority: int = INTERACTIVE,
+                              session_id: Optional[str] = None) -> Dict[str, Any]:
+        """사용자 질문에 대해 RAG를 사용하여 답변 생성 (같은 커밋에 대한 같은 질문은 캐시된 답변 반환)
+
+        session_id가 있으면 이전 대화를 프롬프트에 포함하고, 같은 주제의 후속 질문은 검색 없이 이전 청크를 재사용한다.
+        """
+        session = await self._load_session(session_id, repo_name)
+        cacheable, answer_session = await self._answer_mode(session, question, repo_name)
+        commit_hash = await self._current_commit(repo_name) if cacheable else None
+        cached, query_embedding = await self._cached_answer(repo_name, commit_hash, question)
+        if cached is not None:
+            result = cached
+        else:
+            result = await self._answer_uncached(question, repo_name, priority, answer_session)
+            await self._store_answer(repo_name, commit_hash, question, result, query_embedding)
+
+        if session is None:
+            return result
+        await self._save_session(session_id, session, question, result)
+        return {**result, "session_id": session_id}
+
+    async def _candidate_vectors(self, contents: List[str]) -> Dict[str, List[float]]:
+        """MMR에 쓸 후보 청크 벡터. 저장 시 채운 임베딩 캐시에서만 조회하고 다시 임베딩하지 않음"""
+        if not contents:
+            return {}
+        try:
+            vectors = await self.vector_service.cached_document_embeddings(contents)
+        except Exception as e:
+            print(f"Error reading context candidate embeddings, skipping MMR: {e}")
+            return {}
+        return {content: vector for content, vector in zip(contents, vectors) if vector is not None}
+
+    async def _assemble_context(self, question: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """후보 청크를 중복 제거·MMR·토큰 예산·인접 청크 병합으로 압축 (캐시에 없는 벡터가 있으면 유사도 순서 사용)"""
+        query_vector = vectors = None
+        if settings.QA_CONTEXT_MMR_ENABLED and len(candidates) > 1:
+            content_vectors = await self._candidate_vectors(list(dict.fromkeys(doc["content"] for doc in candidates)))
+            if all(doc["content"] in content_vectors for doc in candidates):
+                try:
+                    query_vector = await self.vector_service.embed_query(question)
+                    vectors = [content_vectors[doc["content"]] for doc in candidates]
+                except Exception as e:
+                    print(f"Error embedding question, skipping MMR: {e}")
+        return self.context_assembler.assemble(candidates, query_vector if vectors else None, vectors)
+
+    def _prompt(self, question: str, passages: List[Dict[str, Any]], history: str = "") -> str:
+        context = "\n\n".join([
+            f"문서 {i+1}:\n{passage['content']}" 
+            for i, passage in enumerate(passages)
+        ])
+        if history:
+            return self.qa_session_prompt.format(context=context, history=history, question=question)
+        return self.qa_prompt.format(context=context, question=question)
+
+    async def _session_candidates(self, session: Dict[str, Any], question: str, repo_name: str) -> List[Dict[str, Any]]:
+        """같은 주제의 후속 질문이면 세션에 저장된 청크를 재사용하고, 아니면 검색 후 세션에 저장"""
+        query_embedding = commit_hash = None
+        try:
+            query_embedding = await self.vector_service.embed_query(question)
+            commit_hash = await self._current_commit(repo_name)
+            rows = self.conversation_store.reusable_context(session, commit_hash, query_embedding)
+            if rows:
+                return rows
+        except Exception as e:
+            print(f"Error reusing session context: {e}")
+
+        candidates = await self.vector_service.search_similar_content(
+            query=question,
+            repo_name=repo_name,
+            limit=settings.QA_CONTEXT_CANDIDATES
+        )
+        if candidates and query_embedding is not None:
+            self.conversation_store.remember_context(session, commit_hash, query_embedding, candidates)
+        return candidates
+
+    async def _retrieve(self, question: str, repo_name: str,
+                        session: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], str]:
+        """(컨텍스트 구절, 프롬프트). 문서가 없으면 프롬프트는 빈 문자열"""
+        # 1. Vector Store에서 후보 청크 검색 (세션이면 이전 청크 재사용 가능)
+        if session is not None:
+            candidates = await self._session_candidates(session, question, repo_name)
+        else:
+            candidates = await self.vector_service.search_similar_content(
                 query=question,
                 repo_name=repo_name,
-                limit=5
+                limit=settings.QA_CONTEXT_CANDIDATES
             )
-            
-            if not relevant_docs:
-                return {
-                    "success": False,
-                    "answer": "해당 리포지토리에 대한 문서를 찾을 수 없습니다. 먼저 리포지토리를 분석해주세요.",
-                    "sources": []
-                }
-            
-            # 2. 컨텍스트 구성
-            context = "\n\n".join([
-                f"문서 {i+1}:\n{doc['content']}" 
-                for i, doc in enumerate(relevant_docs)
-            ])
+        if not candidates:
+            return [], ""
+
+        # 2. 컨텍스트 구성
+        passages = await self._assemble_context(question, candidates)
+        history = self.conversation_store.history(session) if session is not None else ""
+        return passages, self._prompt(question, passages, history)
+
+    def _sources(self, passages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "content": passage["content"][:200] + "...",  # 첫 200자만 표시
+                "metadata": passage["chunks"][0].get("metadata", {})
+            }
+            for passage in passages
+        ]
+
+    async def _answer_uncached(self, question: str, repo_name: str, priority: int = INTERACTIVE,
+                               session: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        try:
+            passages, formatted_prompt = await self._retrieve(question, repo_name, session)
+            if not passages:
+                return {"success": False, "answer": NO_DOCUMENTS_ANSWER, "sources": []}
             
             # 3. LLM을 사용하여 답변 생성
-            formatted_prompt = self.qa_prompt.format(
-                context=context,
-                question=question
-            )
-            
-            response = await asyncio.to_thread(
-                self.llm.invoke, formatted_prompt
-            )
+            response = await self._generate_answer(formatted_prompt, priority)
             
             answer = response.content if hasattr(response, 'content') else str(response)
             
             return {
                 "success": True,
                 "answer": answer,
-                "sources": [
-                    {
-                        "content": doc["content"][:200] + "...",  # 첫 200자만 표시
-                        "metadata": doc.get("metadata", {})
-                    }
-                    for doc in relevant_docs
-                ]
+                "sources": self._sources(passages)
             }
             
         except Exception as e:
@@ -89,20 +287,230 @@ class QAService:
                 "sources": []
             }
 
+    async def stream_answer(self, question: str, repo_name: str, session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """답변을 이벤트로 스트리밍: sources → token... → done (실패 시 error)
+
+        소비자가 제너레이터를 닫으면(클라이언트 연결 종료) 진행 중인 LLM 스트림도 닫혀 생성이 중단된다.
+        끝까지 생성된 답변만 세션 대화에 추가된다.
+        """
+        session = await self._load_session(session_id, repo_name)
+        cacheable, answer_session = await self._answer_mode(session, question, repo_name)
+        commit_hash = await self._current_commit(repo_name) if cacheable else None
+        cached, query_embedding = await self._cached_answer(repo_name, commit_hash, question)
+        if cached is not None:
+            await self._save_session(session_id, session, question, cached)
+            yield {"type": "sources", "sources": cached.get("sources", [])}
+            yield {"type": "token", "content": cached["answer"]}
+            yield {"type": "done", "cached": cached.get("cached")}
+            return
+
+        try:
+            passages, formatted_prompt = await self._retrieve(question, repo_name, answer_session)
+            if not passages:
+                yield {"type": "error", "message": NO_DOCUMENTS_ANSWER}
+                return
+
+            sources = self._sources(passages)
+            yield {"type": "sources", "sources": sources}
+
+            # 첫 토큰 이후에는 재시도할 수 없으므로 스트림은 한 번만 시도
+            reserved = estimate_tokens(formatted_prompt) + self.EXPECTED_OUTPUT_TOKENS
+            await llm_scheduler.acquire_async(self.model_name, reserved, INTERACTIVE)
+            parts, usage = [], None
+            # 제너레이터가 닫히면(클라이언트 연결 종료) GC를 기다리지 않고 바로 LLM 스트림을 닫음
+            async with contextlib.aclosing(self.llm.astream(formatted_prompt)) as chunks:
+                async for chunk in chunks:
+                    if chunk.usage_metadata:
+                        usage = chunk.usage_metadata
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield {"type": "token", "content": chunk.content}
+            if usage:
+                llm_scheduler.settle(self.model_name, reserved, usage.get("total_tokens"))
+
+        except Exception as e:
+            print(f"Error in stream_answer: {e}")
+            yield {"type": "error", "message": f"답변 생성 중 오류가 발생했습니다: {str(e)}"}
+            return
+
+        result = {"success": True, "answer": "".join(parts), "sources": sources}
+        await self._store_answer(repo_name, commit_hash, question, result, query_embedding)
+        await self._save_session(session_id, session, question, result)
+        yield {"type": "done", "cached": None}
+
+    async def _retrieve_many(self, questions: List[str], repo_name: str,
+                             query_embeddings: List[List[float]]) -> List[List[Dict[str, Any]]]:
+        """질문별 컨텍스트 구절. 검색은 한 번에 하고, 후보 청크 벡터는 임베딩 캐시에서 한 번에 조회"""
+        candidate_lists = await self.vector_service.search_many(
+            questions, repo_name, limit=settings.QA_CONTEXT_CANDIDATES, query_embeddings=query_embeddings
+        )
+        content_vectors: Dict[str, List[float]] = {}
+        if settings.QA_CONTEXT_MMR_ENABLED:
+            content_vectors = await self._candidate_vectors(
+                list(dict.fromkeys(doc["content"] for candidates in candidate_lists for doc in candidates))
+            )
+
+        passage_lists = []
+        for query_vector, candidates in zip(query_embeddings, candidate_lists):
+            vectors = None
+            if candidates and all(doc["content"] in content_vectors for doc in candidates):
+                vectors = [content_vectors[doc["content"]] for doc in candidates]
+            passage_lists.append(self.context_assembler.assemble(candidates, query_vector if vectors else None, vectors))
+        return passage_lists
+
+    async def answer_batch(self, questions: List[str], repo_name: str, priority: int = BATCH) -> AsyncIterator[Dict[str, Any]]:
+        """여러 질문에 답하고 끝나는 순서대로 {"index", "question", ...answer_question 결과}를 반환
+
+        캐시된 답변이 먼저 나오고, 나머지 질문은 임베딩을 한 번의 배치 호출로 만들고 함께 검색한 뒤
+        LLM 호출을 QA_BATCH_CONCURRENCY개까지 동시에 실행한다. 같은 질문(정규화 기준)은 한 번만 답변한다.
+        소비자가 제너레이터를 닫으면 남은 답변 생성은 취소된다.
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, question in enumerate(questions):
+            groups.setdefault(normalize_question(question), []).append(index)
+
+        def results(key: str, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+            return [{"index": index, "question": questions[index], **result} for index in groups[key]]
+
+        commit_hash = await self._current_commit(repo_name) if self.answer_cache else None
+        cached_answers: List[Optional[Dict[str, Any]]] = [None] * len(groups)
+        if commit_hash:
+            try:
+                cached_answers = await self.answer_cache.get_many(
+                    repo_name, commit_hash, [questions[indices[0]] for indices in groups.values()]
+                )
+            except Exception as e:
+                print(f"Error reading answer cache: {e}")
+        pending: List[str] = []
+        for key, cached in zip(groups, cached_answers):
+            if cached is None:
+                pending.append(key)
+                continue
+            for item in results(key, cached):
+                yield item
+        if not pending:
+            return
+
+        pending_questions = [questions[groups[key][0]] for key in pending]
+        try:
+            query_embeddings = await self.vector_service.embed_queries(pending_questions)
+        except Exception as e:
+            print(f"Error in answer_batch: {e}")
+            failed = {"success": False, "answer": f"답변 생성 중 오류가 발생했습니다: {str(e)}", "sources": []}
+            for key in pending:
+                for item in results(key, failed):
+                    yield item
+            return
+
+        # 의미 기반 캐시는 배치로 만든 질문 임베딩으로 조회
+        if commit_hash and self.answer_cache.semantic_enabled:
+            remaining = []
+            for key, question, embedding in zip(pending, pending_questions, query_embeddings):
+                try:
+                    cached = await self.answer_cache.get(repo_name, commit_hash, question, embedding)
+                except Exception as e:
+                    print(f"Error reading answer cache: {e}")
+                    cached = None
+                if cached is None:
+                    remaining.append((key, question, embedding))
+                    continue
+                for item in results(key, cached):
+                    yield item
+            if not remaining:
+                return
+            pending, pending_questions, query_embeddings = (list(column) for column in zip(*remaining))
+
+        passage_lists = await self._retrieve_many(pending_questions, repo_name, query_embeddings)
+        semaphore = asyncio.Semaphore(settings.QA_BATCH_CONCURRENCY)
+
+        async def answer(key: str, question: str, passages: List[Dict[str, Any]], embedding: List[float]):
+            if not passages:
+                return key, {"success": False, "answer": NO_DOCUMENTS_ANSWER, "sources": []}
+            async with semaphore:
+                try:
+                    response = await self._generate_answer(self._prompt(question, passages), priority)
+                    answer_text = response.content if hasattr(response, 'content') else str(response)
+                    result = {"success": True, "answer": answer_text, "sources": self._sources(passages)}
+                except Exception as e:
+                    print(f"Error in answer_batch: {e}")
+                    return key, {"success": False, "answer": f"답변 생성 중 오류가 발생했습니다: {str(e)}", "sources": []}
+            await self._store_answer(repo_name, commit_hash, question, result, embedding)
+            return key, result
+
+        tasks = [
+            asyncio.create_task(answer(key, question, passages, embedding))
+            for key, question, passages, embedding in zip(pending, pending_questions, passage_lists, query_embeddings)
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                key, result = await finished
+                for item in results(key, result):
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _generate_answer(self, prompt: str, priority: int = INTERACTIVE):
+        """답변 생성. 응답이 최근 p95보다 느리면 중복 요청(hedge)을 보내고 먼저 도착한 답변을 사용
+
+        비동기 클라이언트로 호출하므로 늦은 쪽 요청은 취소 시 HTTP 요청까지 중단된다.
+        """
+        if not settings.LLM_HEDGING_ENABLED or priority != INTERACTIVE:
+            # 백그라운드 미리 생성에는 hedge를 보내지 않음
+            return await self._invoke_llm(prompt, priority)
+        return await llm_resilience.hedged("qa_answer_hedged", lambda: self._invoke_llm(prompt))
+
+    async def _invoke_llm(self, prompt: str, priority: int = INTERACTIVE):
+        """LLM 호출을 전역 요청/토큰 예산 안에서 실행 (질의응답은 interactive 우선순위)"""
+        reserved = estimate_tokens(prompt) + self.EXPECTED_OUTPUT_TOKENS
+
+        async def attempt():
+            await llm_scheduler.acquire_async(self.model_name, reserved, priority)
+            return await self.llm.ainvoke(prompt)
+
+        response = await llm_resilience.acall_with_retries("qa_answer", attempt)
+        usage = getattr(response, "usage_metadata", None)
+        if isinstance(usage, dict):
+            llm_scheduler.settle(self.model_name, reserved, usage.get("total_tokens"))
+        return response
+
+    def _suggestions_key(self, repo_name: str) -> str:
+        return f"{repo_name}:suggested_questions"
+
+    async def save_suggested_questions(self, repo_name: str, commit_hash: str, questions: List[str]):
+        """분석 단계에서 생성한 추천 질문 저장"""
+        if self.cache_service and questions:
+            await self.cache_service.set(
+                self._suggestions_key(repo_name),
+                {"commit_hash": commit_hash, "questions": questions}, settings.SUGGESTED_QUESTIONS_TTL,
+                tags=[repo_tag(repo_name)]
+            )
+
     async def get_suggested_questions(self, repo_name: str) -> List[str]:
-        """리포지토리에 대한 추천 질문들 생성"""
+        """리포지토리에 대한 추천 질문들 (분석 시 생성된 질문이 없으면 기본 질문)"""
         try:
-            # 간단한 추천 질문들 (실제로는 문서 내용을 기반으로 동적 생성 가능)
-            suggested_questions = [
-                "이 프로젝트는 어떤 기능을 제공하나요?",
-                "프로젝트를 설치하고 실행하는 방법은?",
-                "주요 API 엔드포인트들은 무엇인가요?",
-                "프로젝트의 아키텍처는 어떻게 구성되어 있나요?",
-                "어떤 기술 스택을 사용하고 있나요?"
-            ]
-            
-            return suggested_questions
+            if self.cache_service:
+                cached = await self.cache_service.get(self._suggestions_key(repo_name))
+                if cached and cached.get("questions"):
+                    return cached["questions"]
+            return list(DEFAULT_SUGGESTED_QUESTIONS)
             
         except Exception as e:
-            print(f"Error generating suggested questions: {e}")
-            return []
\ No newline at end of file
+            print(f"Error getting suggested questions: {e}")
+            return list(DEFAULT_SUGGESTED_QUESTIONS)
+
+    async def prewarm_answers(self, repo_name: str, questions: List[str]) -> Dict[str, int]:
+        """추천 질문의 답변을 batch 우선순위로 미리 생성하여 답변 캐시에 저장"""
+        stats = {"answered": 0, "cached": 0, "failed": 0}
+        # 현재 커밋을 알 수 없으면(임베딩 저장 실패 등) 답변이 캐시되지 않으므로 생략
+        if not self.answer_cache or not await self._current_commit(repo_name):
+            return stats
+        for question in questions:
+            result = await self.answer_question(question, repo_name, priority=BATCH)
+            if not result["success"]:
+                stats["failed"] += 1
+            elif result.get("cached"):
+                stats["cached"] += 1
+            else:
+                stats["answered"] += 1
+        return stats
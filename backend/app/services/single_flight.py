@@ -0,0 +1,186 @@
+import asyncio
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import redis
+import redis.asyncio
+
+# 잠금을 아직 소유한 경우에만 연장/해제
+_RENEW = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end"
+_RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+ProgressCallback = Callable[[str], Awaitable[None]]
+
+
+class _Flight:
+    def __init__(self, owner: str, on_progress: Optional[ProgressCallback]):
+        self.owner = owner
+        self.on_progress = on_progress
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.followers: List[ProgressCallback] = []
+        self.status: Optional[str] = None
+
+
+class SingleFlight:
+    """Runs concurrent requests for the same key once, within a worker and across workers.
+
+    The first caller for a key in a process starts a flight; later callers in the process
+    attach to it and get its progress and result. Across workers, the flight that wins a
+    Redis lock (SET NX with a lease renewed while the work runs) leads; flights in other
+    workers follow it by polling `poll()` for the result and a progress key for the status.
+    If the leader fails or dies, its lock is released or its lease expires and a follower
+    takes over. Without a Redis client (or while Redis is down) flights only coalesce
+    within the process.
+    """
+
+    def __init__(self, client: Optional[redis.asyncio.Redis], lease_secs: float = 30.0,
+                 poll_interval_secs: float = 1.0, wait_timeout_secs: float = 1800.0, prefix: str = "singleflight"):
+        self.client = client
+        self.lease_secs = lease_secs
+        self.poll_interval_secs = poll_interval_secs
+        self.wait_timeout_secs = wait_timeout_secs
+        self.prefix = prefix
+        self._flights: Dict[str, _Flight] = {}
+        # owner -> key of the flight it currently leads
+        self._leading: Dict[str, str] = {}
+        self.stats = {"leaders": 0, "followers": 0, "remote_followers": 0, "takeovers": 0}
+
+    def _lock_key(self, key: str) -> str:
+        return f"{self.prefix}:lock:{key}"
+
+    def _progress_key(self, key: str) -> str:
+        return f"{self.prefix}:progress:{key}"
+
+    async def run(self, key: str, owner: str, work: Callable[[], Awaitable[Any]],
+                  poll: Callable[[], Awaitable[Optional[Any]]],
+                  on_progress: Optional[ProgressCallback] = None) -> Tuple[Any, bool]:
+        """(result, whether this call ran `work`) for `key`.
+
+        `poll` returns the result once a leader stored it (None before); `on_progress` gets the
+        statuses the leader reports while this call waits for it.
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.stats["followers"] += 1
+            if on_progress is not None:
+                flight.followers.append(on_progress)
+                if flight.status is not None:
+                    await self._notify(on_progress, flight.status)
+            return await asyncio.shield(flight.future), False
+
+        flight = _Flight(owner, on_progress)
+        self._flights[key] = flight
+        try:
+            result, led = await self._lead_or_follow(key, flight, work, poll)
+        except BaseException as e:
+            flight.future.set_exception(e if isinstance(e, Exception) else RuntimeError(f"Flight {key} was cancelled"))
+            # 대기 중인 팔로워가 없어도 경고가 나지 않도록 예외를 조회된 것으로 표시
+            flight.future.exception()
+            raise
+        else:
+            flight.future.set_result(result)
+            return result, led
+        finally:
+            del self._flights[key]
+
+    async def report(self, owner: str, status: str):
+        """Pass a progress status of the flight `owner` leads (if any) on to its followers."""
+        key = self._leading.get(owner)
+        if key is None:
+            return
+        await self._broadcast(self._flights[key], status)
+        if self.client is not None:
+            try:
+                await self.client.set(self._progress_key(key), status, ex=int(self.wait_timeout_secs))
+            except redis.RedisError as e:
+                print(f"Error publishing progress of {key}: {e}")
+
+    async def _lead_or_follow(self, key: str, flight: _Flight, work, poll) -> Tuple[Any, bool]:
+        deadline = asyncio.get_running_loop().time() + self.wait_timeout_secs
+        following = False
+        while True:
+            token = f"{flight.owner}:{uuid.uuid4().hex}"
+            if await self._acquire(key, token):
+                self.stats["takeovers" if following else "leaders"] += 1
+                return await self._lead(key, flight, token, work), True
+            if not following:
+                self.stats["remote_followers"] += 1
+                following = True
+            result = await self._follow(key, flight, poll, deadline)
+            if result is not None:
+                return result, False
+
+    async def _acquire(self, key: str, token: str) -> bool:
+        if self.client is None:
+            return True
+        try:
+            return bool(await self.client.set(self._lock_key(key), token, nx=True, px=int(self.lease_secs * 1000)))
+        except redis.RedisError as e:
+            # Redis 없이도 프로세스 내 병합은 유지
+            print(f"Error acquiring single-flight lock for {key}, running locally: {e}")
+            return True
+
+    async def _lead(self, key: str, flight: _Flight, token: str, work) -> Any:
+        self._leading[flight.owner] = key
+        renewal = asyncio.create_task(self._renew(key, token)) if self.client is not None else None
+        try:
+            return await work()
+        finally:
+            self._leading.pop(flight.owner, None)
+            if renewal is not None:
+                renewal.cancel()
+                try:
+                    await self.client.eval(_RELEASE, 1, self._lock_key(key), token)
+                    await self.client.delete(self._progress_key(key))
+                except redis.RedisError as e:
+                    print(f"Error releasing single-flight lock for {key}: {e}")
+
+    async def _renew(self, key: str, token: str):
+        while True:
+            await asyncio.sleep(self.lease_secs / 3)
+            try:
+                if not await self.client.eval(_RENEW, 1, self._lock_key(key), token, int(self.lease_secs * 1000)):
+                    print(f"Lost single-flight lease for {key}; another worker may run it again")
+                    return
+            except redis.RedisError as e:
+                print(f"Error renewing single-flight lease for {key}: {e}")
+
+    async def _follow(self, key: str, flight: _Flight, poll, deadline: float) -> Optional[Any]:
+        """Wait for the leader in another worker; None if its lock went away without a result."""
+        loop = asyncio.get_running_loop()
+        while loop.time() < deadline:
+            result = await poll()
+            if result is not None:
+                return result
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                pipe.get(self._progress_key(key))
+                pipe.exists(self._lock_key(key))
+                status, locked = await pipe.execute()
+            except redis.RedisError as e:
+                print(f"Error polling single-flight state for {key}: {e}")
+                status, locked = None, True
+            if status is not None:
+                status = status.decode("utf-8") if isinstance(status, bytes) else status
+                if status != flight.status:
+                    await self._broadcast(flight, status, include_owner=True)
+            if not locked:
+                # 리더가 결과 없이 끝났거나 종료됨: 마지막으로 결과를 확인한 뒤 리더 자리를 시도
+                return await poll()
+            await asyncio.sleep(self.poll_interval_secs)
+        raise TimeoutError(f"Timed out waiting for the analysis of {key} in another worker")
+
+    async def _broadcast(self, flight: _Flight, status: str, include_owner: bool = False):
+        flight.status = status
+        callbacks = ([flight.on_progress] if include_owner and flight.on_progress else []) + flight.followers
+        for callback in callbacks:
+            await self._notify(callback, status)
+
+    async def _notify(self, callback: ProgressCallback, status: str):
+        try:
+            await callback(status)
+        except Exception as e:
+            print(f"Error reporting single-flight progress: {e}")
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {**self.stats, "in_flight": len(self._flights)}
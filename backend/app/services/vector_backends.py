@@ -0,0 +1,475 @@
+import asyncio
+import json
+import math
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+from postgrest.types import CountMethod, ReturnMethod
+from supabase import Client
+
+from app.config import settings
+from app.services.ann_index import IVFIndex, load_quantizer, normalize_rows, save_quantizer, top_k, train_quantizer
+
+
+def ivfflat_lists(row_count: int) -> int:
+    """pgvector guidance for ivfflat `lists`: rows / 1000 up to 1M rows, sqrt(rows) beyond."""
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return int(math.sqrt(row_count))
+
+
+class VectorBackend:
+    """Storage and similarity search for embedded document chunks."""
+
+    name = "base"
+
+    async def upsert_rows(self, rows: List[Dict[str, Any]]):
+        """Insert or replace rows keyed by (repo_name, commit_hash, chunk_index)."""
+        raise NotImplementedError
+
+    async def search(self, query_embedding: List[float], repo_name: str, limit: int, threshold: float,
+                     commit_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return up to `limit` rows of the repo (only of `commit_hash` if given) with cosine similarity >= threshold, best first."""
+        raise NotImplementedError
+
+    async def search_many(self, query_embeddings: List[List[float]], repo_name: str, limit: int, threshold: float,
+                          commit_hash: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+        """`search` for several queries at once; one result list per query."""
+        return [await self.search(query_embedding, repo_name, limit, threshold, commit_hash) for query_embedding in query_embeddings]
+
+    async def delete(self, repo_name: str, commit_hash: str) -> int:
+        """Delete all rows of a repo/commit and return how many were removed."""
+        raise NotImplementedError
+
+    async def delete_superseded(self, repo_name: str, keep_commit: str, before: float) -> int:
+        """Delete rows of the repo's other commits written before `before` (epoch seconds); return how many were removed."""
+        raise NotImplementedError
+
+    async def fetch_rows(self, repo_name: str, commit_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        """All rows of a repo (or of one commit) without embeddings (used to build the lexical index)."""
+        raise NotImplementedError
+
+    async def row_count(self) -> Optional[int]:
+        """Rows in the shared ANN index, or None if the backend has no such index to size."""
+        return None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class SupabaseVectorBackend(VectorBackend):
+    """pgvector table `github_documents` queried through the `match_documents` RPC."""
+
+    name = "supabase"
+
+    ROW_COLUMNS = "id, repo_name, commit_hash, chunk_index, content, metadata"
+
+    def __init__(self, client: Client, upsert_batch_size: int = 500, page_size: int = 1000):
+        self.client = client
+        self.upsert_batch_size = upsert_batch_size
+        self.page_size = page_size
+
+    async def upsert_rows(self, rows: List[Dict[str, Any]]):
+        # 블로킹 클라이언트 호출은 이벤트 루프 밖에서 실행
+        for start in range(0, len(rows), self.upsert_batch_size):
+            batch = rows[start:start + self.upsert_batch_size]
+            result = await asyncio.to_thread(
+                self.client.table("github_documents")
+                .upsert(batch, on_conflict="repo_name,commit_hash,chunk_index")
+                .execute
+            )
+            if not result.data:
+                raise Exception(f"Failed to store chunks {start}-{start + len(batch) - 1}")
+
+    async def search(self, query_embedding: List[float], repo_name: str, limit: int, threshold: float,
+                     commit_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._search_blocking, query_embedding, repo_name, limit, threshold, commit_hash)
+
+    async def search_many(self, query_embeddings: List[List[float]], repo_name: str, limit: int, threshold: float,
+                          commit_hash: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+        # RPC는 질의 하나씩이므로 스레드에서 동시에 호출
+        return list(await asyncio.gather(*(
+            asyncio.to_thread(self._search_blocking, query_embedding, repo_name, limit, threshold, commit_hash)
+            for query_embedding in query_embeddings
+        )))
+
+    def _search_blocking(self, query_embedding: List[float], repo_name: str, limit: int, threshold: float,
+                         commit_hash: Optional[str]) -> List[Dict[str, Any]]:
+        params = {
+            'query_embedding': query_embedding,
+            'match_threshold': threshold,
+            'match_count': limit,
+            'p_repo_name': repo_name
+        }
+        if commit_hash:
+            params['p_commit_hash'] = commit_hash
+        return self.client.rpc('match_documents', params).execute().data or []
+
+    async def delete(self, repo_name: str, commit_hash: str) -> int:
+        result = await asyncio.to_thread(
+            self.client.table("github_documents")
+            .delete()
+            .eq("repo_name", repo_name)
+            .eq("commit_hash", commit_hash)
+            .execute
+        )
+        return len(result.data) if result.data else 0
+
+    async def delete_superseded(self, repo_name: str, keep_commit: str, before: float) -> int:
+        # 삭제된 행(임베딩 포함)을 돌려받지 않고 개수만 받는다
+        result = await asyncio.to_thread(
+            self.client.table("github_documents")
+            .delete(count=CountMethod.exact, returning=ReturnMethod.minimal)
+            .eq("repo_name", repo_name)
+            .neq("commit_hash", keep_commit)
+            .lt("created_at", datetime.fromtimestamp(before, timezone.utc).isoformat())
+            .execute
+        )
+        return result.count or 0
+
+    async def fetch_rows(self, repo_name: str, commit_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = []
+        while True:
+            query = self.client.table("github_documents").select(self.ROW_COLUMNS).eq("repo_name", repo_name)
+            if commit_hash:
+                query = query.eq("commit_hash", commit_hash)
+            result = await asyncio.to_thread(
+                query
+                .order("id")
+                .range(len(rows), len(rows) + self.page_size - 1)
+                .execute
+            )
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                return rows
+
+    async def row_count(self) -> Optional[int]:
+        result = await asyncio.to_thread(
+            self.client.table("github_documents")
+            .select("id", count=CountMethod.exact, head=True)
+            .execute
+        )
+        return result.count
+
+
+class _Partition:
+    """Rows of one repo/commit: metadata and quantized codes in memory, full vectors memory-mapped."""
+
+    def __init__(self, commit_hash: str, rows: List[Dict[str, Any]], vectors: np.ndarray, index: IVFIndex,
+                 quantizer=None, codes: Optional[np.ndarray] = None):
+        self.commit_hash = commit_hash
+        self.rows = rows
+        self.vectors = vectors
+        self.index = index
+        self.quantizer = quantizer
+        self.codes = codes
+
+
+class LocalVectorBackend(VectorBackend):
+    """In-process vector index for single-node deployments; no network hop per query.
+
+    Each repo/commit is a partition directory. Upserts append rows to `pending/` segments; the
+    first search afterwards builds them, together with the previous build, into a new version
+    directory holding `vectors.npy` (L2-normalized float32, opened with mmap), `rows.json`
+    (chunk metadata) and `ivf.npz` (IVF lists, only for partitions with at least
+    `ivf_min_rows` chunks; smaller ones are scanned exhaustively). `CURRENT` names the
+    version in use and is replaced atomically once a build is complete.
+
+    With `quantization` "int8" or "pq" the partition also stores `codes.npy` and
+    `quantizer.npz`. Only the codes are kept in memory and scanned; the full vectors are read
+    from the memmap just to rerank the best `limit * rerank_factor` candidates.
+    """
+
+    name = "local"
+
+    CURRENT = "CURRENT"
+    PENDING = "pending"
+    PARTITION_FILES = ("rows.json", "vectors.npy", "ivf.npz", "codes.npy", "quantizer.npz")
+
+    def __init__(self, index_dir: str, ivf_min_rows: int = 4096, nprobe: int = 8,
+                 quantization: str = "none", pq_sub_dims: int = 4, rerank_factor: int = 8):
+        self.index_dir = index_dir
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self.pq_sub_dims = pq_sub_dims
+        self.rerank_factor = rerank_factor
+        self._lock = threading.RLock()
+        self._repos: Dict[str, List[_Partition]] = {}
+
+    def _repo_dir(self, repo_name: str) -> str:
+        return os.path.join(self.index_dir, quote(repo_name, safe=""))
+
+    def _partition_dir(self, repo_name: str, commit_hash: str) -> str:
+        return os.path.join(self._repo_dir(repo_name), quote(commit_hash, safe=""))
+
+    def _version_dir(self, path: str) -> Optional[str]:
+        """Directory of the partition's current build (partitions written before versioning keep their files at the top)."""
+        try:
+            with open(os.path.join(path, self.CURRENT), "r", encoding="utf-8") as f:
+                return os.path.join(path, f.read().strip())
+        except FileNotFoundError:
+            return path if os.path.exists(os.path.join(path, "rows.json")) else None
+
+    def _load_partition(self, path: str, commit_hash: str) -> Optional[_Partition]:
+        version = self._version_dir(path)
+        if version is None:
+            return None
+        with open(os.path.join(version, "rows.json"), "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        vectors = np.load(os.path.join(version, "vectors.npy"), mmap_mode="r")
+        quantizer = load_quantizer(os.path.join(version, "quantizer.npz"))
+        codes = np.load(os.path.join(version, "codes.npy")) if quantizer is not None else None
+        return _Partition(commit_hash, rows, vectors, IVFIndex.load(os.path.join(version, "ivf.npz")), quantizer, codes)
+
+    def _pending_segments(self, path: str) -> List[str]:
+        """Appended, not yet built segments in write order (a segment is complete once its .json exists)."""
+        pending = os.path.join(path, self.PENDING)
+        if not os.path.isdir(pending):
+            return []
+        return sorted(os.path.join(pending, name[:-len(".json")]) for name in os.listdir(pending) if name.endswith(".json"))
+
+    def _load_repo(self, repo_name: str) -> List[_Partition]:
+        with self._lock:
+            if repo_name in self._repos:
+                return self._repos[repo_name]
+            partitions = []
+            repo_dir = self._repo_dir(repo_name)
+            if os.path.isdir(repo_dir):
+                for entry in sorted(os.listdir(repo_dir)):
+                    # 마지막 빌드 이후 추가된 행이 있으면 첫 조회 때 한 번만 인덱스를 만든다
+                    self._build_partition(os.path.join(repo_dir, entry), entry)
+                    partition = self._load_partition(os.path.join(repo_dir, entry), entry)
+                    if partition is not None:
+                        partitions.append(partition)
+            self._repos[repo_name] = partitions
+            return partitions
+
+    def _append_rows(self, path: str, rows: List[Dict[str, Any]]):
+        """Store rows as a pending segment; O(rows), the index is built lazily by `_build_partition`."""
+        pending = os.path.join(path, self.PENDING)
+        os.makedirs(pending, exist_ok=True)
+        segment = os.path.join(pending, f"{time.time_ns():020d}-{uuid.uuid4().hex}")
+        np.save(f"{segment}.npy", np.asarray([row["embedding"] for row in rows], dtype=np.float32))
+        with open(f"{segment}.tmp", "w", encoding="utf-8") as f:
+            json.dump([{key: value for key, value in row.items() if key != "embedding"} for row in rows], f, ensure_ascii=False)
+        os.replace(f"{segment}.tmp", f"{segment}.json")
+
+    def _build_partition(self, path: str, commit_hash: str):
+        """Merge pending segments into a new build of the partition and switch to it atomically."""
+        segments = self._pending_segments(path)
+        if not segments:
+            return
+        previous = self._version_dir(path)
+        existing = self._load_partition(path, commit_hash)
+        merged: Dict[int, Tuple[Dict[str, Any], np.ndarray]] = {}
+        if existing is not None:
+            for row, vector in zip(existing.rows, existing.vectors):
+                merged[row["chunk_index"]] = (row, np.array(vector))
+        for segment in segments:
+            with open(f"{segment}.json", "r", encoding="utf-8") as f:
+                segment_rows = json.load(f)
+            for row, vector in zip(segment_rows, np.load(f"{segment}.npy")):
+                merged[row["chunk_index"]] = (row, vector)
+
+        ordered = [merged[chunk_index] for chunk_index in sorted(merged)]
+        vectors = normalize_rows(np.stack([vector for _, vector in ordered]))
+
+        # 임시 디렉터리에 모두 쓴 뒤 CURRENT를 교체하므로 리더는 이전 빌드나 새 빌드 중 하나만 본다
+        version = f"v-{uuid.uuid4().hex}"
+        staging = os.path.join(path, f".{version}.tmp")
+        os.makedirs(staging)
+        np.save(os.path.join(staging, "vectors.npy"), vectors)
+        IVFIndex.build(vectors, min_rows=self.ivf_min_rows).save(os.path.join(staging, "ivf.npz"))
+        quantizer = train_quantizer(self.quantization, vectors, pq_sub_dims=self.pq_sub_dims)
+        if quantizer is not None:
+            np.save(os.path.join(staging, "codes.npy"), quantizer.encode(vectors))
+        save_quantizer(quantizer, os.path.join(staging, "quantizer.npz"))
+        with open(os.path.join(staging, "rows.json"), "w", encoding="utf-8") as f:
+            json.dump([row for row, _ in ordered], f, ensure_ascii=False)
+        os.rename(staging, os.path.join(path, version))
+        with open(os.path.join(path, f"{self.CURRENT}.tmp"), "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(os.path.join(path, f"{self.CURRENT}.tmp"), os.path.join(path, self.CURRENT))
+
+        # 이전 빌드를 열어 둔 memmap 리더는 삭제 후에도 기존 파일을 계속 읽는다
+        for segment in segments:
+            for suffix in (".json", ".npy"):
+                try:
+                    os.remove(f"{segment}{suffix}")
+                except FileNotFoundError:
+                    pass
+        if previous == path:
+            for name in self.PARTITION_FILES:
+                try:
+                    os.remove(os.path.join(path, name))
+                except FileNotFoundError:
+                    pass
+        elif previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+
+    def _last_write(self, path: str) -> Optional[float]:
+        """When rows were last written to the partition (None if it holds none)."""
+        marker = os.path.join(path, self.CURRENT)
+        candidates = [marker if os.path.exists(marker) else os.path.join(path, "rows.json")]
+        candidates.extend(f"{segment}.json" for segment in self._pending_segments(path))
+        times = [os.path.getmtime(candidate) for candidate in candidates if os.path.exists(candidate)]
+        return max(times) if times else None
+
+    def _upsert_sync(self, rows: List[Dict[str, Any]]):
+        grouped: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for row in rows:
+            grouped.setdefault((row["repo_name"], row["commit_hash"]), []).append(row)
+        with self._lock:
+            for (repo_name, commit_hash), partition_rows in grouped.items():
+                self._append_rows(self._partition_dir(repo_name, commit_hash), partition_rows)
+                self._repos.pop(repo_name, None)
+
+    async def upsert_rows(self, rows: List[Dict[str, Any]]):
+        if rows:
+            await asyncio.to_thread(self._upsert_sync, rows)
+
+    def _row(self, partition: _Partition, row_id: int) -> Dict[str, Any]:
+        row = partition.rows[row_id]
+        return {"id": f"{partition.commit_hash}:{row['chunk_index']}", **row}
+
+    def _partitions(self, repo_name: str, commit_hash: Optional[str]) -> List[_Partition]:
+        partitions = self._load_repo(repo_name)
+        if commit_hash is None:
+            return partitions
+        return [partition for partition in partitions if partition.commit_hash == quote(commit_hash, safe="")]
+
+    def search_sync(self, query_embedding: List[float], repo_name: str, limit: int, threshold: float,
+                    commit_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = np.asarray(query_embedding, dtype=np.float32)
+        matches = []
+        for partition in self._partitions(repo_name, commit_hash):
+            ids, scores = partition.index.search(
+                partition.vectors, query, limit, self.nprobe,
+                quantizer=partition.quantizer, codes=partition.codes, rerank_factor=self.rerank_factor
+            )
+            for row_id, score in zip(ids, scores):
+                if score >= threshold:
+                    matches.append((float(score), partition, int(row_id)))
+
+        matches.sort(key=lambda match: match[0], reverse=True)
+        results = []
+        for score, partition, row_id in matches[:limit]:
+            results.append({**self._row(partition, row_id), "similarity": score})
+        return results
+
+    def search_many_sync(self, query_embeddings: List[List[float]], repo_name: str, limit: int, threshold: float,
+                         commit_hash: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+        """Exhaustively scanned float32 partitions score all queries with one matrix product."""
+        queries = normalize_rows(np.asarray(query_embeddings, dtype=np.float32))
+        matches: List[List[Tuple[float, _Partition, int]]] = [[] for _ in range(len(queries))]
+        for partition in self._partitions(repo_name, commit_hash):
+            if partition.index.is_flat and partition.quantizer is None:
+                scores = np.asarray(partition.vectors @ queries.T)
+                per_query = [(top_k(scores[:, q], limit), scores[:, q]) for q in range(len(queries))]
+                per_query = [(ids, column[ids]) for ids, column in per_query]
+            else:
+                per_query = [
+                    partition.index.search(partition.vectors, query, limit, self.nprobe, quantizer=partition.quantizer,
+                                           codes=partition.codes, rerank_factor=self.rerank_factor)
+                    for query in queries
+                ]
+            for q, (ids, query_scores) in enumerate(per_query):
+                matches[q].extend((float(score), partition, int(row_id)) for row_id, score in zip(ids, query_scores) if score >= threshold)
+
+        results = []
+        for query_matches in matches:
+            query_matches.sort(key=lambda match: match[0], reverse=True)
+            results.append([{**self._row(partition, row_id), "similarity": score} for score, partition, row_id in query_matches[:limit]])
+        return results
+
+    async def search_many(self, query_embeddings: List[List[float]], repo_name: str, limit: int, threshold: float,
+                          commit_hash: Optional[str] = None) -> List[List[Dict[str, Any]]]:
+        return await asyncio.to_thread(self.search_many_sync, query_embeddings, repo_name, limit, threshold, commit_hash)
+
+    async def search(self, query_embedding: List[float], repo_name: str, limit: int, threshold: float,
+                     commit_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        if repo_name not in self._repos:
+            # 최초 조회 시 디스크에서 파티션을 여는 작업만 스레드에서 수행
+            await asyncio.to_thread(self._load_repo, repo_name)
+        return self.search_sync(query_embedding, repo_name, limit, threshold, commit_hash)
+
+    async def fetch_rows(self, repo_name: str, commit_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        partitions = await asyncio.to_thread(self._partitions, repo_name, commit_hash)
+        return [self._row(partition, row_id) for partition in partitions for row_id in range(len(partition.rows))]
+
+    def _delete_sync(self, repo_name: str, commit_hash: str) -> int:
+        path = self._partition_dir(repo_name, commit_hash)
+        with self._lock:
+            partition = self._load_partition(path, commit_hash)
+            chunk_indices = {row["chunk_index"] for row in partition.rows} if partition is not None else set()
+            for segment in self._pending_segments(path):
+                with open(f"{segment}.json", "r", encoding="utf-8") as f:
+                    chunk_indices.update(row["chunk_index"] for row in json.load(f))
+            if not os.path.isdir(path):
+                return 0
+            shutil.rmtree(path)
+            self._repos.pop(repo_name, None)
+            return len(chunk_indices)
+
+    async def delete(self, repo_name: str, commit_hash: str) -> int:
+        return await asyncio.to_thread(self._delete_sync, repo_name, commit_hash)
+
+    def _delete_superseded_sync(self, repo_name: str, keep_commit: str, before: float) -> int:
+        repo_dir = self._repo_dir(repo_name)
+        if not os.path.isdir(repo_dir):
+            return 0
+        deleted = 0
+        with self._lock:
+            for entry in os.listdir(repo_dir):
+                written_at = self._last_write(os.path.join(repo_dir, entry))
+                # 기준 시각 이후에 쓰인 파티션은 진행 중인 분석일 수 있으므로 남긴다
+                if entry == quote(keep_commit, safe="") or written_at is None or written_at >= before:
+                    continue
+                deleted += self._delete_sync(repo_name, unquote(entry))
+        return deleted
+
+    async def delete_superseded(self, repo_name: str, keep_commit: str, before: float) -> int:
+        return await asyncio.to_thread(self._delete_superseded_sync, repo_name, keep_commit, before)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Resident bytes of the scanned representation vs. full float32 vectors, over loaded partitions."""
+        with self._lock:
+            partitions = [partition for loaded in self._repos.values() for partition in loaded]
+        full_bytes = sum(partition.vectors.size * 4 for partition in partitions)
+        resident_bytes = sum(
+            partition.codes.nbytes if partition.codes is not None else partition.vectors.size * 4
+            for partition in partitions
+        )
+        return {
+            "backend": self.name,
+            "quantization": self.quantization,
+            "partitions": len(partitions),
+            "rows": sum(len(partition.rows) for partition in partitions),
+            "resident_bytes": resident_bytes,
+            "full_precision_bytes": full_bytes,
+        }
+
+
+def create_vector_backend(supabase_client: Client) -> VectorBackend:
+    """Return the backend selected by `settings.VECTOR_BACKEND`."""
+    if settings.VECTOR_BACKEND == "supabase":
+        return SupabaseVectorBackend(supabase_client, upsert_batch_size=settings.VECTOR_UPSERT_BATCH_SIZE)
+    if settings.VECTOR_BACKEND == "local":
+        return LocalVectorBackend(
+            settings.LOCAL_VECTOR_INDEX_DIR,
+            ivf_min_rows=settings.LOCAL_VECTOR_IVF_MIN_ROWS,
+            nprobe=settings.LOCAL_VECTOR_NPROBE,
+            quantization=settings.LOCAL_VECTOR_QUANTIZATION,
+            pq_sub_dims=settings.LOCAL_VECTOR_PQ_SUB_DIMS,
+            rerank_factor=settings.LOCAL_VECTOR_RERANK_FACTOR
+        )
+    raise ValueError(f"Unknown vector backend: {settings.VECTOR_BACKEND}")
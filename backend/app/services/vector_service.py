@@ -1,97 +1,340 @@
 import os
 import asyncio
-from typing import List, Dict, Any
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from supabase import create_client, Client
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from app.config import settings
+from app.services.cache_service import AsyncCacheService
+from app.services.cache_tags import repo_tag
+from app.services.answer_cache import normalize_question
+from app.services.embedding_cache import EmbeddingCache
+from app.services.lexical_index import LexicalRetriever, reciprocal_rank_fusion
+from app.services.markdown_chunker import MarkdownChunker
+from app.services.llm_providers import LLMProvider, get_llm_provider
+from app.services.llm_resilience import llm_resilience
+from app.services.llm_scheduler import llm_scheduler, estimate_tokens, INTERACTIVE, BATCH
+from app.services.vector_backends import VectorBackend, create_vector_backend, ivfflat_lists
 
 class VectorService:
-    def __init__(self):
+    def __init__(self, provider: Optional[LLMProvider] = None, embedding_cache: Optional[EmbeddingCache] = None,
+                 backend: Optional[VectorBackend] = None, cache_service: Optional[AsyncCacheService] = None):
         self.supabase: Client = create_client(
             settings.SUPABASE_URL, 
             settings.SUPABASE_ANON_KEY
         )
-        self.embeddings = OpenAIEmbeddings(
-            api_key=settings.OPENAI_API_KEY,
-            model="text-embedding-3-small"
+        self.backend = backend or create_vector_backend(self.supabase)
+        # 리포지토리별 현재 커밋 포인터 (cache_service가 없으면 프로세스 내에만 보관)
+        self.cache_service = cache_service
+        self._commit_pointers: Dict[str, Dict[str, Any]] = {}
+        self.lexical_retriever = LexicalRetriever(
+            lambda repo_name, commit_hash: self.backend.fetch_rows(repo_name, commit_hash),
+            ttl_secs=settings.LEXICAL_INDEX_TTL_SECS,
+            max_repos=settings.LEXICAL_INDEX_MAX_REPOS,
+            k1=settings.BM25_K1,
+            b=settings.BM25_B
         )
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
+        self.embedding_model = "text-embedding-3-small"
+        self.embedding_dimensions = settings.EMBEDDING_DIMENSIONS
+        self.provider = provider or get_llm_provider()
+        self.embeddings = self.provider.embeddings(self.embedding_model, dimensions=self.embedding_dimensions)
+        # 차원을 줄인 벡터는 전체 차원 벡터와 캐시 키를 공유하지 않는다
+        self.embedding_cache_model = (
+            f"{self.embedding_model}@{self.embedding_dimensions}" if self.embedding_dimensions else self.embedding_model
+        )
+        self.embedding_cache = embedding_cache
+        # 질문 임베딩: 정규화한 질문 기준 프로세스 내 LRU (영구 캐시는 embedding_cache의 별도 네임스페이스)
+        self._query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._query_embeddings_lock = threading.Lock()
+        self.chunker = MarkdownChunker(
+            max_tokens=settings.CHUNK_MAX_TOKENS,
+            min_tokens=settings.CHUNK_MIN_TOKENS
         )
 
-    async def store_document(self, repo_name: str, documentation: str, commit_hash: str):
-        """문서를 청크로 분할하고 Embedding하여 Supabase Vector Store에 저장"""
-        try:
-            # 1. 문서를 청크로 분할
-            chunks = self.text_splitter.split_text(documentation)
-            
-            # 2. 각 청크에 대해 임베딩 생성 및 저장
-            for i, chunk in enumerate(chunks):
-                # 임베딩 생성
-                embedding = await asyncio.to_thread(
-                    self.embeddings.embed_query, chunk
-                )
-                
-                # Supabase에 저장
-                result = self.supabase.table("github_documents").insert({
+    def _embed_query(self, text: str, priority: int):
+        """전역 요청/토큰 예산 안에서 임베딩 생성"""
+        def attempt():
+            llm_scheduler.acquire(self.embedding_model, estimate_tokens(text), priority)
+            return self.embeddings.embed_query(text)
+
+        return llm_resilience.call_with_retries("embedding", attempt)
+
+    def _embed_batch(self, texts: List[str], priority: int) -> List[List[float]]:
+        """전역 예산 안에서 여러 텍스트의 임베딩을 한 번의 호출로 생성"""
+        tokens = sum(estimate_tokens(text) for text in texts)
+
+        def attempt():
+            llm_scheduler.acquire(self.embedding_model, tokens, priority)
+            return self.embeddings.embed_documents(texts)
+
+        return llm_resilience.call_with_retries("embedding", attempt)
+
+    def _embedding_batches(self, texts: List[str]) -> List[List[str]]:
+        """Provider 제한(입력 개수/토큰 수)에 맞게 텍스트를 배치로 분할"""
+        batches, batch, batch_tokens = [], [], 0
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if batch and (len(batch) >= settings.EMBEDDING_BATCH_SIZE or batch_tokens + tokens > settings.EMBEDDING_BATCH_MAX_TOKENS):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _cached_query_embedding(self, text: str) -> Optional[List[float]]:
+        with self._query_embeddings_lock:
+            vector = self._query_embeddings.get(text)
+            if vector is not None:
+                self._query_embeddings.move_to_end(text)
+            return vector
+
+    def _remember_query_embedding(self, text: str, vector: List[float]):
+        with self._query_embeddings_lock:
+            self._query_embeddings[text] = vector
+            while len(self._query_embeddings) > settings.QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_embeddings.popitem(last=False)
+
+    async def embed_query(self, query: str) -> List[float]:
+        """정규화한 질문 텍스트 기준으로 캐시된 질문 임베딩 (없으면 interactive 우선순위로 생성)"""
+        text = normalize_question(query)
+        vector = self._cached_query_embedding(text)
+        if vector is not None:
+            return vector
+
+        cache_model = f"{self.embedding_cache_model}:query"
+        if self.embedding_cache:
+            vector = (await asyncio.to_thread(self.embedding_cache.get_many, cache_model, [text]))[0]
+        if vector is None:
+            # 키만 정규화하고 임베딩은 원문으로 생성 (식별자 대소문자 유지)
+            vector = await asyncio.to_thread(self._embed_query, query.strip(), INTERACTIVE)
+            if self.embedding_cache:
+                await asyncio.to_thread(self.embedding_cache.set_many, cache_model, [text], [vector])
+
+        self._remember_query_embedding(text, vector)
+        return vector
+
+    async def embed_queries(self, queries: List[str], priority: int = INTERACTIVE) -> List[List[float]]:
+        """여러 질문의 임베딩을 캐시 조회 후 한 번의 배치 호출로 생성 (입력 순서 유지)"""
+        texts = [normalize_question(query) for query in queries]
+        vectors: Dict[str, Optional[List[float]]] = {text: self._cached_query_embedding(text) for text in texts}
+
+        cache_model = f"{self.embedding_cache_model}:query"
+        pending = [text for text, vector in vectors.items() if vector is None]
+        if pending and self.embedding_cache:
+            cached = await asyncio.to_thread(self.embedding_cache.get_many, cache_model, pending)
+            vectors.update({text: vector for text, vector in zip(pending, cached) if vector is not None})
+
+        originals: Dict[str, str] = {}
+        for text, query in zip(texts, queries):
+            originals.setdefault(text, query.strip())
+        missing = [text for text, vector in vectors.items() if vector is None]
+        if missing:
+            computed: List[List[float]] = []
+            for batch in self._embedding_batches(missing):
+                computed.extend(await asyncio.to_thread(self._embed_batch, [originals[text] for text in batch], priority))
+            if len(computed) != len(missing):
+                raise Exception(f"Expected {len(missing)} embeddings, got {len(computed)}")
+            vectors.update(zip(missing, computed))
+            if self.embedding_cache:
+                await asyncio.to_thread(self.embedding_cache.set_many, cache_model, missing, computed)
+
+        for text, vector in vectors.items():
+            self._remember_query_embedding(text, vector)
+        return [vectors[text] for text in texts]
+
+    async def embed_documents(self, texts: List[str], priority: int = BATCH) -> List[List[float]]:
+        """임베딩 캐시를 먼저 조회하고, 없는 텍스트만 배치 단위로 제한된 동시성으로 임베딩 (입력 순서 유지)"""
+        cached: List[Optional[List[float]]] = [None] * len(texts)
+        if self.embedding_cache:
+            cached = await asyncio.to_thread(self.embedding_cache.get_many, self.embedding_cache_model, texts)
+
+        # 동일한 청크는 한 번만 임베딩
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        computed: Dict[str, List[float]] = {}
+        if missing:
+            semaphore = asyncio.Semaphore(settings.EMBEDDING_CONCURRENCY)
+
+            async def run(batch: List[str]) -> List[List[float]]:
+                async with semaphore:
+                    return await asyncio.to_thread(self._embed_batch, batch, priority)
+
+            results = await asyncio.gather(*(run(batch) for batch in self._embedding_batches(missing)))
+            vectors = [vector for batch_vectors in results for vector in batch_vectors]
+            if len(vectors) != len(missing):
+                raise Exception(f"Expected {len(missing)} embeddings, got {len(vectors)}")
+            computed = dict(zip(missing, vectors))
+            if self.embedding_cache:
+                await asyncio.to_thread(self.embedding_cache.set_many, self.embedding_cache_model, missing, vectors)
+
+        return [vector if vector is not None else computed[text] for text, vector in zip(texts, cached)]
+
+    async def cached_document_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """저장 시 임베딩 캐시에 들어간 청크 벡터만 조회 (없는 텍스트는 None, 임베딩 API는 호출하지 않음)"""
+        if not self.embedding_cache or not texts:
+            return [None] * len(texts)
+        return await asyncio.to_thread(self.embedding_cache.get_many, self.embedding_cache_model, texts)
+
+    async def _chunk_groups(self, chunks: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> AsyncIterator[List[Tuple[str, Dict[str, Any]]]]:
+        """임베딩 호출 여러 개를 동시에 채울 수 있는 크기로 청크를 묶음"""
+        group_size = settings.EMBEDDING_BATCH_SIZE * settings.EMBEDDING_CONCURRENCY
+        group: List[Tuple[str, Dict[str, Any]]] = []
+        async for chunk in chunks:
+            group.append(chunk)
+            if len(group) >= group_size:
+                yield group
+                group = []
+        if group:
+            yield group
+
+    async def store_chunks(self, repo_name: str, commit_hash: str, chunks: AsyncIterator[Tuple[str, Dict[str, Any]]],
+                           start_index: int = 0) -> int:
+        """(content, metadata) 청크 스트림을 그룹 단위로 임베딩하여 저장하고 저장한 청크 수를 반환"""
+        chunks_stored = 0
+        async for group in self._chunk_groups(chunks):
+            # 청크 임베딩을 배치로 생성 (캐시에 있는 청크는 재임베딩하지 않음)
+            embeddings = await self.embed_documents([content for content, _ in group], BATCH)
+
+            # Vector backend에 bulk upsert
+            await self.backend.upsert_rows([
+                {
                     "repo_name": repo_name,
                     "commit_hash": commit_hash,
-                    "chunk_index": i,
-                    "content": chunk,
+                    "chunk_index": start_index + chunks_stored + i,
+                    "content": content,
                     "embedding": embedding,
-                    "metadata": {
-                        "chunk_size": len(chunk),
-                        "total_chunks": len(chunks)
-                    }
-                }).execute()
-                
-                if not result.data:
-                    raise Exception(f"Failed to store chunk {i}")
-            
-            return {"success": True, "chunks_stored": len(chunks)}
+                    "metadata": metadata
+                }
+                for i, ((content, metadata), embedding) in enumerate(zip(group, embeddings))
+            ])
+            chunks_stored += len(group)
+
+        self.lexical_retriever.invalidate(repo_name)
+        return chunks_stored
+
+    async def store_document(self, repo_name: str, documentation: str, commit_hash: str):
+        """문서를 Markdown 구조에 따라 청크로 분할하고 Embedding하여 Vector Store에 저장"""
+        async def document_chunks():
+            # 청크를 제너레이터로 받아 처리 (전체 청크를 메모리에 모으지 않음)
+            for chunk in self.chunker.iter_chunks(documentation):
+                yield chunk.content, {
+                    "chunk_size": len(chunk.content),
+                    "tokens": chunk.tokens,
+                    "section_path": list(chunk.section_path)
+                }
+
+        try:
+            chunks_stored = await self.store_chunks(repo_name, commit_hash, document_chunks())
+            return {"success": True, "chunks_stored": chunks_stored}
             
         except Exception as e:
             print(f"Error storing document: {e}")
             return {"success": False, "error": str(e)}
 
-    async def search_similar_content(self, query: str, repo_name: str, limit: int = 5) -> List[Dict[str, Any]]:
-        """질문과 유사한 문서 내용을 Vector Store에서 검색"""
+    def _commit_pointer_key(self, repo_name: str) -> str:
+        return f"{repo_name}:current_commit"
+
+    async def set_current_commit(self, repo_name: str, commit_hash: str):
+        """검색 대상을 이 커밋으로 전환 (해당 커밋의 청크 저장이 끝난 뒤 호출)"""
+        pointer = {"commit_hash": commit_hash, "updated_at": time.time()}
+        if self.cache_service:
+            await self.cache_service.set(self._commit_pointer_key(repo_name), pointer, settings.COMMIT_POINTER_TTL,
+                                         tags=[repo_tag(repo_name)])
+        else:
+            self._commit_pointers[repo_name] = pointer
+
+    async def get_current_commit(self, repo_name: str) -> Optional[Dict[str, Any]]:
+        """현재 커밋 포인터 {"commit_hash", "updated_at"} (없으면 None)"""
+        if self.cache_service:
+            return await self.cache_service.get(self._commit_pointer_key(repo_name))
+        return self._commit_pointers.get(repo_name)
+
+    async def clear_current_commit(self, repo_name: str, commit_hash: str):
+        """포인터가 가리키는 커밋이 삭제되면 포인터도 제거 (이후 검색은 리포지토리 전체 대상)"""
+        pointer = await self.get_current_commit(repo_name)
+        if not pointer or pointer.get("commit_hash") != commit_hash:
+            return
+        if self.cache_service:
+            await self.cache_service.delete(self._commit_pointer_key(repo_name))
+        else:
+            self._commit_pointers.pop(repo_name, None)
+
+    async def search_similar_content(self, query: str, repo_name: str, limit: int = 5,
+                                     commit_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        """질문과 유사한 문서 내용을 Vector Store에서 검색 (기본값은 리포지토리의 현재 커밋)"""
         try:
-            # 1. 쿼리에 대한 임베딩 생성
-            query_embedding = await asyncio.to_thread(
-                self.embeddings.embed_query, query
-            )
-            
-            # 2. Supabase에서 RPC를 사용하여 유사도 검색
-            result = self.supabase.rpc('match_documents', {
-                'query_embedding': query_embedding,
-                'match_threshold': 0.7,
-                'match_count': limit,
-                'p_repo_name': repo_name
-            }).execute()
+            # 1. 검색할 커밋 결정 (포인터가 없던 이전 분석은 커밋 구분 없이 검색)
+            if commit_hash is None:
+                pointer = await self.get_current_commit(repo_name)
+                commit_hash = pointer.get("commit_hash") if pointer else None
+
+            # 2. 쿼리에 대한 임베딩 생성 (같은 질문은 캐시된 임베딩 재사용)
+            query_embedding = await self.embed_query(query)
             
-            if result.data:
-                return result.data
-            else:
-                return []
+            # 3. Vector backend에서 유사도 검색
+            vector_results = await self.backend.search(
+                query_embedding, repo_name, limit, settings.VECTOR_MATCH_THRESHOLD, commit_hash=commit_hash
+            )
+
+            # 4. 식별자 질문을 위해 BM25 결과와 융합 (실패 시 벡터 결과만 사용)
+            return await self._hybrid_results(query, vector_results, repo_name, limit, commit_hash)
                 
         except Exception as e:
             print(f"Error searching similar content: {e}")
             return []
 
+    async def search_many(self, queries: List[str], repo_name: str, limit: int = 5,
+                          query_embeddings: Optional[List[List[float]]] = None) -> List[List[Dict[str, Any]]]:
+        """여러 질문을 한 번에 검색 (임베딩 배치 생성, 백엔드 일괄 검색 후 질문별 BM25 융합)"""
+        try:
+            pointer = await self.get_current_commit(repo_name)
+            commit_hash = pointer.get("commit_hash") if pointer else None
+            if query_embeddings is None:
+                query_embeddings = await self.embed_queries(queries)
+
+            vector_results = await self.backend.search_many(
+                query_embeddings, repo_name, limit, settings.VECTOR_MATCH_THRESHOLD, commit_hash=commit_hash
+            )
+            return [
+                await self._hybrid_results(query, results, repo_name, limit, commit_hash)
+                for query, results in zip(queries, vector_results)
+            ]
+
+        except Exception as e:
+            print(f"Error searching similar content: {e}")
+            return [[] for _ in queries]
+
+    async def _hybrid_results(self, query: str, vector_results: List[Dict[str, Any]], repo_name: str, limit: int,
+                              commit_hash: Optional[str]) -> List[Dict[str, Any]]:
+        if settings.HYBRID_SEARCH_ENABLED:
+            try:
+                lexical_results = await self.lexical_retriever.search(query, repo_name, limit, commit_hash)
+                return self._fuse_results(vector_results, lexical_results, limit)
+            except Exception as e:
+                print(f"Error in lexical search, using vector results only: {e}")
+        return vector_results[:limit]
+
+    def _fuse_results(self, vector_results: List[Dict[str, Any]], lexical_results: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        """Reciprocal-rank fusion of vector and BM25 results; the same chunk is identified by its content"""
+        rows: Dict[str, Dict[str, Any]] = {}
+        for row in lexical_results + vector_results:
+            # 벡터 결과(similarity 포함)를 우선하되 BM25 점수는 유지
+            rows[row["content"]] = {**rows.get(row["content"], {}), **row}
+        fused = reciprocal_rank_fusion(
+            [[row["content"] for row in vector_results], [row["content"] for row in lexical_results]],
+            k=settings.RRF_K
+        )
+        return [rows[content] for content, _ in fused[:limit]]
+
     async def delete_repo_documents(self, repo_name: str, commit_hash: str):
         """특정 리포지토리의 문서들을 삭제"""
         try:
-            result = self.supabase.table("github_documents")\
-                .delete()\
-                .eq("repo_name", repo_name)\
-                .eq("commit_hash", commit_hash)\
-                .execute()
-            
-            return {"success": True, "deleted_count": len(result.data) if result.data else 0}
+            deleted_count = await self.backend.delete(repo_name, commit_hash)
+            self.lexical_retriever.invalidate(repo_name)
+            await self.clear_current_commit(repo_name, commit_hash)
+            return {"success": True, "deleted_count": deleted_count}
             
         except Exception as e:
             print(f"Error deleting documents: {e}")
@@ -99,7 +342,8 @@ class VectorService:
 
     def create_documents_table_sql(self) -> str:
         """github_documents 테이블 생성을 위한 SQL 스크립트 반환"""
-        return """
+        dimensions = self.embedding_dimensions or 1536
+        return f"""
         -- github_documents 테이블 생성
         CREATE TABLE IF NOT EXISTS github_documents (
             id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
@@ -107,7 +351,7 @@ class VectorService:
             commit_hash TEXT NOT NULL,
             chunk_index INTEGER NOT NULL,
             content TEXT NOT NULL,
-            embedding VECTOR(1536), -- OpenAI text-embedding-3-small의 차원
+            embedding VECTOR({dimensions}), -- OpenAI text-embedding-3-small의 차원 (EMBEDDING_DIMENSIONS로 축소 가능)
             metadata JSONB,
             created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
             
@@ -115,7 +359,7 @@ class VectorService:
             UNIQUE(repo_name, commit_hash, chunk_index)
         );
 
-        -- Vector 유사도 검색을 위한 인덱스 생성
+        -- Vector 유사도 검색을 위한 인덱스 생성 (lists는 데이터 적재 후 관리자가 rebuild_vector_index_sql()로 행 수에 맞춤)
         CREATE INDEX IF NOT EXISTS github_documents_embedding_idx 
         ON github_documents 
         USING ivfflat (embedding vector_cosine_ops)
@@ -125,6 +369,51 @@ class VectorService:
         CREATE INDEX IF NOT EXISTS github_documents_repo_commit_idx 
         ON github_documents (repo_name, commit_hash);
         
+        -- 유사도 검색 RPC (p_commit_hash가 주어지면 해당 커밋의 청크만 검색)
+        CREATE OR REPLACE FUNCTION match_documents(
+            query_embedding VECTOR({dimensions}),
+            match_threshold FLOAT,
+            match_count INT,
+            p_repo_name TEXT,
+            p_commit_hash TEXT DEFAULT NULL
+        )
+        RETURNS TABLE (
+            id UUID,
+            repo_name TEXT,
+            commit_hash TEXT,
+            chunk_index INTEGER,
+            content TEXT,
+            metadata JSONB,
+            similarity FLOAT
+        )
+        LANGUAGE sql STABLE
+        AS $$
+            SELECT d.id, d.repo_name, d.commit_hash, d.chunk_index, d.content, d.metadata,
+                   1 - (d.embedding <=> query_embedding) AS similarity
+            FROM github_documents d
+            WHERE d.repo_name = p_repo_name
+              AND (p_commit_hash IS NULL OR d.commit_hash = p_commit_hash)
+              AND 1 - (d.embedding <=> query_embedding) > match_threshold
+            ORDER BY d.embedding <=> query_embedding
+            LIMIT match_count;
+        $$;
+
         -- RLS (Row Level Security) 정책 (선택사항)
         ALTER TABLE github_documents ENABLE ROW LEVEL SECURITY;
         """
+
+    def rebuild_vector_index_sql(self, row_count: int) -> str:
+        """현재 행 수에 맞춘 lists로 ivfflat 인덱스를 다시 만드는 SQL 스크립트 반환
+
+        테이블 소유자 권한이 필요한 관리 작업이라 앱에서 실행하지 않는다. 행 수가 크게 바뀐 뒤
+        (예: 대량 GC 이후) 관리자가 SQL 편집기나 마이그레이션으로 실행한다. CONCURRENTLY로 새 인덱스를
+        만든 뒤 교체하므로 재구성 중에도 쓰기가 막히지 않는다 (트랜잭션 블록 밖에서 실행).
+        """
+        return f"""
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS github_documents_embedding_idx_new
+        ON github_documents
+        USING ivfflat (embedding vector_cosine_ops)
+        WITH (lists = {ivfflat_lists(row_count)});
+        DROP INDEX CONCURRENTLY IF EXISTS github_documents_embedding_idx;
+        ALTER INDEX github_documents_embedding_idx_new RENAME TO github_documents_embedding_idx;
+        """
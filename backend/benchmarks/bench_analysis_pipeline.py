@@ -0,0 +1,306 @@
+"""End-to-end throughput benchmark for run_analysis_pipeline without network access.
+
+LLM and embedding calls go through the local stand-in provider; GitHub, Supabase and
+Redis are replaced by in-memory fakes. Run from the backend directory:
+
+    python -m benchmarks.bench_analysis_pipeline --repos 20 --latency-ms 50 --tokens-per-sec 2000
+
+`--duplicates N` submits every repository N times at once, as when several users request
+the same analysis; duplicates attach to the running analysis instead of repeating it.
+
+With `--vector-backend local` chunks go to the in-process index under a temp directory and
+the search latency of that index is reported as well.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import tempfile
+import time
+
+import numpy as np
+
+os.environ["LLM_PROVIDER"] = "local"
+# 임베딩 캐시도 Redis에 연결하지 않도록 끔
+os.environ["EMBEDDING_CACHE_BACKEND"] = "none"
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "benchmark")
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.count = None
+
+
+class FakeQuery:
+    """Minimal stand-in for the postgrest query builder over in-memory tables."""
+
+    def __init__(self, store, table):
+        self.store = store
+        self.table = table
+        self.operation = "select"
+        self.payload = None
+        self.conflict_keys = None
+        self.filters = []
+        self.order_by = None
+        self.bounds = None
+
+    def insert(self, payload, **kwargs):
+        self.operation, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict=None, **kwargs):
+        self.operation, self.payload = "insert", payload
+        self.conflict_keys = on_conflict.split(",") if on_conflict else None
+        return self
+
+    def update(self, payload):
+        self.operation, self.payload = "update", payload
+        return self
+
+    def delete(self, **kwargs):
+        self.operation = "delete"
+        return self
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: column in row and row[column] < value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, **kwargs):
+        self.order_by = column
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    def _matches(self, row):
+        return all(matches(row) for matches in self.filters)
+
+    def execute(self):
+        table = self.store.setdefault(self.table, [])
+        if self.operation == "insert":
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            written = []
+            for row in rows:
+                if self.conflict_keys:
+                    key = [row.get(column) for column in self.conflict_keys]
+                    table[:] = [old for old in table if [old.get(column) for column in self.conflict_keys] != key]
+                written.append(dict(row, id=row.get("id", str(next(self.store["_ids"])))))
+            table.extend(written)
+            return FakeResponse(written)
+        matched = [row for row in table if self._matches(row)]
+        if self.operation == "update":
+            for row in matched:
+                row.update(self.payload)
+        elif self.operation == "delete":
+            table[:] = [row for row in table if not self._matches(row)]
+        else:
+            if self.order_by:
+                matched.sort(key=lambda row: row.get(self.order_by))
+            if self.bounds:
+                matched = matched[self.bounds[0]:self.bounds[1]]
+        response = FakeResponse(matched)
+        response.count = len(matched)
+        return response
+
+
+class FakeMatchDocuments:
+    """`match_documents` RPC over the stored rows (cosine similarity, read-only)."""
+
+    COLUMNS = ("id", "repo_name", "commit_hash", "chunk_index", "content", "metadata")
+
+    def __init__(self, rows, params):
+        self.rows = rows
+        self.params = params
+
+    def execute(self):
+        params = self.params
+        query = np.asarray(params["query_embedding"], dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        matches = []
+        for row in self.rows:
+            if row.get("repo_name") != params["p_repo_name"]:
+                continue
+            if params.get("p_commit_hash") and row.get("commit_hash") != params["p_commit_hash"]:
+                continue
+            vector = np.asarray(row["embedding"], dtype=np.float32)
+            similarity = float(vector @ query / (np.linalg.norm(vector) or 1.0))
+            if similarity > params["match_threshold"]:
+                matches.append({**{column: row.get(column) for column in self.COLUMNS}, "similarity": similarity})
+        matches.sort(key=lambda match: match["similarity"], reverse=True)
+        return FakeResponse(matches[:params["match_count"]])
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.tables = {"_ids": itertools.count()}
+
+    @property
+    def rows(self):
+        return self.tables.get("github_documents", [])
+
+    def table(self, name):
+        return FakeQuery(self.tables, name)
+
+    def rpc(self, name, params):
+        if name != "match_documents":
+            raise NotImplementedError(name)
+        return FakeMatchDocuments(self.rows, params)
+
+
+class FakeGitHub:
+    """Serves a synthetic repository; every repo name gets its own commit."""
+
+    FILES = {
+        "README.md": "# Sample\n\nA sample service used for benchmarking.\n" * 20,
+        "app/main.py": "import os\nfrom app.services import worker\n\nclass App:\n    def run(self):\n        pass\n\ndef main():\n    App().run()\n" * 10,
+        "app/services/worker.py": "import json\n\nclass Worker:\n    def process(self, item):\n        return json.dumps(item)\n" * 10,
+    }
+
+    async def resolve_head(self, repo_name, revalidate=False):
+        return {"name": repo_name.split("/")[-1], "description": "benchmark repo", "main_language": "Python",
+                "topics": [], "default_branch": "main", "commit_hash": f"{repo_name}-head", "cached": False}
+
+    async def get_repository_tree(self, repo_name, commit_hash):
+        return {path: {"size": len(content), "type": self._get_file_type(path), "sha": f"{repo_name}:{path}"}
+                for path, content in self.FILES.items()}
+
+    async def get_repository_structure(self, repo_name):
+        head = await self.resolve_head(repo_name)
+        head.pop("cached")
+        return {**head, "files": await self.get_repository_tree(repo_name, head["commit_hash"])}
+
+    def get_head_metrics(self):
+        return None
+
+    async def get_file_content(self, repo_name, file_path):
+        return self.FILES[file_path]
+
+    def get_priority_files(self, files):
+        return list(files)
+
+    def _get_file_type(self, file_path):
+        return "markdown" if file_path.endswith(".md") else "python"
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    async def set(self, key, value, expiration_secs=3600, tags=None):
+        self.values[key] = value
+        return True
+
+    async def delete(self, key):
+        return self.values.pop(key, None) is not None
+
+    async def delete_multiple(self, keys):
+        return sum([await self.delete(key) for key in keys])
+
+    def get_local_metrics(self):
+        return None
+
+
+async def run_benchmark(repos: int, concurrency: int, duplicates: int = 1):
+    from app import main
+
+    fake_supabase = FakeSupabase()
+    main.supabase = fake_supabase
+    main.vector_service.supabase = fake_supabase
+    if main.vector_service.backend.name == "supabase":
+        main.vector_service.backend.client = fake_supabase
+    main.github_service = FakeGitHub()
+    main.analysis_service.github_service = main.github_service
+    main.cache_service = FakeCache()
+    main.code_index_service.github_service = main.github_service
+    main.code_index_service.cache_service = main.cache_service
+    main.vector_service.cache_service = main.cache_service
+    main.qa_service.cache_service = main.cache_service
+    if main.answer_cache:
+        main.answer_cache.cache_service = main.cache_service
+    main.index_gc.grace_secs = 0
+    main.analysis_flights.client = None
+
+    prewarm = {"answered": 0, "cached": 0, "failed": 0}
+    prewarm_answers = main.qa_service.prewarm_answers
+
+    async def count_prewarm(repo_name, questions):
+        stats = await prewarm_answers(repo_name, questions)
+        for key, value in stats.items():
+            prewarm[key] += value
+        return stats
+
+    main.qa_service.prewarm_answers = count_prewarm
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(index):
+        async with semaphore:
+            started_at = time.perf_counter()
+            await main.run_analysis_pipeline(f"task-{index}", f"https://github.com/bench/repo-{index % repos}")
+            return time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(run_one(i) for i in range(repos * duplicates))))
+    elapsed = time.perf_counter() - started_at
+
+    print(f"repos={repos} duplicates={duplicates} concurrency={concurrency} elapsed={elapsed:.2f}s "
+          f"throughput={repos / elapsed:.2f} repos/s")
+    print(f"analysis_flights={main.analysis_flights.get_metrics()}")
+    print(f"latency p50={latencies[len(latencies) // 2]:.3f}s p95={latencies[int(len(latencies) * 0.95) - 1]:.3f}s")
+    print(f"rows written={len(fake_supabase.rows)}")
+    print(f"prewarmed answers={prewarm}")
+    if main.settings.SUGGESTED_QUESTIONS_PREWARM:
+        assert prewarm["answered"] + prewarm["cached"] > 0, "no suggested answer could be prewarmed"
+    print(f"scheduler={main.llm_scheduler.get_metrics()}")
+
+    if main.vector_service.backend.name == "local":
+        query = await asyncio.to_thread(main.vector_service._embed_query, "How does the worker process items?", 0)
+        await main.vector_service.backend.search(query, "bench/repo-0", 5, 0.0)
+        started_at = time.perf_counter()
+        for i in range(1000):
+            await main.vector_service.backend.search(query, f"bench/repo-{i % repos}", 5, 0.0)
+        print(f"local vector search avg={(time.perf_counter() - started_at):.3f}ms over 1000 queries")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repos", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duplicates", type=int, default=1, help="concurrent requests per repository")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0)
+    parser.add_argument("--vector-backend", choices=["supabase", "local"], default="supabase")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    os.environ["LOCAL_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["LOCAL_LLM_TOKENS_PER_SEC"] = str(args.tokens_per_sec)
+    os.environ["VECTOR_BACKEND"] = args.vector_backend
+    os.environ["LOCAL_VECTOR_INDEX_DIR"] = tempfile.mkdtemp(prefix="bench-vector-index-")
+    asyncio.run(run_benchmark(args.repos, args.concurrency, args.duplicates))
@@ -0,0 +1,105 @@
+"""Size and encode/decode time of the cache codecs on analysis results.
+
+By default the payload is built from this repository itself: its Markdown files stand in
+for the generated documentation and the architecture comes from AnalysisService run on
+the backend sources, the same shape as the `{repo}:{commit}` cache entries. Exported task
+results (JSON files) can be passed with --payload. With --redis the set/get round trip
+and Redis memory usage are measured against a live server as well. Run from the backend
+directory:
+
+    python -m benchmarks.bench_cache_codecs --repeat 50
+"""
+import argparse
+import glob
+import json
+import os
+import time
+import uuid
+
+from app.services.analysis_service import AnalysisService
+from app.services.cache_codecs import available_codecs, decode_value
+from app.services.github_service import GitHubService
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+LANGUAGES = {".py": "python", ".ts": "typescript", ".tsx": "typescript", ".js": "javascript"}
+
+
+def repository_payload() -> dict:
+    documentation = "\n\n".join(
+        open(path, encoding="utf-8", errors="replace").read()
+        for path in sorted(glob.glob(os.path.join(REPO_ROOT, "**", "*.md"), recursive=True))
+        if "node_modules" not in path
+    )
+    analysis_service = AnalysisService(GitHubService(""))
+    file_analysis = {}
+    for pattern in ("backend/app/**/*.py", "frontend/src/**/*.ts*"):
+        for path in sorted(glob.glob(os.path.join(REPO_ROOT, pattern), recursive=True)):
+            content = open(path, encoding="utf-8", errors="replace").read()
+            file_analysis[os.path.relpath(path, REPO_ROOT)] = analysis_service.analyze_code(content, LANGUAGES[os.path.splitext(path)[1]])
+    repo_info = {"name": "local_deepwiki", "description": "", "main_language": "Python"}
+    return {
+        "result": documentation,
+        "architecture": analysis_service.analyze_project_architecture(file_analysis, repo_info),
+        "file_analysis": file_analysis,
+    }
+
+
+def timed(function, repeat: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started_at) * 1000 / repeat
+
+
+def redis_round_trip(client, raw, repeat: int):
+    key = f"bench:codec:{uuid.uuid4().hex}"
+    try:
+        set_ms = timed(lambda: client.set(key, raw, ex=60), repeat)
+        get_ms = timed(lambda: decode_value(client.get(key)), repeat)
+        memory = client.memory_usage(key)
+    finally:
+        client.delete(key)
+    return set_ms, get_ms, memory
+
+
+def run(payloads, repeat: int, level: int, redis_client=None):
+    codecs = available_codecs(level)
+    print(f"codecs={', '.join(codecs)} repeat={repeat}")
+    header = f"{'payload':>24} {'codec':>13} {'bytes':>10} {'ratio':>6} {'enc ms':>8} {'dec ms':>8}"
+    if redis_client is not None:
+        header += f" {'set ms':>8} {'get ms':>8} {'redis B':>10}"
+    print(header)
+    for label, payload in payloads:
+        baseline = len(codecs["json"].dumps(payload).encode("utf-8"))
+        for name, codec in codecs.items():
+            raw = codec.dumps(payload)
+            raw_bytes = raw.encode("utf-8") if isinstance(raw, str) else raw
+            encode_ms = timed(lambda: codec.dumps(payload), repeat)
+            decode_ms = timed(lambda: decode_value(raw_bytes), repeat)
+            line = (f"{label[-24:]:>24} {name:>13} {len(raw_bytes):>10} {baseline / len(raw_bytes):>6.1f} "
+                    f"{encode_ms:>8.3f} {decode_ms:>8.3f}")
+            if redis_client is not None:
+                set_ms, get_ms, memory = redis_round_trip(redis_client, raw_bytes, repeat)
+                line += f" {set_ms:>8.3f} {get_ms:>8.3f} {memory:>10}"
+            print(line)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payload", nargs="*", default=[], help="JSON files with cached analysis results")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--level", type=int, default=3, help="zstd compression level")
+    parser.add_argument("--redis", action="store_true", help="also measure against REDIS_HOST:REDIS_PORT")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    payloads = [(path, json.load(open(path, encoding="utf-8"))) for path in args.payload] or [("repository", repository_payload())]
+    redis_client = None
+    if args.redis:
+        import redis
+
+        from app.config import settings
+        redis_client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+    run(payloads, args.repeat, args.level, redis_client)
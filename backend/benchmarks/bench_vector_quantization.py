@@ -0,0 +1,70 @@
+"""Memory and recall@k of the local vector index storage modes.
+
+Compares float32, int8 and product-quantized storage (with full-precision rerank) on
+synthetic clustered embeddings, optionally truncated to fewer dimensions the way
+text-embedding-3 shortened vectors are. Recall is measured against exact search at the
+same dimensionality; how much truncation itself costs depends on the embedding model and
+has to be measured on real vectors. Run from the backend directory:
+
+    python -m benchmarks.bench_vector_quantization --rows 20000 --dimensions 1536 512 256
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.ann_index import IVFIndex, normalize_rows, train_quantizer
+
+
+def synthetic_embeddings(rows: int, dimensions: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimensions))
+    return normalize_rows(centers[rng.integers(clusters, size=rows)] + rng.normal(scale=0.6, size=(rows, dimensions)))
+
+
+def recall_at_k(index: IVFIndex, vectors: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int, **kwargs) -> float:
+    found = 0
+    for query, expected in zip(queries, truth):
+        ids, _ = index.search(vectors, query, k, **kwargs)
+        found += len(set(ids.tolist()) & set(expected.tolist()))
+    return found / truth.size
+
+
+def run(rows: int, queries: int, k: int, dimension_options, nprobe: int, rerank_factor: int):
+    full = synthetic_embeddings(rows + queries, max(dimension_options), clusters=max(8, rows // 200))
+    corpus, query_vectors = full[:rows], full[rows:]
+
+    print(f"rows={rows} queries={queries} k={k}")
+    print(f"{'dims':>5} {'mode':>5} {'bytes/vec':>10} {'x smaller':>10} {f'recall@{k}':>10} {'avg ms':>8}")
+    for dimensions in dimension_options:
+        vectors = normalize_rows(corpus[:, :dimensions])
+        queries_truncated = normalize_rows(query_vectors[:, :dimensions])
+        truth = np.stack([np.argsort(-(vectors @ query))[:k] for query in queries_truncated])
+        index = IVFIndex.build(vectors, nlist=max(1, int(np.sqrt(rows))))
+        for mode in ("none", "int8", "pq"):
+            quantizer = train_quantizer(mode, vectors)
+            codes = quantizer.encode(vectors) if quantizer is not None else None
+            bytes_per_vector = (codes.nbytes if codes is not None else vectors.nbytes) / rows
+
+            started_at = time.perf_counter()
+            recall = recall_at_k(index, vectors, queries_truncated, truth, k, nprobe=nprobe,
+                                 quantizer=quantizer, codes=codes, rerank_factor=rerank_factor)
+            elapsed_ms = (time.perf_counter() - started_at) * 1000 / queries
+            print(f"{dimensions:>5} {mode:>5} {bytes_per_vector:>10.0f} {full.shape[1] * 4 / bytes_per_vector:>10.1f} "
+                  f"{recall:>10.3f} {elapsed_ms:>8.3f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[1536, 512])
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--rerank-factor", type=int, default=8)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run(args.rows, args.queries, args.k, args.dimensions, args.nprobe, args.rerank_factor)
@@ -0,0 +1,57 @@
+import pytest
+
+from app.services.answer_cache import AnswerCache, normalize_question
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    async def set(self, key, value, expiration_secs=3600, tags=None):
+        self.values[key] = value
+        return True
+
+
+def test_normalize_question():
+    assert normalize_question("  What does   this project DO?? ") == "what does this project do"
+    assert normalize_question("설치 방법은？") == "설치 방법은"
+
+
+@pytest.mark.asyncio
+async def test_exact_hit_is_scoped_to_commit():
+    cache = AnswerCache(FakeCache())
+    await cache.set("owner/repo", "abc", "How do I install it?", {"success": True, "answer": "pip install"})
+
+    hit = await cache.get("owner/repo", "abc", "how do i install it")
+
+    assert hit == {"success": True, "answer": "pip install", "cached": "exact"}
+    assert await cache.get("owner/repo", "def", "How do I install it?") is None
+    assert cache.get_metrics()["exact_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_semantic_hit_above_threshold():
+    cache = AnswerCache(FakeCache(), semantic_threshold=0.95)
+    await cache.set("owner/repo", "abc", "How do I install it?", {"answer": "pip install"}, query_embedding=[1.0, 0.0, 0.0])
+
+    near = await cache.get("owner/repo", "abc", "Installation steps", query_embedding=[0.99, 0.05, 0.0])
+    far = await cache.get("owner/repo", "abc", "What is the license", query_embedding=[0.0, 1.0, 0.0])
+
+    assert near["cached"] == "semantic"
+    assert far is None
+
+
+@pytest.mark.asyncio
+async def test_get_many_returns_exact_hits_in_order():
+    cache = AnswerCache(FakeCache())
+    await cache.set("owner/repo", "abc", "How do I install it?", {"success": True, "answer": "pip install"})
+
+    hits = await cache.get_many("owner/repo", "abc", ["Unknown?", "how do i install it"])
+
+    assert hits == [None, {"success": True, "answer": "pip install", "cached": "exact"}]
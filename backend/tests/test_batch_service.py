@@ -0,0 +1,144 @@
+import json
+import pytest
+
+from app.services.batch_service import (
+    BatchBackend,
+    BatchDocumentationService,
+    LocalBatchBackend,
+    build_batch_input,
+    parse_batch_output,
+)
+from app.services.documentation_sections import SECTION_KEYS, build_input_hashes
+from app.services.llm_providers import LocalProvider
+from app.services.llm_service import LLMService
+
+
+def _job(job_id, previous_sections=None):
+    repo_info = {"name": job_id, "description": "desc", "main_language": "Python"}
+    file_analysis = {"main.py": {"classes": [{"name": "App", "line": 1}]}}
+    return {
+        "id": job_id,
+        "repo_info": repo_info,
+        "readme_content": f"# {job_id}",
+        "file_analysis": file_analysis,
+        "input_hashes": build_input_hashes(f"{job_id}-readme", file_analysis, repo_info),
+        "previous_sections": previous_sections,
+    }
+
+
+class RecordingBackend(LocalBatchBackend):
+    def __init__(self, provider):
+        super().__init__(provider)
+        self.submitted = []
+
+    async def submit(self, requests):
+        self.submitted.append([request["custom_id"] for request in requests])
+        return await super().submit(requests)
+
+
+@pytest.fixture
+def llm_service():
+    return LLMService("fake_key", provider=LocalProvider())
+
+
+@pytest.mark.asyncio
+async def test_generate_runs_two_batch_stages(llm_service):
+    backend = RecordingBackend(llm_service.provider)
+    service = BatchDocumentationService(llm_service, backend, poll_interval_secs=0.01)
+
+    completed, failed = await service.generate([_job("task-1"), _job("task-2")])
+
+    assert failed == {}
+    assert set(completed) == {"task-1", "task-2"}
+    assert all(completed["task-1"][key]["regenerated"] for key in SECTION_KEYS)
+    # Stage 1: summary + structure per repo, stage 2: five sections per repo
+    assert [len(batch) for batch in backend.submitted] == [4, 10]
+    assert "task-1:summary" in backend.submitted[0]
+
+
+@pytest.mark.asyncio
+async def test_generate_reuses_unchanged_sections(llm_service):
+    backend = RecordingBackend(llm_service.provider)
+    service = BatchDocumentationService(llm_service, backend, poll_interval_secs=0.01)
+    first, _ = await service.generate([_job("task-1")])
+
+    completed, failed = await service.generate([_job("task-1", previous_sections=first["task-1"])])
+
+    assert failed == {}
+    assert len(backend.submitted) == 2  # nothing submitted the second time
+    assert not any(section["regenerated"] for section in completed["task-1"].values())
+    assert completed["task-1"]["overview"]["content"] == first["task-1"]["overview"]["content"]
+
+
+class EmptyBackend(BatchBackend):
+    async def submit(self, requests):
+        return "batch-1"
+
+    async def poll(self, batch_id):
+        return "completed"
+
+    async def results(self, batch_id):
+        return {}
+
+
+@pytest.mark.asyncio
+async def test_generate_reports_jobs_with_missing_results(llm_service):
+    service = BatchDocumentationService(llm_service, EmptyBackend(), poll_interval_secs=0.01)
+    completed, failed = await service.generate([_job("task-1")])
+
+    assert completed == {}
+    assert "task-1" in failed
+
+
+class DroppingBackend(RecordingBackend):
+    """Loses the stage-1 result of one job."""
+    async def results(self, batch_id):
+        return {key: value for key, value in (await super().results(batch_id)).items() if key != "task-2:summary"}
+
+
+@pytest.mark.asyncio
+async def test_jobs_missing_stage_one_results_skip_stage_two(llm_service):
+    backend = DroppingBackend(llm_service.provider)
+    service = BatchDocumentationService(llm_service, backend, poll_interval_secs=0.01)
+
+    completed, failed = await service.generate([_job("task-1"), _job("task-2")])
+
+    assert set(completed) == {"task-1"}
+    assert failed == {"task-2": "Batch results missing for: task-2:summary"}
+    assert not any(custom_id.startswith("task-2:") for custom_id in backend.submitted[1])
+
+
+class StuckBackend(EmptyBackend):
+    def __init__(self):
+        self.cancelled = []
+
+    async def poll(self, batch_id):
+        return "in_progress"
+
+    async def cancel(self, batch_id):
+        self.cancelled.append(batch_id)
+
+
+@pytest.mark.asyncio
+async def test_batches_past_max_wait_are_cancelled(llm_service):
+    backend = StuckBackend()
+    service = BatchDocumentationService(llm_service, backend, poll_interval_secs=0.01, max_wait_secs=0.05)
+
+    completed, failed = await service.generate([_job("task-1")])
+
+    assert completed == {}
+    assert "task-1" in failed
+    assert backend.cancelled == ["batch-1"]
+
+
+def test_batch_input_and_output_format():
+    payload = build_batch_input([{"custom_id": "t:summary", "model": "gpt-4o-mini", "prompt": "Summarize"}])
+    line = json.loads(payload.decode("utf-8"))
+    assert line["url"] == "/v1/chat/completions"
+    assert line["body"]["messages"][0]["content"] == "Summarize"
+
+    output = "\n".join([
+        json.dumps({"custom_id": "t:summary", "response": {"status_code": 200, "body": {"choices": [{"message": {"content": "ok"}}]}}, "error": None}),
+        json.dumps({"custom_id": "t:structure", "response": {"status_code": 500, "body": {}}, "error": None}),
+    ])
+    assert parse_batch_output(output) == {"t:summary": "ok"}
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from app.services import cache_codecs
+from app.services.cache_codecs import MAGIC, available_codecs, create_codec, decode_value
+
+VALUE = {"result": "# Docs\n" + "설명 " * 200, "architecture": {"nodes": [{"id": "a", "size": 3}]}, "ok": True, "none": None}
+
+
+@pytest.mark.parametrize("name", [name for name in available_codecs() if name != "json"])
+def test_codec_round_trip_with_header(name):
+    codec = available_codecs()[name]
+    raw = codec.dumps(VALUE)
+
+    assert raw.startswith(MAGIC) and raw[len(MAGIC)] == cache_codecs.FORMAT_VERSION
+    assert len(raw) < len(json.dumps(VALUE))
+    value, size = decode_value(raw)
+    assert value == VALUE
+    assert size > len(raw)
+
+
+def test_legacy_json_is_still_readable():
+    assert decode_value(json.dumps(VALUE))[0] == VALUE
+    assert decode_value(json.dumps(VALUE).encode("utf-8"))[0] == VALUE
+
+
+def test_unknown_version_and_corrupt_payload_raise_value_error():
+    with pytest.raises(ValueError):
+        decode_value(MAGIC + bytes([99, 1]) + b"payload")
+    with pytest.raises(ValueError):
+        decode_value(MAGIC + bytes([cache_codecs.FORMAT_VERSION, 1]) + b"not zlib")
+
+
+def test_create_codec_falls_back_without_msgpack(monkeypatch):
+    monkeypatch.setattr(cache_codecs, "MSGPACK_AVAILABLE", False)
+    assert create_codec("msgpack+zstd").name in ("json+zstd", "json+zlib")
+    with pytest.raises(ValueError):
+        create_codec("brotli")
@@ -1,39 +1,247 @@
 import pytest
-from unittest.mock import MagicMock
-from app.services.cache_service import CacheService
+import fnmatch
+import json
+import redis
+from app.services.cache_service import AsyncCacheService
+from app.services.local_cache import LocalCache
+
+class FakeRedis:
+    """Backing store of FakeAsyncRedis: values with their expiration, sets, SCAN and published messages."""
+    def __init__(self):
+        self.values = {}
+        self.expirations = {}
+        self.sets = {}
+        self.published = []
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+        self.expirations[key] = ex
+
+    def delete(self, *keys):
+        return sum(
+            (self.values.pop(key, None) is not None) + (self.sets.pop(key, None) is not None) for key in keys
+        )
+
+    def pttl(self, key):
+        return 30_000 if key in self.values else -2
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def rename(self, source, destination):
+        if source not in self.sets:
+            raise redis.ResponseError("no such key")
+        self.sets[destination] = self.sets.pop(source)
+
+    def sscan_iter(self, key, count=None):
+        return iter(sorted(self.sets.get(key, ())))
+
+    def scan_iter(self, match="*", count=None):
+        return iter([key.encode() for key in sorted(self.values) if fnmatch.fnmatch(key, match)])
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+class FakeAsyncRedis:
+    """redis.asyncio stand-in: values, pipelined mget/pttl/set and a count of round trips."""
+    def __init__(self):
+        self.sync = FakeRedis()
+        self.round_trips = 0
+
+    async def set(self, key, value, ex=None):
+        self.round_trips += 1
+        self.sync.set(key, value, ex)
+
+    async def delete(self, *keys):
+        self.round_trips += 1
+        return self.sync.delete(*keys)
+
+    async def publish(self, channel, message):
+        self.sync.publish(channel, message)
+
+    async def rename(self, source, destination):
+        self.sync.rename(source, destination)
+
+    async def sscan_iter(self, key, count=None):
+        for member in self.sync.sscan_iter(key):
+            yield member
+
+    async def scan_iter(self, match="*", count=None):
+        for key in self.sync.scan_iter(match):
+            yield key
+
+    def pipeline(self, transaction=True):
+        redis_client = self
+
+        class Pipeline:
+            def __init__(self):
+                self.calls = []
+
+            def mget(self, keys):
+                self.calls.append(lambda: [redis_client.sync.values.get(key) for key in keys])
+
+            def pttl(self, key):
+                self.calls.append(lambda: redis_client.sync.pttl(key))
+
+            def set(self, key, value, ex=None):
+                self.calls.append(lambda: redis_client.sync.set(key, value, ex))
+
+            def sadd(self, key, *members):
+                self.calls.append(lambda: redis_client.sync.sadd(key, *members))
+
+            def expire(self, key, seconds, nx=False, gt=False):
+                pass
+
+            async def execute(self):
+                redis_client.round_trips += 1
+                return [call() for call in self.calls]
+
+        return Pipeline()
 
-@pytest.fixture
-def mock_redis_client():
-    return MagicMock()
 
 @pytest.fixture
-def cache_service(mock_redis_client):
-    service = CacheService(host="localhost", port=6379, db=0)
-    service.client = mock_redis_client  # Inject the mock client
+def async_cache():
+    service = AsyncCacheService(host="localhost", port=6379, db=0, local_cache=LocalCache(max_bytes=1024, ttl_secs=60))
+    service.client = FakeAsyncRedis()
+    service._subscribed.set()  # as if the invalidation listener were connected
     return service
 
-def test_set_and_get_cache(cache_service, mock_redis_client):
-    key = "test_key"
-    value = {"data": "test_value"}
-    expiration_secs = 60
-
-    cache_service.set(key, value, expiration_secs)
-    mock_redis_client.set.assert_called_once_with(key, '{"data": "test_value"}', ex=expiration_secs)
-
-    mock_redis_client.get.return_value = '{"data": "test_value"}'
-    retrieved_value = cache_service.get(key)
-    mock_redis_client.get.assert_called_once_with(key)
-    assert retrieved_value == value
-
-def test_get_non_existent_key(cache_service, mock_redis_client):
-    key = "non_existent_key"
-    mock_redis_client.get.return_value = None
-    retrieved_value = cache_service.get(key)
-    assert retrieved_value is None
-
-def test_set_with_default_expiration(cache_service, mock_redis_client):
-    key = "default_exp_key"
-    value = {"data": "default_exp_value"}
-    
-    cache_service.set(key, value)
-    mock_redis_client.set.assert_called_once_with(key, '{"data": "default_exp_value"}', ex=3600)
+@pytest.mark.asyncio
+async def test_set_and_get_cache():
+    service = AsyncCacheService(host="localhost", port=6379, db=0)
+    service.client = FakeAsyncRedis()
+
+    await service.set("test_key", {"data": "test_value"}, 60)
+
+    assert service.client.sync.values["test_key"] == '{"data": "test_value"}'
+    assert service.client.sync.expirations["test_key"] == 60
+    assert await service.get("test_key") == {"data": "test_value"}
+
+@pytest.mark.asyncio
+async def test_get_non_existent_key(async_cache):
+    assert await async_cache.get("non_existent_key") is None
+
+@pytest.mark.asyncio
+async def test_set_with_default_expiration(async_cache):
+    await async_cache.set("default_exp_key", {"data": "default_exp_value"})
+    assert async_cache.client.sync.expirations["default_exp_key"] == 3600
+
+@pytest.mark.asyncio
+async def test_local_tier_serves_hot_keys_without_redis(async_cache):
+    await async_cache.set("repo:abc", {"result": "docs"})
+    round_trips = async_cache.client.round_trips
+
+    assert await async_cache.get("repo:abc") == {"result": "docs"}
+    assert await async_cache.get("repo:abc") == {"result": "docs"}
+    assert async_cache.client.round_trips == round_trips + 1
+    assert async_cache.get_local_metrics()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_local_tier_and_publish(async_cache):
+    await async_cache.set("repo:abc", {"result": "old"})
+    await async_cache.get("repo:abc")
+
+    await async_cache.set("repo:abc", {"result": "new"})
+
+    assert await async_cache.get("repo:abc") == {"result": "new"}
+    channel, message = async_cache.client.sync.published[-1]
+    assert channel == "cache:invalidate"
+    assert json.loads(message) == {"origin": async_cache.instance_id, "keys": ["repo:abc"]}
+
+@pytest.mark.asyncio
+async def test_invalidation_from_other_worker_drops_local_copy(async_cache):
+    await async_cache.set("repo:abc", {"result": "old"})
+    await async_cache.get("repo:abc")
+    async_cache.client.sync.values["repo:abc"] = '{"result": "new"}'  # written by another worker
+
+    async_cache._on_invalidation(json.dumps({"origin": "other-worker", "keys": ["repo:abc"]}))
+
+    assert await async_cache.get("repo:abc") == {"result": "new"}
+
+@pytest.mark.asyncio
+async def test_local_tier_unused_while_not_subscribed(async_cache):
+    async_cache._subscribed.clear()
+    async_cache.client.sync.values["repo:abc"] = '{"result": "docs"}'
+
+    await async_cache.get("repo:abc")
+    await async_cache.get("repo:abc")
+
+    assert async_cache.client.round_trips == 2
+
+@pytest.mark.asyncio
+async def test_compressed_codec_round_trip_and_legacy_values():
+    from app.services.cache_codecs import JsonZlibCodec, MAGIC
+    service = AsyncCacheService(host="localhost", port=6379, db=0, codec=JsonZlibCodec())
+    service.client = FakeAsyncRedis()
+
+    await service.set("repo:abc", {"result": "docs " * 100})
+    service.client.sync.values["repo:old"] = b'{"result": "legacy"}'
+
+    assert service.client.sync.values["repo:abc"].startswith(MAGIC)
+    assert await service.get("repo:abc") == {"result": "docs " * 100}
+    assert await service.get("repo:old") == {"result": "legacy"}
+
+@pytest.mark.asyncio
+async def test_async_mset_and_mget_use_one_round_trip_each(async_cache):
+    await async_cache.mset({"repo:a": {"n": 1}, "repo:b": {"n": 2}}, expiration_secs=60)
+    assert async_cache.client.round_trips == 1
+
+    assert await async_cache.mget(["repo:a", "repo:missing", "repo:b"]) == [{"n": 1}, None, {"n": 2}]
+    assert async_cache.client.round_trips == 2
+
+@pytest.mark.asyncio
+async def test_async_mget_skips_keys_in_local_tier(async_cache):
+    async_cache.client.sync.values["repo:a"] = b'{"n": 1}'
+    await async_cache.get("repo:a")
+    round_trips = async_cache.client.round_trips
+
+    assert await async_cache.mget(["repo:a"]) == [{"n": 1}]
+    assert async_cache.client.round_trips == round_trips
+
+@pytest.mark.asyncio
+async def test_async_delete_multiple_invalidates_local_tier(async_cache):
+    await async_cache.mset({"repo:a": {"n": 1}, "repo:b": {"n": 2}})
+    await async_cache.mget(["repo:a", "repo:b"])
+
+    assert await async_cache.delete_multiple(["repo:a", "repo:b"]) == 2
+    assert await async_cache.mget(["repo:a", "repo:b"]) == [None, None]
+    assert json.loads(async_cache.client.sync.published[-1][1])["keys"] == ["repo:a", "repo:b"]
+
+@pytest.mark.asyncio
+async def test_clear_repo_cache_uses_tag_index_and_scan_fallback(async_cache):
+    await async_cache.set("owner/repo:abc", {"result": "docs"}, tags=["repo:owner/repo"])
+    await async_cache.set("qa_answer:v1:owner/repo:abc:q", {"answer": "a"}, tags=["repo:owner/repo"])
+    await async_cache.set("other/repo:abc", {"result": "other"}, tags=["repo:other/repo"])
+    async_cache.client.sync.values["owner/repo:sections"] = b'{"sections": {}}'  # untagged, written before the index
+    await async_cache.get("owner/repo:abc")
+
+    assert await async_cache.clear_repo_cache("owner/repo") == 3
+    assert set(async_cache.client.sync.values) == {"other/repo:abc"}
+    assert "cache:tag:repo:owner/repo" not in async_cache.client.sync.sets
+    assert await async_cache.get("owner/repo:abc") is None
+
+@pytest.mark.asyncio
+async def test_invalidate_missing_tag_is_noop(async_cache):
+    assert await async_cache.invalidate_tag("repo:unknown") == 0
+
+@pytest.mark.asyncio
+async def test_async_invalidate_tag_deletes_tagged_keys(async_cache):
+    await async_cache.mset({"repo:a": {"n": 1}, "repo:b": {"n": 2}}, tags=["code_symbols"])
+    await async_cache.set("repo:c", {"n": 3})
+
+    assert await async_cache.invalidate_tag("code_symbols") == 2
+    assert await async_cache.mget(["repo:a", "repo:b", "repo:c"]) == [None, None, {"n": 3}]
+
+@pytest.mark.asyncio
+async def test_async_invalidate_prefix_scans_untagged_namespace(async_cache):
+    from app.services.answer_cache import AnswerCache
+    answers = AnswerCache(async_cache)
+    await answers.set("owner/repo", "abc", "How to install?", {"success": True, "answer": "pip"})
+    await answers.set("other/repo", "def", "How to test?", {"success": True, "answer": "pytest"})
+    await async_cache.set("owner/repo:abc", {"result": "docs"})
+
+    # 리포지토리 태그만 남고 네임스페이스 전체를 담는 태그 집합은 만들지 않음
+    assert set(async_cache.client.sync.sets) == {"cache:tag:repo:owner/repo", "cache:tag:repo:other/repo"}
+    assert await answers.invalidate_all() == 2
+    assert set(async_cache.client.sync.values) == {"owner/repo:abc"}
@@ -0,0 +1,118 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.code_index_service import CODE_CHUNK_INDEX_OFFSET, CodeIndexService
+
+SOURCE = '''import os
+
+
+class Store:
+    """Keeps items."""
+
+    def add(self, item):
+        return item
+
+
+def load(path):
+    """Read a file."""
+    return open(path).read()
+'''
+
+ANALYSIS = {
+    "imports": ["import os"],
+    "classes": [{"name": "Store", "line": 4, "start_line": 4, "end_line": 8}],
+    "functions": [
+        {"name": "add", "line": 7, "start_line": 7, "end_line": 8},
+        {"name": "load", "line": 11, "start_line": 11, "end_line": 13},
+    ],
+}
+
+
+@pytest.fixture
+def service():
+    analysis_service = MagicMock()
+    analysis_service.analyze_code.return_value = ANALYSIS
+    github_service = MagicMock()
+    github_service.get_file_content = AsyncMock(return_value=SOURCE)
+    cache = {}
+    cache_service = MagicMock()
+    cache_service.get = AsyncMock(side_effect=cache.get)
+    cache_service.mget = AsyncMock(side_effect=lambda keys: [cache.get(key) for key in keys])
+    cache_service.set = AsyncMock(side_effect=lambda key, value, ttl, tags=None: cache.__setitem__(key, value))
+    return CodeIndexService(github_service, analysis_service, MagicMock(), cache_service, max_tokens=512)
+
+
+def test_extract_symbols_keeps_small_class_whole(service):
+    symbols = service.extract_symbols(SOURCE, "python")
+
+    assert [(s["kind"], s["symbol"], s["start_line"], s["end_line"]) for s in symbols] == [
+        ("class", "Store", 4, 8),
+        ("function", "load", 11, 13),
+    ]
+    assert '"""Keeps items."""' in symbols[0]["code"]
+    assert "def add" in symbols[0]["code"]
+
+
+def test_extract_symbols_splits_large_class_into_methods(service):
+    service.max_tokens = 12
+    symbols = service.extract_symbols(SOURCE, "python")
+
+    assert [(s["kind"], s["symbol"]) for s in symbols][:2] == [("class", "Store"), ("method", "Store.add")]
+    assert all("def add" not in s["code"] for s in symbols if s["kind"] == "class")
+
+
+def test_extract_symbols_skips_functions_nested_in_functions(service):
+    source = "def outer():\n    def inner():\n        return 1\n    return inner()\n"
+    service.analysis_service.analyze_code.return_value = {"classes": [], "functions": [
+        {"name": "outer", "line": 1, "start_line": 1, "end_line": 4},
+        {"name": "inner", "line": 2, "start_line": 2, "end_line": 3},
+    ]}
+
+    symbols = service.extract_symbols(source, "python")
+
+    assert [(s["kind"], s["symbol"], s["start_line"], s["end_line"]) for s in symbols] == [("function", "outer", 1, 4)]
+
+
+def test_select_files_filters_languages_and_size(service):
+    files = {
+        "b.py": {"type": "python", "size": 10, "sha": "1"},
+        "a.ts": {"type": "typescript", "size": 10, "sha": "2"},
+        "big.py": {"type": "python", "size": 10 ** 7, "sha": "3"},
+        "README.md": {"type": "markdown", "size": 10, "sha": "4"},
+        "nosha.py": {"type": "python", "size": 10},
+    }
+    assert [path for path, _ in service.select_files(files)] == ["a.ts", "b.py"]
+
+
+@pytest.mark.asyncio
+async def test_unchanged_blobs_are_not_fetched_again(service):
+    info = {"type": "python", "size": 100, "sha": "blob-1"}
+
+    first, first_cached = await service.file_symbols("owner/repo", "store.py", info)
+    second, second_cached = await service.file_symbols("owner/repo", "renamed.py", info)
+
+    assert first == second
+    assert (first_cached, second_cached) == (False, True)
+    service.github_service.get_file_content.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_index_repository_streams_chunks_after_doc_chunks(service):
+    stored = []
+
+    async def store_chunks(repo_name, commit_hash, chunks, start_index=0):
+        async for chunk in chunks:
+            stored.append(chunk)
+        return len(stored)
+
+    service.vector_service.store_chunks = AsyncMock(side_effect=store_chunks)
+    files = {"pkg/store.py": {"type": "python", "size": 100, "sha": "blob-1"}}
+
+    result = await service.index_repository("owner/repo", "abc", files)
+
+    assert result == {"success": True, "files": 1, "files_from_cache": 0, "files_parsed": 1, "files_failed": 0, "chunks_stored": 2}
+    assert service.vector_service.store_chunks.call_args.kwargs["start_index"] == CODE_CHUNK_INDEX_OFFSET
+    content, metadata = stored[1]
+    assert content.startswith("pkg/store.py:11-13 function load\n```python\n")
+    assert metadata["source"] == "code"
+    assert metadata["blob_sha"] == "blob-1"
@@ -0,0 +1,50 @@
+import numpy as np
+
+from app.services.context_assembler import ContextAssembler, merge_overlap, mmr_order
+
+
+def row(chunk_index, content, commit_hash="abc"):
+    return {"chunk_index": chunk_index, "commit_hash": commit_hash, "content": content, "metadata": {"section_path": ["Setup"]}}
+
+
+def test_merge_overlap_removes_repeated_span():
+    first = "Install the package with pip. Then configure the Redis host"
+    second = "configure the Redis host and port in .env before starting."
+
+    assert merge_overlap(first, second) == "Install the package with pip. Then configure the Redis host and port in .env before starting."
+    assert merge_overlap("Alpha section.", "Beta section.") == "Alpha section.\n\nBeta section."
+
+
+def test_mmr_prefers_diverse_rows():
+    query = np.array([1.0, 1.0, 0.0])
+    vectors = np.array([[1.0, 0.9, 0.0], [1.0, 0.92, 0.0], [0.6, 0.6, 0.5]])
+
+    assert mmr_order(query, vectors, lambda_=0.3) == [1, 2, 0]
+    assert mmr_order(query, vectors, lambda_=1.0)[:2] == [1, 0]
+
+
+def test_assemble_merges_adjacent_chunks_and_drops_duplicates():
+    rows = [
+        row(3, "Set REDIS_HOST and REDIS_PORT in the environment file"),
+        row(7, "Unrelated deployment notes"),
+        row(4, "in the environment file, then run uvicorn app.main:app"),
+        row(3, "Set REDIS_HOST and REDIS_PORT in the environment file"),
+        row(4, "Other commit chunk", commit_hash="old"),
+    ]
+
+    passages = ContextAssembler(max_tokens=1000).assemble(rows)
+
+    assert [passage["content"] for passage in passages] == [
+        "Set REDIS_HOST and REDIS_PORT in the environment file, then run uvicorn app.main:app",
+        "Unrelated deployment notes",
+        "Other commit chunk",
+    ]
+    assert [chunk["chunk_index"] for chunk in passages[0]["chunks"]] == [3, 4]
+
+
+def test_assemble_respects_token_budget():
+    rows = [row(i * 2, f"chunk {i} " + "x" * 392) for i in range(5)]
+
+    passages = ContextAssembler(max_tokens=250).assemble(rows)
+
+    assert len(passages) == 2
@@ -0,0 +1,61 @@
+import pytest
+
+from app.services.conversation_store import ConversationStore
+from app.services.llm_scheduler import estimate_tokens
+
+
+class FakeCache:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, expiration_secs=3600, tags=None):
+        self.values[key] = value
+        return True
+
+    async def delete(self, key):
+        return self.values.pop(key, None) is not None
+
+
+@pytest.mark.asyncio
+async def test_session_round_trip_and_repo_scope():
+    store = ConversationStore(FakeCache())
+    session = await store.load("s1", "owner/repo")
+    store.add_turn(session, "What is it?", "A wiki generator.")
+    await store.save("s1", session)
+
+    assert (await store.load("s1", "owner/repo"))["turns"] == [{"question": "What is it?", "answer": "A wiki generator."}]
+    # 다른 리포지토리에서 같은 세션 ID를 쓰면 새 대화
+    assert (await store.load("s1", "other/repo"))["turns"] == []
+    assert await store.clear("s1")
+    assert (await store.load("s1", "owner/repo"))["turns"] == []
+
+
+@pytest.mark.asyncio
+async def test_old_turns_are_summarized_within_budget():
+    store = ConversationStore(FakeCache(), max_turns=2, summary_max_tokens=40)
+    session = await store.load("s1", "owner/repo")
+    for i in range(10):
+        store.add_turn(session, f"Question {i}?", f"Answer {i} first sentence. " + "detail " * 100)
+
+    assert [turn["question"] for turn in session["turns"]] == ["Question 8?", "Question 9?"]
+    assert all(len(turn["answer"]) <= store.max_answer_chars + 3 for turn in session["turns"])
+    assert session["summary"][-1] == "- Q: Question 7? / A: Answer 7 first sentence."
+    assert estimate_tokens("\n".join(session["summary"])) <= 40
+    history = store.history(session)
+    assert history.startswith("이전 대화 요약:") and "질문: Question 9?" in history
+
+
+@pytest.mark.asyncio
+async def test_context_reused_only_for_same_topic_and_commit():
+    store = ConversationStore(FakeCache(), topic_threshold=0.8)
+    session = await store.load("s1", "owner/repo")
+    rows = [{"content": "doc", "metadata": {}, "chunk_index": 0, "commit_hash": "abc", "similarity": 0.9}]
+    store.remember_context(session, "abc", [1.0, 0.0], rows)
+
+    assert store.reusable_context(session, "abc", [0.95, 0.1]) == [{"content": "doc", "metadata": {}, "chunk_index": 0, "commit_hash": "abc"}]
+    assert store.reusable_context(session, "abc", [0.0, 1.0]) is None
+    assert store.reusable_context(session, "def", [1.0, 0.0]) is None
+    assert store.get_metrics()["context_reused"] == 1
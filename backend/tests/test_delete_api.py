@@ -146,12 +146,13 @@ class TestDeleteAPI:
             mock_supabase.table.return_value.delete.return_value.eq.return_value.execute.return_value = mock_delete_response
             
             mock_vector_service.delete_repo_documents = AsyncMock(return_value={"success": True})
+            mock_cache_service.delete_multiple = AsyncMock(return_value=1)
             
             response = client.delete("/api/analyses/task1")
             
             assert response.status_code == 200
             # Verify cache deletion was attempted
-            mock_cache_service.client.delete.assert_called_with("test/repo:abc123")
+            mock_cache_service.delete_multiple.assert_awaited_once_with(["test/repo:abc123"])
 
     @patch('app.main.supabase')
     def test_database_error_handling(self, mock_supabase):
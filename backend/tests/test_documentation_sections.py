@@ -0,0 +1,54 @@
+from app.services.documentation_sections import (
+    DOCUMENTATION_SECTIONS,
+    SECTION_KEYS,
+    assemble_documentation,
+    build_input_hashes,
+    find_stale_sections,
+    section_input_hashes,
+    without_line_spans,
+)
+
+REPO_INFO = {"name": "repo", "description": "desc", "main_language": "Python"}
+FILE_ANALYSIS = {"app/main.py": {"imports": ["import os"], "classes": [], "functions": []}}
+
+
+def _sections_for(input_hashes):
+    return {
+        section["key"]: {"content": f"## {section['title']}", "input_hashes": section_input_hashes(section, input_hashes)}
+        for section in DOCUMENTATION_SECTIONS
+    }
+
+
+def test_all_sections_stale_without_previous():
+    hashes = build_input_hashes("sha1", FILE_ANALYSIS, REPO_INFO)
+    assert find_stale_sections(None, hashes) == SECTION_KEYS
+
+
+def test_no_sections_stale_when_inputs_unchanged():
+    hashes = build_input_hashes("sha1", FILE_ANALYSIS, REPO_INFO)
+    assert find_stale_sections(_sections_for(hashes), hashes) == []
+
+
+def test_file_change_only_marks_file_dependent_sections():
+    old_hashes = build_input_hashes("sha1", FILE_ANALYSIS, REPO_INFO)
+    changed_analysis = {"app/main.py": {"imports": [], "classes": [{"name": "App", "line": 1}], "functions": []}}
+    new_hashes = build_input_hashes("sha1", changed_analysis, REPO_INFO)
+
+    assert find_stale_sections(_sections_for(old_hashes), new_hashes) == ["architecture", "concepts", "api"]
+
+
+def test_shifted_line_spans_do_not_mark_sections_stale():
+    analysis = {"app/main.py": {"imports": [], "classes": [{"name": "App", "line": 1, "start_line": 1, "end_line": 9}], "functions": []}}
+    shifted = {"app/main.py": {"imports": [], "classes": [{"name": "App", "line": 1, "start_line": 1, "end_line": 12}], "functions": []}}
+    old_hashes = build_input_hashes("sha1", analysis, REPO_INFO)
+
+    assert find_stale_sections(_sections_for(old_hashes), build_input_hashes("sha1", shifted, REPO_INFO)) == []
+    assert without_line_spans(shifted) == {"app/main.py": {"imports": [], "classes": [{"name": "App", "line": 1}], "functions": []}}
+
+
+def test_assemble_documentation_keeps_section_order():
+    sections = {
+        "api": {"content": "## API Reference"},
+        "overview": {"content": "## Overview"},
+    }
+    assert assemble_documentation(sections) == "## Overview\n\n## API Reference"
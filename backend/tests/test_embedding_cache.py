@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from app.services.embedding_cache import DiskEmbeddingStore, EmbeddingCache, RedisEmbeddingStore
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    return EmbeddingCache(DiskEmbeddingStore(str(tmp_path / "embeddings")), dtype="float16")
+
+
+def test_roundtrip_and_hit_rate(disk_cache):
+    vector = np.linspace(-1, 1, 16).tolist()
+    assert disk_cache.get_many("model", ["chunk"]) == [None]
+
+    disk_cache.set_many("model", ["chunk"], [vector])
+    cached = disk_cache.get_many("model", ["chunk", "other"])
+
+    assert cached[1] is None
+    assert np.allclose(cached[0], vector, atol=1e-3)
+    metrics = disk_cache.get_metrics()
+    assert metrics["hits"] == 1
+    assert metrics["misses"] == 2
+    assert metrics["hit_rate"] == pytest.approx(1 / 3, abs=1e-3)
+
+
+def test_keys_depend_on_model_and_dtype(disk_cache):
+    assert disk_cache.key("model-a", "text") != disk_cache.key("model-b", "text")
+    float32_cache = EmbeddingCache(MagicMock(), dtype="float32")
+    assert disk_cache.key("model-a", "text") != float32_cache.key("model-a", "text")
+
+
+def test_float32_storage_is_exact():
+    store = MagicMock()
+    cache = EmbeddingCache(RedisEmbeddingStore(store), dtype="float32", ttl_secs=60)
+    vector = [0.123456789, -0.5, 0.25]
+
+    cache.set_many("model", ["chunk"], [vector])
+    pipeline = store.pipeline.return_value
+    key, payload = pipeline.set.call_args.args
+    assert pipeline.set.call_args.kwargs == {"ex": 60}
+    assert len(payload) == 3 * 4
+
+    # 모델 단위 네임스페이스는 태그 집합 없이 접두사로 무효화
+    pipeline.sadd.assert_not_called()
+
+    store.mget.return_value = [payload]
+    assert cache.get_many("model", ["chunk"])[0] == pytest.approx(np.float32(vector).tolist())
+    store.mget.assert_called_once_with([key])
+
+
+def test_store_errors_count_as_misses():
+    store = MagicMock()
+    store.get_many.side_effect = ConnectionError("redis down")
+    cache = EmbeddingCache(store)
+
+    assert cache.get_many("model", ["a", "b"]) == [None, None]
+    assert cache.get_metrics()["errors"] == 1
+
+
+def test_invalidate_model_drops_only_its_vectors(disk_cache):
+    disk_cache.set_many("model-a", ["x", "y"], [[1.0, 0.0], [0.0, 1.0]])
+    disk_cache.set_many("model-b", ["x"], [[1.0, 0.0]])
+
+    assert disk_cache.invalidate_model("model-a") == 2
+    assert disk_cache.get_many("model-a", ["x", "y"]) == [None, None]
+    assert disk_cache.get_many("model-b", ["x"])[0] is not None
+
+
+def test_redis_invalidate_model_scans_its_prefix():
+    client = MagicMock()
+    client.scan_iter.return_value = iter([b"emb:model:float16:a", b"emb:model:float16:b"])
+    client.delete.return_value = 2
+    cache = EmbeddingCache(RedisEmbeddingStore(client))
+
+    assert cache.invalidate_model("model") == 2
+    assert client.scan_iter.call_args.kwargs["match"] == "emb:model:float16:*"
+    client.delete.assert_called_once_with("emb:model:float16:a", "emb:model:float16:b")
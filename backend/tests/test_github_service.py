@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
 from app.services.github_service import GitHubService
@@ -57,3 +58,57 @@ async def test_get_repository_structure(MockAsyncClient):
     
     # Verify method calls
     assert mock_client_instance.get.call_count == 3
+
+
+def head(sha):
+    return {"name": "repo", "description": None, "main_language": "Python", "topics": [],
+            "default_branch": "main", "commit_hash": sha}
+
+
+@pytest.mark.asyncio
+async def test_resolve_head_reuses_fresh_head():
+    service = GitHubService(github_token="fake_token", head_ttl_secs=60)
+    service.get_repository_head = AsyncMock(return_value=head("abc"))
+
+    first = await service.resolve_head("owner/repo")
+    second = await service.resolve_head("owner/repo")
+
+    assert (first["commit_hash"], first["cached"]) == ("abc", False)
+    assert (second["commit_hash"], second["cached"]) == ("abc", True)
+    service.get_repository_head.assert_awaited_once_with("owner/repo")
+
+
+@pytest.mark.asyncio
+async def test_resolve_head_serves_stale_head_while_revalidating():
+    service = GitHubService(github_token="fake_token", head_ttl_secs=0, head_stale_secs=600)
+    service.get_repository_head = AsyncMock(side_effect=[head("old"), head("new")])
+    await service.resolve_head("owner/repo")
+
+    stale = await service.resolve_head("owner/repo")
+    await service._head_fetches["owner/repo"]
+
+    assert (stale["commit_hash"], stale["cached"]) == ("old", True)
+    assert service._heads["owner/repo"]["head"]["commit_hash"] == "new"
+    assert service.get_head_metrics()["stale_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_resolve_head_shares_concurrent_fetches():
+    service = GitHubService(github_token="fake_token")
+    service.get_repository_head = AsyncMock(return_value=head("abc"))
+
+    heads = await asyncio.gather(*(service.resolve_head("owner/repo") for _ in range(5)))
+
+    assert {h["commit_hash"] for h in heads} == {"abc"}
+    service.get_repository_head.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_resolve_head_revalidate_waits_for_github():
+    service = GitHubService(github_token="fake_token", head_ttl_secs=60)
+    service.get_repository_head = AsyncMock(side_effect=[head("old"), head("new")])
+    await service.resolve_head("owner/repo")
+
+    fresh = await service.resolve_head("owner/repo", revalidate=True)
+
+    assert (fresh["commit_hash"], fresh["cached"]) == ("new", False)
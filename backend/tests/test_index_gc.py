@@ -0,0 +1,62 @@
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.index_gc import IndexGarbageCollector
+
+
+@pytest.fixture
+def vector_service():
+    service = MagicMock()
+    service.backend.delete_superseded = AsyncMock(return_value=3)
+    service.backend.row_count = AsyncMock(return_value=250_000)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_collect_deletes_superseded_commits(vector_service):
+    pointer = {"commit_hash": "new", "updated_at": time.time() - 10}
+    vector_service.get_current_commit = AsyncMock(return_value=pointer)
+
+    result = await IndexGarbageCollector(vector_service, grace_secs=0).collect("owner/repo")
+
+    assert result == {"success": True, "current_commit": "new", "deleted_count": 3, "suggested_index_lists": 250}
+    vector_service.backend.delete_superseded.assert_awaited_once_with("owner/repo", "new", pointer["updated_at"])
+    vector_service.lexical_retriever.invalidate.assert_called_once_with("owner/repo")
+
+
+@pytest.mark.asyncio
+async def test_collect_waits_for_grace_period_of_latest_pointer(vector_service, monkeypatch):
+    now = time.time()
+    pointers = [{"commit_hash": "b", "updated_at": now}, {"commit_hash": "c", "updated_at": now - 100}]
+    vector_service.get_current_commit = AsyncMock(side_effect=pointers)
+    sleep = AsyncMock()
+    monkeypatch.setattr("app.services.index_gc.asyncio.sleep", sleep)
+
+    result = await IndexGarbageCollector(vector_service, grace_secs=60).collect("owner/repo")
+
+    sleep.assert_awaited_once()
+    assert result["current_commit"] == "c"
+
+
+@pytest.mark.asyncio
+async def test_collect_without_pointer_or_deletions(vector_service):
+    vector_service.get_current_commit = AsyncMock(return_value=None)
+    assert await IndexGarbageCollector(vector_service).collect("owner/repo") == {"success": True, "deleted_count": 0}
+
+    vector_service.get_current_commit = AsyncMock(return_value={"commit_hash": "a", "updated_at": 0})
+    vector_service.backend.delete_superseded = AsyncMock(return_value=0)
+    result = await IndexGarbageCollector(vector_service, grace_secs=0).collect("owner/repo")
+    assert result["deleted_count"] == 0
+    vector_service.lexical_retriever.invalidate.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_collect_skips_lists_suggestion_without_shared_index(vector_service):
+    vector_service.get_current_commit = AsyncMock(return_value={"commit_hash": "a", "updated_at": 0})
+    vector_service.backend.row_count = AsyncMock(return_value=None)
+
+    result = await IndexGarbageCollector(vector_service, grace_secs=0).collect("owner/repo")
+
+    assert result == {"success": True, "current_commit": "a", "deleted_count": 3}
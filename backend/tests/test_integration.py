@@ -9,9 +9,9 @@ class TestIntegration:
     def client(self):
         # Mock all external services and main app dependencies
         with patch('app.services.vector_service.create_client'), \
-             patch('app.services.vector_service.OpenAIEmbeddings'), \
+             patch('app.services.llm_providers.OpenAIEmbeddings'), \
              patch('app.services.github_service.httpx.AsyncClient'), \
-             patch('app.services.llm_service.ChatOpenAI'), \
+             patch('app.services.llm_providers.ChatOpenAI'), \
              patch('app.main.supabase') as mock_supabase:
             
             # Setup default Supabase responses
@@ -0,0 +1,44 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services.lexical_index import BM25Index, LexicalRetriever, code_tokenize, reciprocal_rank_fusion
+
+
+def test_code_tokenize_splits_identifiers():
+    assert code_tokenize("getUserName") == ["getusername", "get", "user", "name"]
+    assert code_tokenize("parse_HTTPResponse v2") == ["parse_httpresponse", "parse", "http", "response", "v2", "v", "2"]
+    assert code_tokenize("문서 생성") == ["문서", "생성"]
+
+
+def test_bm25_prefers_exact_identifier():
+    index = BM25Index([
+        "The service stores documents in the vector store.",
+        "def store_document(self, repo_name): chunks the documentation",
+        "QAService answers questions about a repository",
+    ])
+
+    results = index.search("Where is store_document defined?", k=3)
+
+    assert results[0][0] == 1
+    assert all(score > 0 for _, score in results)
+    assert index.search("unrelated words", k=3) == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert [key for key, _ in fused] == ["a", "c", "b"]
+
+
+@pytest.mark.asyncio
+async def test_retriever_caches_until_invalidated():
+    fetch_rows = AsyncMock(return_value=[{"content": "class VectorService"}, {"content": "class QAService"}])
+    retriever = LexicalRetriever(fetch_rows, ttl_secs=60)
+
+    first = await retriever.search("QAService", "owner/repo", 5)
+    await retriever.search("VectorService", "owner/repo", 5)
+    retriever.invalidate("owner/repo")
+    await retriever.search("VectorService", "owner/repo", 5)
+
+    assert first[0]["content"] == "class QAService"
+    assert "bm25_score" in first[0]
+    assert fetch_rows.await_count == 2
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+from langchain_core.prompts import PromptTemplate
+
+from app.services.llm_providers import LocalProvider, LocalEmbeddings, OpenAIProvider, get_llm_provider
+
+
+def test_local_chat_model_is_deterministic_and_chainable():
+    llm = LocalProvider().chat_model("gpt-4o-mini", temperature=0.3)
+    chain = PromptTemplate.from_template("Summarize {project}") | llm
+
+    first = chain.invoke({"project": "deepwiki"})
+    second = chain.invoke({"project": "deepwiki"})
+    other = chain.invoke({"project": "something else"})
+
+    assert first.content == second.content
+    assert first.content != other.content
+    assert first.usage_metadata["total_tokens"] > 0
+
+
+@pytest.mark.asyncio
+async def test_local_chat_model_async_matches_sync():
+    llm = LocalProvider().chat_model("gpt-3.5-turbo", temperature=0.1)
+    sync_response = llm.invoke("What does this project do?")
+    async_response = await llm.ainvoke("What does this project do?")
+    assert sync_response.content == async_response.content
+
+
+@pytest.mark.asyncio
+async def test_local_chat_model_streams_same_answer_with_usage():
+    model = LocalProvider().chat_model("gpt-3.5-turbo", temperature=0.1)
+
+    chunks = [chunk async for chunk in model.astream("Explain the VectorService")]
+
+    assert len(chunks) > 10
+    assert "".join(chunk.content for chunk in chunks) == model.invoke("Explain the VectorService").content
+    assert [chunk.usage_metadata["output_tokens"] for chunk in chunks if chunk.usage_metadata] == [model.response_tokens]
+
+
+def test_local_embeddings_are_normalized_and_deterministic():
+    embeddings = LocalEmbeddings(dimensions=256)
+    vectors = embeddings.embed_array(["vector service stores chunks", "vector service stores chunks", ""])
+
+    assert vectors.shape == (3, 256)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert np.array_equal(vectors[0], vectors[1])
+    assert embeddings.embed_query("vector service stores chunks") == pytest.approx(vectors[0].tolist())
+
+
+def test_local_embeddings_reflect_shared_vocabulary():
+    embeddings = LocalEmbeddings(dimensions=512)
+    query, related, unrelated = embeddings.embed_array([
+        "how does the cache service store results",
+        "the cache service stores analysis results in redis",
+        "frontend buttons use material ui",
+    ])
+    assert query @ related > query @ unrelated
+
+
+def test_local_provider_embeddings_use_token_rate():
+    embeddings = LocalProvider(latency_ms=5, tokens_per_sec=2000).embeddings("text-embedding-3-small")
+    assert embeddings.latency_ms == 5
+    assert embeddings.tokens_per_sec == 2000
+
+
+def test_get_llm_provider_uses_settings():
+    with patch('app.services.llm_providers.settings') as mock_settings:
+        mock_settings.LLM_PROVIDER = "local"
+        mock_settings.LOCAL_LLM_LATENCY_MS = 5
+        mock_settings.LOCAL_LLM_TOKENS_PER_SEC = 0
+        provider = get_llm_provider()
+        assert isinstance(provider, LocalProvider)
+        assert provider.latency_ms == 5
+
+        mock_settings.LLM_PROVIDER = "openai"
+        assert isinstance(get_llm_provider("key"), OpenAIProvider)
+
+        mock_settings.LLM_PROVIDER = "unknown"
+        with pytest.raises(ValueError):
+            get_llm_provider()
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_resilience import LLMResilience
+from app.services.llm_scheduler import RateLimitTimeout
+
+
+@pytest.fixture
+def resilience():
+    return LLMResilience(max_retries=2, base_delay_secs=0.001, max_delay_secs=0.01, deadline_secs=5,
+                         hedge_default_delay_secs=0.05, hedge_min_samples=5)
+
+
+def test_retries_transient_errors_then_succeeds(resilience):
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert resilience.call_with_retries("doc", flaky) == "ok"
+    assert len(attempts) == 3
+    assert resilience.get_metrics()["doc"]["retries"] == 2
+
+
+def test_gives_up_after_max_retries(resilience):
+    def always_failing():
+        raise TimeoutError("slow")
+
+    with pytest.raises(TimeoutError):
+        resilience.call_with_retries("doc", always_failing)
+    assert resilience.get_metrics()["doc"]["gave_up"] == 1
+
+
+def test_non_transient_errors_are_not_retried(resilience):
+    attempts = []
+
+    def bad_request():
+        attempts.append(1)
+        raise ValueError("invalid")
+
+    with pytest.raises(ValueError):
+        resilience.call_with_retries("doc", bad_request)
+    assert len(attempts) == 1
+
+
+def test_scheduler_timeouts_are_not_retried(resilience):
+    attempts = []
+
+    def over_budget():
+        attempts.append(1)
+        raise RateLimitTimeout("waited too long")
+
+    with pytest.raises(RateLimitTimeout):
+        resilience.call_with_retries("doc", over_budget)
+    assert len(attempts) == 1
+    assert resilience.get_metrics()["doc"]["gave_up"] == 1
+
+
+@pytest.mark.asyncio
+async def test_async_retries_transient_errors_then_succeeds(resilience):
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert await resilience.acall_with_retries("qa", flaky) == "ok"
+    assert resilience.get_metrics()["qa"]["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_async_attempt_is_cancelled_at_the_deadline():
+    resilience = LLMResilience(max_retries=3, base_delay_secs=0.001, deadline_secs=0.05)
+    cancelled = []
+
+    async def hanging():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    with pytest.raises(TimeoutError):
+        await resilience.acall_with_retries("qa", hanging)
+    assert cancelled == [1]
+    assert resilience.get_metrics()["qa"]["gave_up"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedge_wins_when_primary_is_slow(resilience):
+    delays = iter([1.0, 0.0])
+
+    async def call():
+        await asyncio.sleep(next(delays))
+        return "answer"
+
+    assert await resilience.hedged("qa", call) == "answer"
+    metrics = resilience.get_metrics()["qa"]
+    assert metrics["hedges_fired"] == 1
+    assert metrics["hedge_wins"] == 1
+    assert metrics["hedge_win_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_does_not_hedge(resilience):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        return "answer"
+
+    assert await resilience.hedged("qa", call) == "answer"
+    assert len(calls) == 1
+    assert resilience.get_metrics()["qa"]["primary_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedge_covers_failed_primary(resilience):
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(0.1)
+            raise ConnectionError("primary failed")
+        await asyncio.sleep(0.2)
+        return "from hedge"
+
+    assert await resilience.hedged("qa", call) == "from hedge"
+
+
+def test_hedge_delay_uses_recent_p95(resilience):
+    assert resilience.hedge_delay("qa") == 0.05
+    for latency in [0.1] * 19 + [2.0]:
+        resilience.record_latency("qa", latency)
+    assert resilience.hedge_delay("qa") == 2.0
+    for latency in [0.1] * 20:
+        resilience.record_latency("qa", latency)
+    assert resilience.hedge_delay("qa") == 0.1
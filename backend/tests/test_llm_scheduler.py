@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.llm_scheduler import LLMScheduler, INTERACTIVE, BATCH, estimate_tokens
+
+
+@pytest.fixture
+def scheduler():
+    return LLMScheduler(limits={"fast-model": {"rpm": 120, "tpm": 100000}}, default_limits={"rpm": 60, "tpm": 1000}, max_wait_secs=5)
+
+
+def test_acquire_within_budget_does_not_wait(scheduler):
+    waited = scheduler.acquire("fast-model", 100, INTERACTIVE)
+    assert waited < 0.05
+    metrics = scheduler.get_metrics()["fast-model"]
+    assert metrics["requests"]["interactive"] == 1
+    assert metrics["tokens_reserved"] == 100
+    assert metrics["queue_depth"] == 0
+
+
+def test_interactive_overtakes_queued_batch(scheduler):
+    scheduler.acquire("fast-model", 1)
+    scheduler._models["fast-model"].requests.available = 0  # exhaust the request budget
+
+    order = []
+    batch = threading.Thread(target=lambda: (scheduler.acquire("fast-model", 1, BATCH), order.append("batch")))
+    interactive = threading.Thread(target=lambda: (scheduler.acquire("fast-model", 1, INTERACTIVE), order.append("interactive")))
+    batch.start()
+    time.sleep(0.05)
+    interactive.start()
+    batch.join(timeout=5)
+    interactive.join(timeout=5)
+
+    assert order == ["interactive", "batch"]
+    assert scheduler.get_metrics()["fast-model"]["max_queue_depth"] == 2
+
+
+def test_wait_longer_than_max_wait_times_out():
+    scheduler = LLMScheduler(limits={}, default_limits={"rpm": 1, "tpm": 1000}, max_wait_secs=0.1)
+    scheduler.acquire("slow-model", 10)
+    with pytest.raises(TimeoutError):
+        scheduler.acquire("slow-model", 10)
+    assert scheduler.get_metrics()["slow-model"]["timeouts"] == 1
+
+
+def test_settle_refunds_unused_tokens(scheduler):
+    scheduler.acquire("fast-model", 5000)
+    before = scheduler._models["fast-model"].tokens.available
+    scheduler.settle("fast-model", 5000, 1000)
+    assert scheduler._models["fast-model"].tokens.available == pytest.approx(before + 4000, abs=50)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("a" * 400) == 100
+
+
+@pytest.mark.asyncio
+async def test_async_interactive_overtakes_queued_batch_without_threads(scheduler):
+    scheduler._state("fast-model").requests.available = 0
+
+    order = []
+
+    async def acquire(priority, name):
+        await scheduler.acquire_async("fast-model", 1, priority)
+        order.append(name)
+
+    batch = asyncio.create_task(acquire(BATCH, "batch"))
+    await asyncio.sleep(0.05)
+    interactive = asyncio.create_task(acquire(INTERACTIVE, "interactive"))
+    await asyncio.wait_for(asyncio.gather(batch, interactive), timeout=5)
+
+    assert order == ["interactive", "batch"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_async_waiter_reserves_nothing(scheduler):
+    state = scheduler._state("fast-model")
+    state.requests.available = 0
+
+    waiter = asyncio.create_task(scheduler.acquire_async("fast-model", 1))
+    await asyncio.sleep(0.05)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert state.queue == [] and state.waiters == {}
+    assert scheduler.get_metrics()["fast-model"]["requests"]["batch"] == 0
+    assert state.requests.available < 1
+
+
+@pytest.mark.asyncio
+async def test_queued_waiter_does_not_time_out_before_deadline():
+    scheduler = LLMScheduler(limits={}, default_limits={"rpm": 600, "tpm": 100000}, max_wait_secs=0.5)
+    scheduler._state("model").requests.available = 0.5  # 요청 하나당 0.1초 충전
+
+    head = asyncio.create_task(scheduler.acquire_async("model", 1, INTERACTIVE))
+    await asyncio.sleep(0)
+    # 마감까지 1초가 안 남았어도 헤드가 아닌 대기자는 마감 전에 실패하지 않음
+    queued = asyncio.create_task(scheduler.acquire_async("model", 1, BATCH))
+
+    waits = await asyncio.wait_for(asyncio.gather(head, queued), timeout=2)
+    assert max(waits) < 0.5
+    assert scheduler.get_metrics()["model"]["timeouts"] == 0
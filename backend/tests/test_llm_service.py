@@ -38,4 +38,56 @@ def test_run_documentation_pipeline(mock_invoke, llm_service):
     # Call 3: Draft Generation
     assert "summary" in mock_invoke.call_args_list[2].args[0]
     assert mock_invoke.call_args_list[2].args[0]["summary"] == "Generated Summary"
-    assert mock_invoke.call_args_list[2].args[0]["structure_analysis"] == "Generated Structure Analysis"
\ No newline at end of file
+    assert mock_invoke.call_args_list[2].args[0]["structure_analysis"] == "Generated Structure Analysis"
+
+@patch('langchain_core.runnables.base.RunnableSequence.invoke')
+def test_incremental_pipeline_reuses_unchanged_sections(mock_invoke, llm_service):
+    """Only sections whose input hashes changed are regenerated."""
+    from app.services.documentation_sections import (
+        DOCUMENTATION_SECTIONS,
+        build_input_hashes,
+        section_input_hashes,
+    )
+
+    repo_info = {"name": "test-repo"}
+    file_analysis = {"main.py": {"classes": []}}
+    old_hashes = build_input_hashes("readme-sha-1", file_analysis, repo_info)
+    # Every section was generated from the old inputs
+    previous_sections = {
+        section["key"]: {
+            "content": f"## {section['key']} (old)",
+            "input_hashes": section_input_hashes(section, old_hashes)
+        }
+        for section in DOCUMENTATION_SECTIONS
+    }
+
+    # Only the README changed: file-only sections ("architecture", "api") must be reused
+    new_hashes = build_input_hashes("readme-sha-2", file_analysis, repo_info)
+    mock_invoke.side_effect = lambda inputs: AIMessage(content=f"generated {inputs.get('section_title', 'step')}")
+
+    sections = llm_service.run_incremental_documentation_pipeline(
+        repo_info, "New README", file_analysis, new_hashes, previous_sections
+    )
+
+    assert sections["architecture"]["content"] == "## architecture (old)"
+    assert sections["api"]["content"] == "## api (old)"
+    assert sections["architecture"]["regenerated"] is False
+    assert sections["overview"]["content"] == "generated Overview"
+    assert sections["concepts"]["regenerated"] is True
+    # summary + structure analysis + three regenerated sections
+    assert mock_invoke.call_count == 5
+
+@patch('langchain_core.runnables.base.RunnableSequence.invoke')
+def test_run_question_suggestions_grounded_in_components(mock_invoke, llm_service):
+    """Suggestions are parsed one per line and the prompt lists the outline and main components."""
+    mock_invoke.return_value = AIMessage(content="1. VectorService는 청크를 어떻게 저장하나요?\n- QAService의 캐시는 언제 무효화되나요?\n\n1. VectorService는 청크를 어떻게 저장하나요?")
+    architecture = {"components": {
+        "vector_service": {"file_path": "app/services/vector_service.py", "classes": [{"name": "VectorService"}], "functions": []}
+    }}
+
+    questions = llm_service.run_question_suggestions({"name": "repo"}, "## Overview\ntext\n### Setup\n", architecture, count=5)
+
+    assert questions == ["VectorService는 청크를 어떻게 저장하나요?", "QAService의 캐시는 언제 무효화되나요?"]
+    inputs = mock_invoke.call_args.args[0]
+    assert inputs["outline"] == "- Overview\n- Setup"
+    assert "app/services/vector_service.py: VectorService" in inputs["components"]
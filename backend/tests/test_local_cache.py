@@ -0,0 +1,38 @@
+import time
+
+from app.services.local_cache import LocalCache
+
+
+def test_lru_eviction_by_size():
+    cache = LocalCache(max_bytes=100, ttl_secs=60)
+    cache.set("a", {"v": 1}, size=25)
+    cache.set("b", {"v": 2}, size=25)
+    cache.get("a")
+    cache.set("c", {"v": 3}, size=25)
+    cache.set("d", {"v": 4}, size=25)
+    cache.set("e", {"v": 5}, size=25)
+
+    # "b" is least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.get_metrics()["bytes"] == 100
+    # Entries over a quarter of the budget are not kept
+    cache.set("big", {"v": 0}, size=26)
+    assert cache.get("big") is None
+
+
+def test_entry_expires_with_shorter_remote_ttl():
+    cache = LocalCache(max_bytes=100, ttl_secs=60)
+    cache.set("a", {"v": 1}, size=10, ttl_secs=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_value_read_before_invalidation_is_not_stored():
+    cache = LocalCache(max_bytes=100, ttl_secs=60)
+    generation = cache.generation
+    cache.delete("a")  # a concurrent write invalidated the key while it was being read
+
+    cache.set("a", {"v": "stale"}, size=10, generation=generation)
+
+    assert cache.get("a") is None
@@ -1,3 +1,5 @@
+import asyncio
+import json
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock, AsyncMock
@@ -17,10 +19,24 @@ def test_analyze_repository_endpoint(mock_run_pipeline, mock_supabase):
     assert "task_id" in data
     mock_run_pipeline.assert_called_once_with(data['task_id'], "https://github.com/owner/repo")
 
+@patch('app.main.supabase')
+@patch('app.main.run_batch_analysis_pipeline')
+def test_analyze_batch_endpoint(mock_run_batch, mock_supabase):
+    """Test the /api/analyze/batch endpoint creates one task per repository."""
+    mock_supabase.table.return_value.insert.return_value.execute.return_value.data = [{'id': 'task-1'}, {'id': 'task-2'}]
+    repo_urls = ["https://github.com/owner/repo1", "https://github.com/owner/repo2"]
+    response = client.post("/api/analyze/batch", json={"repo_urls": repo_urls})
+    assert response.status_code == 200
+    assert response.json() == {"task_ids": ["task-1", "task-2"]}
+    mock_run_batch.assert_called_once_with([
+        {"task_id": "task-1", "repo_url": repo_urls[0]},
+        {"task_id": "task-2", "repo_url": repo_urls[1]},
+    ])
+
 @pytest.mark.asyncio
 @patch('app.main.supabase')
-@patch.object(cache_service, 'get')
-@patch.object(cache_service, 'set')
+@patch.object(cache_service, 'get', new_callable=AsyncMock)
+@patch.object(cache_service, 'set', new_callable=AsyncMock)
 @patch('app.main.github_service')
 @patch('app.main.llm_service')
 @patch('app.main.analysis_service')
@@ -33,44 +49,115 @@ async def test_run_analysis_pipeline_with_cache(mock_analysis, mock_llm, mock_gi
     # --- Test Cache Miss ---
     mock_cache_get.return_value = None # Simulate cache miss
     
-    # Properly mock GitHub service structure
-    mock_structure = {
+    # Properly mock GitHub head and file tree
+    mock_head = {
         "name": "repo", 
         "commit_hash": "123", 
-        "files": {"main.py": {"type": "python", "size": 100}}, 
         "main_language": "Python", 
-        "description": "Test repo"
+        "description": "Test repo",
+        "cached": False
     }
-    mock_github.get_repository_structure = AsyncMock(return_value=mock_structure)
+    mock_github.resolve_head = AsyncMock(side_effect=lambda *args, **kwargs: dict(mock_head))
+    mock_github.get_repository_tree = AsyncMock(return_value={"main.py": {"type": "python", "size": 100}})
     mock_github.get_priority_files = MagicMock(return_value=["main.py"])
     mock_github.get_file_content = AsyncMock(return_value="# Test content")
     
     # Mock LLM service
-    mock_llm.run_documentation_pipeline.return_value = "Fresh Documentation"
+    mock_llm.run_incremental_documentation_pipeline.return_value = {
+        "overview": {"content": "## Overview\nFresh Documentation", "input_hashes": {}, "regenerated": True}
+    }
     
     # Mock Supabase operations
     mock_supabase.table.return_value.update.return_value.eq.return_value.execute.return_value = MagicMock()
 
     await run_analysis_pipeline(task_id, repo_url)
 
-    mock_cache_get.assert_called_with("owner/repo:123")
+    mock_cache_get.assert_any_call("owner/repo:123")
     mock_supabase.table.return_value.update.return_value.eq.return_value.execute.assert_called()
-    mock_cache_set.assert_called_once()
+    cached_keys = [c.args[0] for c in mock_cache_set.call_args_list]
+    assert cached_keys.count("owner/repo:123") == 1
+    assert "owner/repo:sections" in cached_keys
 
     # --- Test Cache Hit ---
     task_id_hit = "test-cache-hit"
     cached_data = {"status": "completed", "result": "Cached Documentation"}
     mock_cache_get.return_value = cached_data # Simulate cache hit
-    mock_llm.run_documentation_pipeline.reset_mock() # Reset mock for the next call
+    mock_llm.run_incremental_documentation_pipeline.reset_mock() # Reset mock for the next call
     mock_cache_set.reset_mock()
 
     await run_analysis_pipeline(task_id_hit, repo_url)
 
     mock_supabase.table.return_value.update.return_value.eq.return_value.execute.assert_called()
     # Ensure the LLM pipeline was NOT called for a cache hit
-    mock_llm.run_documentation_pipeline.assert_not_called()
+    mock_llm.run_incremental_documentation_pipeline.assert_not_called()
+    mock_github.get_repository_tree.assert_awaited_once()  # the file tree is only fetched on a miss
 
 def test_health_check():
     response = client.get("/api/health")
     assert response.status_code == 200
-    assert response.json() == {"status": "ok"}
\ No newline at end of file
+    assert response.json() == {"status": "ok"}
+@patch('app.main.qa_service')
+def test_ask_stream_endpoint_sends_sse_events(mock_qa):
+    async def stream_answer(question, repo_name, session_id=None):
+        yield {"type": "sources", "sources": []}
+        yield {"type": "token", "content": "답변"}
+        yield {"type": "done", "cached": None}
+    mock_qa.stream_answer = stream_answer
+
+    response = client.post("/api/ask/stream", json={"question": "q", "repo_name": "owner/repo"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [line[len("data: "):] for line in response.text.split("\n\n") if line]
+    assert [json.loads(event)["type"] for event in events] == ["sources", "token", "done"]
+
+@patch('app.main.qa_service')
+def test_ask_batch_endpoint_streams_ndjson(mock_qa):
+    async def answer_batch(questions, repo_name):
+        for index in reversed(range(len(questions))):
+            yield {"index": index, "question": questions[index], "success": True, "answer": "a", "sources": []}
+    mock_qa.answer_batch = answer_batch
+
+    response = client.post("/api/ask/batch", json={"questions": ["q1", "q2"], "repo_name": "owner/repo"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["index"] for line in response.text.splitlines()] == [1, 0]
+
+def test_ask_batch_endpoint_rejects_empty_batch():
+    response = client.post("/api/ask/batch", json={"questions": [], "repo_name": "owner/repo"})
+    assert response.status_code == 400
+
+@patch.object(cache_service, 'clear_repo_cache', new_callable=AsyncMock, return_value=3)
+def test_clear_repository_cache_endpoint(mock_clear):
+    response = client.delete("/api/cache/owner/repo")
+
+    assert response.status_code == 200
+    assert response.json()["deleted_count"] == 3
+    mock_clear.assert_awaited_once_with("owner/repo")
+
+@pytest.mark.asyncio
+@patch('app.main.supabase')
+@patch.object(cache_service, 'get', new_callable=AsyncMock, return_value=None)
+@patch.object(cache_service, 'set', new_callable=AsyncMock)
+@patch('app.main.github_service')
+@patch('app.main.llm_service')
+async def test_duplicate_analyses_run_once(mock_llm, mock_github, mock_cache_set, mock_cache_get, mock_supabase):
+    from app.main import analysis_flights, run_analysis_pipeline
+    mock_github.resolve_head = AsyncMock(side_effect=lambda *args, **kwargs: {
+        "name": "repo", "commit_hash": "123", "main_language": "Python", "description": "Test repo", "cached": False
+    })
+    mock_github.get_repository_tree = AsyncMock(return_value={"main.py": {"type": "python", "size": 100}})
+    mock_github.get_priority_files = MagicMock(return_value=["main.py"])
+    mock_github.get_file_content = AsyncMock(return_value="# Test content")
+    mock_llm.run_incremental_documentation_pipeline.return_value = {
+        "overview": {"content": "## Overview", "input_hashes": {}, "regenerated": True}
+    }
+
+    with patch.object(analysis_flights, 'client', None):
+        await asyncio.gather(*(run_analysis_pipeline(f"task-{i}", "https://github.com/owner/repo") for i in range(3)))
+
+    mock_llm.run_incremental_documentation_pipeline.assert_called_once()
+    completed = [c.args[0] for c in mock_supabase.table.return_value.update.call_args_list if c.args[0].get("status") == "completed"]
+    assert len(completed) == 3
+    assert all(update["result"]["result"] == "## Overview" for update in completed)
@@ -0,0 +1,39 @@
+from app.services.markdown_chunker import MarkdownChunker, iter_lines
+
+
+def test_iter_lines_keeps_line_endings():
+    assert list(iter_lines("a\nb\n\nc")) == ["a\n", "b\n", "\n", "c"]
+
+
+def test_chunks_follow_headings_and_record_section_path():
+    doc = "# Guide\n\nIntro.\n\n## Install\n\n" + "Install step. " * 40 + "\n\n## Usage\n\n" + "Usage note. " * 40 + "\n"
+    chunks = list(MarkdownChunker(max_tokens=200, min_tokens=50).iter_chunks(doc))
+
+    assert [chunk.section_path for chunk in chunks] == [("Guide",), ("Guide", "Usage")]
+    assert chunks[0].content.startswith("# Guide")
+    assert "## Install" in chunks[0].content
+    assert chunks[1].content.startswith("## Usage")
+    assert all(chunk.tokens <= 200 for chunk in chunks)
+
+
+def test_code_blocks_are_kept_whole_or_refenced():
+    small = "# API\n\n```python\ndef a():\n\n    return 1\n```\n"
+    chunks = list(MarkdownChunker(max_tokens=100, min_tokens=10).iter_chunks(small))
+    assert len(chunks) == 1
+    assert "def a():\n\n    return 1\n```" in chunks[0].content
+
+    large = "```python\n" + "value = compute(1)\n" * 100 + "```\n"
+    pieces = list(MarkdownChunker(max_tokens=100, min_tokens=10).iter_chunks(large))
+    assert len(pieces) > 1
+    for piece in pieces:
+        assert piece.content.startswith("```python\n")
+        assert piece.content.endswith("```")
+        assert piece.tokens <= 100
+    assert sum(piece.content.count("value = compute(1)") for piece in pieces) == 100
+
+
+def test_long_prose_is_split_between_words():
+    doc = "word " * 1000
+    chunks = list(MarkdownChunker(max_tokens=100, min_tokens=10).iter_chunks(doc))
+    assert all(set(chunk.content.split()) == {"word"} for chunk in chunks)
+    assert sum(len(chunk.content.split()) for chunk in chunks) == 1000
@@ -1,12 +1,17 @@
+import asyncio
+
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 from app.services.qa_service import QAService
+from app.services.answer_cache import normalize_question
+from app.services.llm_scheduler import BATCH
+from app.config import settings
 
 class TestQAService:
     
     @pytest.fixture
     def qa_service(self):
-        with patch('app.services.qa_service.ChatOpenAI'), \
+        with patch('app.services.qa_service.get_llm_provider'), \
              patch('app.services.qa_service.VectorService'):
             return QAService()
 
@@ -23,7 +28,7 @@ class TestQAService:
         # Mock LLM response
         mock_response = MagicMock()
         mock_response.content = "This is the answer based on the documentation."
-        qa_service.llm.invoke = AsyncMock(return_value=mock_response)
+        qa_service.llm.ainvoke = AsyncMock(return_value=mock_response)
         
         result = await qa_service.answer_question("What does this project do?", "test/repo")
         
@@ -33,7 +38,7 @@ class TestQAService:
         qa_service.vector_service.search_similar_content.assert_called_once_with(
             query="What does this project do?",
             repo_name="test/repo",
-            limit=5
+            limit=settings.QA_CONTEXT_CANDIDATES
         )
 
     @pytest.mark.asyncio
@@ -79,4 +84,233 @@ class TestQAService:
         
         # Should return default questions when vector search fails
         assert isinstance(questions, list)
-        assert len(questions) >= 0  # May return empty list or default questions
\ No newline at end of file
+        assert len(questions) >= 0  # May return empty list or default questions
+
+@pytest.mark.asyncio
+async def test_answer_cache_skips_retrieval_and_llm():
+    with patch('app.services.qa_service.get_llm_provider'), \
+         patch('app.services.qa_service.VectorService'):
+        answer_cache = MagicMock()
+        answer_cache.semantic_enabled = False
+        answer_cache.get = AsyncMock(side_effect=[None, {"success": True, "answer": "cached", "cached": "exact"}])
+        answer_cache.set = AsyncMock()
+        qa_service = QAService(answer_cache=answer_cache)
+    qa_service.vector_service.get_current_commit = AsyncMock(return_value={"commit_hash": "abc"})
+    qa_service.vector_service.search_similar_content = AsyncMock(return_value=[{"content": "doc", "metadata": {}}])
+    qa_service._generate_answer = AsyncMock(return_value=MagicMock(content="fresh"))
+
+    first = await qa_service.answer_question("How do I install it?", "test/repo")
+    second = await qa_service.answer_question("How do I install it?", "test/repo")
+
+    assert first["answer"] == "fresh"
+    answer_cache.set.assert_awaited_once_with("test/repo", "abc", "How do I install it?", first, None)
+    assert second["cached"] == "exact"
+    qa_service._generate_answer.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_suggested_questions_from_analysis_and_prewarm():
+    with patch('app.services.qa_service.get_llm_provider'), \
+         patch('app.services.qa_service.VectorService'):
+        cache_service = MagicMock()
+        cache_service.get = AsyncMock(return_value={"commit_hash": "abc", "questions": ["VectorService는 무엇을 하나요?"]})
+        qa_service = QAService(answer_cache=MagicMock(), cache_service=cache_service)
+    qa_service.answer_question = AsyncMock(return_value={"success": True, "answer": "..."})
+    qa_service.vector_service.get_current_commit = AsyncMock(return_value={"commit_hash": "abc"})
+
+    questions = await qa_service.get_suggested_questions("test/repo")
+    stats = await qa_service.prewarm_answers("test/repo", questions)
+
+    assert questions == ["VectorService는 무엇을 하나요?"]
+    cache_service.get.assert_awaited_once_with("test/repo:suggested_questions")
+    assert stats == {"answered": 1, "cached": 0, "failed": 0}
+    assert qa_service.answer_question.call_args.kwargs["priority"] == BATCH
+
+
+@pytest.mark.asyncio
+async def test_hedged_answer_cancels_the_slower_request():
+    with patch('app.services.qa_service.get_llm_provider'), \
+         patch('app.services.qa_service.VectorService'):
+        qa_service = QAService()
+    calls, cancelled = [], []
+
+    async def ainvoke(prompt):
+        calls.append(prompt)
+        try:
+            await asyncio.sleep(1.0 if len(calls) == 1 else 0)
+        except asyncio.CancelledError:
+            cancelled.append(prompt)
+            raise
+        return MagicMock(content="answer")
+
+    qa_service.llm.ainvoke = ainvoke
+    with patch('app.services.qa_service.llm_scheduler') as scheduler, \
+         patch('app.services.qa_service.llm_resilience.hedge_delay', return_value=0.01):
+        scheduler.acquire_async = AsyncMock()
+        response = await qa_service._generate_answer("prompt")
+        await asyncio.sleep(0.05)
+
+    assert response.content == "answer"
+    assert len(calls) == 2
+    assert cancelled == ["prompt"]
+
+
+@pytest.mark.asyncio
+async def test_stream_answer_sends_sources_then_tokens():
+    with patch('app.services.qa_service.get_llm_provider'), \
+         patch('app.services.qa_service.VectorService'):
+        qa_service = QAService()
+    qa_service.vector_service.search_similar_content = AsyncMock(return_value=[{"content": "doc", "metadata": {}}])
+
+    async def astream(prompt):
+        for word in ["Vector", "Service"]:
+            yield MagicMock(content=word, usage_metadata=None)
+    qa_service.llm.astream = astream
+
+    events = [event async for event in qa_service.stream_answer("What is it?", "test/repo")]
+
+    assert [event["type"] for event in events] == ["sources", "token", "token", "done"]
+    assert events[0]["sources"][0]["content"] == "doc..."
+    assert "".join(event["content"] for event in events if event["type"] == "token") == "VectorService"
+
+
+@pytest.mark.asyncio
+async def test_stream_answer_closing_stops_generation():
+    with patch('app.services.qa_service.get_llm_provider'), \
+         patch('app.services.qa_service.VectorService'):
+        qa_service = QAService()
+    qa_service.vector_service.search_similar_content = AsyncMock(return_value=[{"content": "doc", "metadata": {}}])
+    produced = []
+
+    async def astream(prompt):
+        for i in range(100):
+            produced.append(i)
+            yield MagicMock(content=str(i), usage_metadata=None)
+    qa_service.llm.astream = astream
+
+    stream = qa_service.stream_answer("What is it?", "test/repo")
+    assert (await stream.__anext__())["type"] == "sources"
+    assert (await stream.__anext__())["content"] == "0"
+    await stream.aclose()
+
+    assert produced == [0]
+
+
+@pytest.mark.asyncio
+async def test_answer_batch_embeds_once_and_answers_each_question():
+    with patch('app.services.qa_service.get_llm_provider'), \
+         patch('app.services.qa_service.VectorService'):
+        answer_cache = MagicMock()
+        answer_cache.semantic_enabled = False
+        answer_cache.get_many = AsyncMock(side_effect=lambda repo, commit, questions: [
+            {"success": True, "answer": "cached", "cached": "exact"} if question == "Cached?" else None
+            for question in questions
+        ])
+        answer_cache.set = AsyncMock()
+        qa_service = QAService(answer_cache=answer_cache)
+    qa_service.vector_service.get_current_commit = AsyncMock(return_value={"commit_hash": "abc"})
+    qa_service.vector_service.embed_queries = AsyncMock(return_value=[[1.0, 0.0], [0.0, 1.0]])
+    shared = {"content": "shared doc", "metadata": {}}
+    qa_service.vector_service.search_many = AsyncMock(return_value=[
+        [shared, {"content": "install doc", "metadata": {}}],
+        [shared]
+    ])
+    qa_service.vector_service.cached_document_embeddings = AsyncMock(return_value=[[1.0, 0.0], [0.9, 0.1]])
+    qa_service._generate_answer = AsyncMock(side_effect=lambda prompt, priority: MagicMock(content=prompt[-20:]))
+
+    questions = ["Cached?", "How to install?", "What is shared?", "how to install"]
+    results = [result async for result in qa_service.answer_batch(questions, "test/repo")]
+
+    assert results[0] == {"index": 0, "question": "Cached?", "success": True, "answer": "cached", "cached": "exact"}
+    assert sorted(result["index"] for result in results) == [0, 1, 2, 3]
+    # 정규화 기준 같은 질문은 한 번만 임베딩·답변
+    qa_service.vector_service.embed_queries.assert_awaited_once_with(["How to install?", "What is shared?"])
+    qa_service.vector_service.cached_document_embeddings.assert_awaited_once_with(["shared doc", "install doc"])
+    qa_service.vector_service.embed_documents.assert_not_called()
+    assert qa_service._generate_answer.await_count == 2
+    assert all(call.args[1] == BATCH for call in qa_service._generate_answer.await_args_list)
+    assert answer_cache.set.await_count == 2
+    by_index = {result["index"]: result for result in results}
+    assert by_index[1]["answer"] == by_index[3]["answer"]
+
+
+@pytest.mark.asyncio
+async def test_context_keeps_similarity_order_when_a_vector_is_not_cached():
+    with patch('app.services.qa_service.get_llm_provider'), \
+         patch('app.services.qa_service.VectorService'):
+        qa_service = QAService()
+    qa_service.vector_service.cached_document_embeddings = AsyncMock(return_value=[[1.0, 0.0], None])
+    qa_service.vector_service.embed_documents = AsyncMock()
+    qa_service.vector_service.embed_query = AsyncMock(return_value=[0.0, 1.0])
+    candidates = [{"content": "first doc", "metadata": {}}, {"content": "second doc", "metadata": {}}]
+
+    passages = await qa_service._assemble_context("question", candidates)
+
+    assert [passage["content"] for passage in passages] == ["first doc", "second doc"]
+    qa_service.vector_service.embed_documents.assert_not_called()
+    qa_service.vector_service.embed_query.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_session_follow_up_reuses_chunks_and_includes_history():
+    from app.services.conversation_store import ConversationStore
+    cache = {}
+    cache_service = MagicMock()
+    cache_service.get = AsyncMock(side_effect=cache.get)
+    cache_service.set = AsyncMock(side_effect=lambda key, value, expiration_secs=3600: cache.__setitem__(key, value))
+    with patch('app.services.qa_service.get_llm_provider'), \
+         patch('app.services.qa_service.VectorService'):
+        answer_cache = MagicMock()
+        answer_cache.semantic_enabled = False
+        answer_cache.get = AsyncMock(return_value=None)
+        answer_cache.set = AsyncMock()
+        qa_service = QAService(answer_cache=answer_cache, conversation_store=ConversationStore(cache_service))
+    qa_service.vector_service.get_current_commit = AsyncMock(return_value={"commit_hash": "abc"})
+    qa_service.vector_service.embed_query = AsyncMock(side_effect=[[1.0, 0.0], [0.9, 0.1]])
+    qa_service.vector_service.cached_document_embeddings = AsyncMock(side_effect=Exception("no embeddings"))
+    qa_service.vector_service.search_similar_content = AsyncMock(return_value=[{"content": "VectorService stores chunks", "metadata": {}}])
+    qa_service._generate_answer = AsyncMock(side_effect=[MagicMock(content="It stores chunks."), MagicMock(content="In Supabase.")])
+
+    first = await qa_service.answer_question("What is VectorService?", "test/repo", session_id="s1")
+    second = await qa_service.answer_question("Where does it store them?", "test/repo", session_id="s1")
+
+    assert first["session_id"] == second["session_id"] == "s1"
+    qa_service.vector_service.search_similar_content.assert_awaited_once()
+    follow_up_prompt = qa_service._generate_answer.await_args_list[1].args[0]
+    assert "질문: What is VectorService?\n답변: It stores chunks." in follow_up_prompt
+    assert "VectorService stores chunks" in follow_up_prompt
+    # 대화에 따라 달라지는 후속 답변은 답변 캐시에 저장하지 않음
+    answer_cache.set.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_prewarmed_suggestion_is_served_from_cache_inside_session():
+    from app.services.conversation_store import ConversationStore
+    cache = {"test/repo:suggested_questions": {"commit_hash": "abc", "questions": ["How do I install it?"]}}
+    cache_service = MagicMock()
+    cache_service.get = AsyncMock(side_effect=cache.get)
+    cache_service.set = AsyncMock(side_effect=lambda key, value, expiration_secs=3600, tags=None: cache.__setitem__(key, value))
+    with patch('app.services.qa_service.get_llm_provider'), \
+         patch('app.services.qa_service.VectorService'):
+        answer_cache = MagicMock()
+        answer_cache.semantic_enabled = False
+        answer_cache.get = AsyncMock(side_effect=lambda repo, commit, question, *args: (
+            {"success": True, "answer": "pip install", "sources": [], "cached": "exact"}
+            if normalize_question(question) == "how do i install it" else None
+        ))
+        answer_cache.set = AsyncMock()
+        qa_service = QAService(answer_cache=answer_cache, cache_service=cache_service,
+                               conversation_store=ConversationStore(cache_service))
+    qa_service.vector_service.get_current_commit = AsyncMock(return_value={"commit_hash": "abc"})
+    qa_service.vector_service.embed_query = AsyncMock(return_value=[1.0, 0.0])
+    qa_service.vector_service.search_similar_content = AsyncMock(return_value=[{"content": "VectorService stores chunks", "metadata": {}}])
+    qa_service._generate_answer = AsyncMock(return_value=MagicMock(content="It stores chunks."))
+
+    await qa_service.answer_question("What is VectorService?", "test/repo", session_id="s1")
+    result = await qa_service.answer_question("how do i install it", "test/repo", session_id="s1")
+
+    assert result["answer"] == "pip install"
+    assert result["cached"] == "exact"
+    qa_service._generate_answer.assert_awaited_once()  # only the first question went to the LLM
+    session = await qa_service.conversation_store.load("s1", "test/repo")
+    assert [turn["question"] for turn in session["turns"]] == ["What is VectorService?", "how do i install it"]
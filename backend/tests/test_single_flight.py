@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+class FakeAsyncRedis:
+    """Lock and progress keys of another worker: SET NX, the renew/release scripts, GET/EXISTS pipelines."""
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token, *args):
+        if self.values.get(key) != token:
+            return 0
+        if "del" in script:
+            del self.values[key]
+        return 1
+
+    async def delete(self, *keys):
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction=True):
+        redis_client = self
+
+        class Pipeline:
+            def __init__(self):
+                self.calls = []
+
+            def get(self, key):
+                self.calls.append(lambda: redis_client.values.get(key))
+
+            def exists(self, key):
+                self.calls.append(lambda: int(key in redis_client.values))
+
+            async def execute(self):
+                return [call() for call in self.calls]
+
+        return Pipeline()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_run_and_its_progress():
+    flights = SingleFlight(None)
+    calls, progress = [], []
+    release = asyncio.Event()
+
+    async def work():
+        calls.append(1)
+        await flights.report("task-1", "analyzing_files")
+        await release.wait()
+        return {"result": "docs"}
+
+    async def poll():
+        return None
+
+    async def on_progress(status):
+        progress.append(status)
+
+    leader = asyncio.create_task(flights.run("owner/repo:abc", "task-1", work, poll))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.run("owner/repo:abc", "task-2", work, poll, on_progress))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await leader == ({"result": "docs"}, True)
+    assert await follower == ({"result": "docs"}, False)
+    assert calls == [1]
+    assert progress == ["analyzing_files"]
+    assert flights.get_metrics() == {"leaders": 1, "followers": 1, "remote_followers": 0, "takeovers": 0, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_failure_is_shared_with_attached_callers():
+    flights = SingleFlight(None)
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        raise RuntimeError("GitHub API error")
+
+    async def poll():
+        return None
+
+    leader = asyncio.create_task(flights.run("key", "task-1", work, poll))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.run("key", "task-2", work, poll))
+    await asyncio.sleep(0)
+    release.set()
+
+    for task in (leader, follower):
+        with pytest.raises(RuntimeError, match="GitHub API error"):
+            await task
+
+
+@pytest.mark.asyncio
+async def test_follows_leader_in_other_worker_until_result_is_stored():
+    client = FakeAsyncRedis()
+    client.values["flight:lock:key"] = "other-worker:token"
+    client.values["flight:progress:key"] = b"generating_documentation"
+    flights = SingleFlight(client, poll_interval_secs=0.01, prefix="flight")
+    results = iter([None, None, {"result": "docs"}])
+    progress = []
+
+    async def work():
+        raise AssertionError("must not run while another worker leads")
+
+    async def poll():
+        return next(results)
+
+    async def on_progress(status):
+        progress.append(status)
+
+    assert await flights.run("key", "task-2", work, poll, on_progress) == ({"result": "docs"}, False)
+    assert progress == ["generating_documentation"]
+
+
+@pytest.mark.asyncio
+async def test_takes_over_when_other_worker_releases_without_result():
+    client = FakeAsyncRedis()
+    client.values["flight:lock:key"] = "other-worker:token"
+    flights = SingleFlight(client, poll_interval_secs=0.01, prefix="flight")
+
+    async def work():
+        return {"result": "docs"}
+
+    async def poll():
+        client.values.pop("flight:lock:key", None)  # the leader failed
+        return None
+
+    assert await flights.run("key", "task-2", work, poll) == ({"result": "docs"}, True)
+    assert flights.stats["takeovers"] == 1
+    assert "flight:lock:key" not in client.values
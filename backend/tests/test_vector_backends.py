@@ -0,0 +1,205 @@
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from app.services.ann_index import IVFIndex, ProductQuantizer, ScalarQuantizer, load_quantizer, normalize_rows, save_quantizer
+from app.services.vector_backends import LocalVectorBackend, SupabaseVectorBackend, ivfflat_lists
+
+
+def make_rows(repo_name, commit_hash, vectors):
+    return [
+        {
+            "repo_name": repo_name,
+            "commit_hash": commit_hash,
+            "chunk_index": i,
+            "content": f"chunk {i}",
+            "embedding": vector,
+            "metadata": {"chunk_size": 7},
+        }
+        for i, vector in enumerate(vectors)
+    ]
+
+
+def test_ivf_index_matches_exact_search():
+    rng = np.random.default_rng(1)
+    vectors = normalize_rows(rng.normal(size=(2000, 32)))
+    index = IVFIndex.build(vectors, min_rows=1000, nlist=20)
+    assert not index.is_flat
+
+    recalled = 0
+    for query in vectors[:50]:
+        exact = set(np.argsort(-(vectors @ query))[:5])
+        ids, scores = index.search(vectors, query, 5, nprobe=6)
+        recalled += len(exact & set(ids.tolist()))
+        assert list(scores) == sorted(scores, reverse=True)
+    assert recalled / 250 >= 0.8
+
+
+def test_small_index_is_flat_and_exact():
+    vectors = normalize_rows(np.eye(4))
+    index = IVFIndex.build(vectors, min_rows=10)
+    ids, scores = index.search(vectors, np.array([0, 0, 1, 0]), 2)
+    assert index.is_flat
+    assert ids[0] == 2
+    assert scores[0] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("quantizer_cls, compression", [(ScalarQuantizer, 4), (ProductQuantizer, 16)])
+def test_quantized_search_with_rerank_keeps_recall(quantizer_cls, compression, tmp_path):
+    rng = np.random.default_rng(2)
+    vectors = normalize_rows(rng.normal(size=(1000, 64)))
+    quantizer = quantizer_cls.train(vectors)
+    codes = quantizer.encode(vectors)
+    assert vectors.nbytes / codes.nbytes == compression
+
+    save_quantizer(quantizer, str(tmp_path / "quantizer.npz"))
+    quantizer = load_quantizer(str(tmp_path / "quantizer.npz"))
+
+    index = IVFIndex()
+    recalled = 0
+    for query in normalize_rows(vectors[:40] + rng.normal(scale=0.1, size=(40, 64))):
+        exact = set(np.argsort(-(vectors @ query))[:10])
+        ids, scores = index.search(vectors, query, 10, quantizer=quantizer, codes=codes, rerank_factor=4)
+        recalled += len(exact & set(ids.tolist()))
+        # Reranked scores are exact cosine similarities
+        assert np.allclose(scores, vectors[ids] @ query, atol=1e-5)
+    assert recalled / 400 >= 0.9
+
+
+@pytest.mark.asyncio
+async def test_local_backend_store_search_delete(tmp_path):
+    backend = LocalVectorBackend(str(tmp_path), ivf_min_rows=100)
+    await backend.upsert_rows(make_rows("owner/repo", "abc", np.eye(8)[:3].tolist()))
+
+    results = await backend.search(np.eye(8)[1].tolist(), "owner/repo", limit=5, threshold=0.7)
+    assert [row["chunk_index"] for row in results] == [1]
+    assert results[0]["content"] == "chunk 1"
+    assert results[0]["similarity"] == pytest.approx(1.0)
+    assert "embedding" not in results[0]
+
+    # Persisted: a fresh backend over the same directory sees the same rows
+    reopened = LocalVectorBackend(str(tmp_path))
+    assert len(await reopened.search(np.eye(8)[0].tolist(), "owner/repo", 5, 0.7)) == 1
+    assert await reopened.search(np.eye(8)[0].tolist(), "other/repo", 5, 0.7) == []
+
+    assert await backend.delete("owner/repo", "abc") == 3
+    assert await backend.search(np.eye(8)[1].tolist(), "owner/repo", 5, 0.7) == []
+
+
+@pytest.mark.asyncio
+async def test_local_backend_upsert_replaces_chunks_and_merges_commits(tmp_path):
+    backend = LocalVectorBackend(str(tmp_path))
+    await backend.upsert_rows(make_rows("owner/repo", "abc", np.eye(4)[:2].tolist()))
+    replacement = make_rows("owner/repo", "abc", [np.eye(4)[3].tolist()])
+    replacement[0]["content"] = "replaced"
+    await backend.upsert_rows(replacement)
+    await backend.upsert_rows(make_rows("owner/repo", "def", [np.eye(4)[2].tolist()]))
+
+    results = await backend.search([0, 0, 0.6, 0.8], "owner/repo", limit=5, threshold=0.5)
+
+    assert [(row["commit_hash"], row["content"]) for row in results] == [("abc", "replaced"), ("def", "chunk 0")]
+
+
+@pytest.mark.asyncio
+async def test_local_backend_builds_appended_rows_once_on_first_search(tmp_path, monkeypatch):
+    backend = LocalVectorBackend(str(tmp_path))
+    builds = []
+    build = IVFIndex.build
+    monkeypatch.setattr(IVFIndex, "build", staticmethod(lambda *args, **kwargs: builds.append(1) or build(*args, **kwargs)))
+    vectors = np.eye(8).tolist()
+    for start in range(0, 8, 2):
+        rows = make_rows("owner/repo", "abc", vectors)[start:start + 2]
+        await backend.upsert_rows(rows)
+    assert builds == []
+
+    assert len(await backend.search(np.eye(8)[6].tolist(), "owner/repo", limit=5, threshold=0.7)) == 1
+    assert len(await backend.fetch_rows("owner/repo")) == 8
+    assert builds == [1]
+
+    # 새 빌드로 CURRENT가 교체되고 이전 빌드와 반영된 세그먼트는 정리됨
+    partition_dir = tmp_path / "owner%2Frepo" / "abc"
+    first_version = (partition_dir / "CURRENT").read_text()
+    await backend.upsert_rows(make_rows("owner/repo", "abc", [np.eye(8)[0].tolist()]))
+    await backend.search(np.eye(8)[0].tolist(), "owner/repo", limit=5, threshold=0.7)
+    second_version = (partition_dir / "CURRENT").read_text()
+    assert second_version != first_version
+    assert sorted(entry.name for entry in partition_dir.iterdir()) == ["CURRENT", "pending", second_version]
+    assert list((partition_dir / "pending").iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_local_backend_quantized_partition(tmp_path):
+    backend = LocalVectorBackend(str(tmp_path), quantization="int8")
+    await backend.upsert_rows(make_rows("owner/repo", "abc", np.eye(8).tolist()))
+
+    results = await backend.search(np.eye(8)[5].tolist(), "owner/repo", limit=1, threshold=0.7)
+
+    assert [row["chunk_index"] for row in results] == [5]
+    metrics = backend.get_metrics()
+    assert metrics["rows"] == 8
+    assert metrics["full_precision_bytes"] == 4 * metrics["resident_bytes"]
+
+
+@pytest.mark.asyncio
+async def test_local_backend_commit_scope_and_superseded_delete(tmp_path):
+    backend = LocalVectorBackend(str(tmp_path))
+    await backend.upsert_rows(make_rows("owner/repo", "old", np.eye(4)[:2].tolist()))
+    await backend.upsert_rows(make_rows("owner/repo", "new", np.eye(4)[:3].tolist()))
+
+    scoped = await backend.search(np.eye(4)[0].tolist(), "owner/repo", limit=5, threshold=0.5, commit_hash="new")
+    assert [row["commit_hash"] for row in scoped] == ["new"]
+    assert len(await backend.fetch_rows("owner/repo", "old")) == 2
+
+    # Partitions written after the cutoff (e.g. an analysis in progress) are kept
+    assert await backend.delete_superseded("owner/repo", "new", before=0) == 0
+    assert await backend.delete_superseded("owner/repo", "new", before=time.time() + 1) == 2
+    assert [row["commit_hash"] for row in await backend.fetch_rows("owner/repo")] == ["new"] * 3
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+@pytest.mark.asyncio
+async def test_local_backend_search_many_matches_single_searches(quantization, tmp_path):
+    rng = np.random.default_rng(3)
+    backend = LocalVectorBackend(str(tmp_path), quantization=quantization)
+    await backend.upsert_rows(make_rows("owner/repo", "abc", rng.normal(size=(64, 16)).tolist()))
+    queries = rng.normal(size=(5, 16)).tolist()
+
+    batched = await backend.search_many(queries, "owner/repo", limit=4, threshold=-1.0)
+
+    for query, results in zip(queries, batched):
+        single = await backend.search(query, "owner/repo", limit=4, threshold=-1.0)
+        assert [row["chunk_index"] for row in results] == [row["chunk_index"] for row in single]
+
+
+@pytest.mark.asyncio
+async def test_supabase_backend_scopes_search_to_commit():
+    client = MagicMock()
+    client.rpc.return_value.execute.return_value = MagicMock(data=[])
+    backend = SupabaseVectorBackend(client)
+
+    await backend.search([0.1], "owner/repo", 5, 0.7, commit_hash="abc")
+
+    assert client.rpc.call_args[0][1]["p_commit_hash"] == "abc"
+
+
+@pytest.mark.asyncio
+async def test_supabase_backend_delete_runs_off_the_event_loop(monkeypatch):
+    client = MagicMock()
+    client.table.return_value.delete.return_value.eq.return_value.eq.return_value.execute.return_value = MagicMock(data=[{}, {}])
+    calls = []
+
+    async def to_thread(fn, *args):
+        calls.append(fn)
+        return fn(*args)
+
+    monkeypatch.setattr("app.services.vector_backends.asyncio.to_thread", to_thread)
+
+    assert await SupabaseVectorBackend(client).delete("owner/repo", "abc") == 2
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("rows, lists", [(0, 1), (50_000, 50), (1_000_000, 1000), (4_000_000, 2000)])
+def test_ivfflat_lists_proportional_to_rows(rows, lists):
+    assert ivfflat_lists(rows) == lists
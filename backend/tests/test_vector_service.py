@@ -1,29 +1,31 @@
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
+from app.services.markdown_chunker import MarkdownChunk
 from app.services.vector_service import VectorService
 
+
+def chunks_of(texts):
+    return [MarkdownChunk(text, ("Overview",), len(text) // 4) for text in texts]
+
+
 class TestVectorService:
     
     @pytest.fixture
     def vector_service(self):
         with patch('app.services.vector_service.create_client') as mock_create_client, \
-             patch('app.services.vector_service.OpenAIEmbeddings') as mock_embeddings, \
-             patch('app.services.vector_service.RecursiveCharacterTextSplitter') as mock_splitter:
+             patch('app.services.vector_service.get_llm_provider') as mock_get_provider:
             
             # Setup proper mock instances
             mock_supabase = MagicMock()
             mock_create_client.return_value = mock_supabase
             
             mock_embeddings_instance = MagicMock()
-            mock_embeddings.return_value = mock_embeddings_instance
-            
-            mock_splitter_instance = MagicMock()
-            mock_splitter.return_value = mock_splitter_instance
+            mock_get_provider.return_value.embeddings.return_value = mock_embeddings_instance
             
             service = VectorService()
             service.supabase = mock_supabase
             service.embeddings = mock_embeddings_instance
-            service.text_splitter = mock_splitter_instance
+            service.chunker = MagicMock()
             
             return service
 
@@ -31,23 +33,80 @@ class TestVectorService:
     async def test_store_document_success(self, vector_service):
         """Test successful document storage"""
         # Mock dependencies
-        vector_service.text_splitter.split_text.return_value = ["chunk1", "chunk2"]
-        vector_service.embeddings.embed_query = AsyncMock(return_value=[0.1, 0.2, 0.3])
+        vector_service.chunker.iter_chunks.return_value = chunks_of(["chunk1", "chunk2"])
+        vector_service.embeddings.embed_documents = MagicMock(return_value=[[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]])
         
         mock_result = MagicMock()
         mock_result.data = [{"id": "1"}, {"id": "2"}]
-        vector_service.supabase.table.return_value.insert.return_value.execute.return_value = mock_result
+        vector_service.supabase.table.return_value.upsert.return_value.execute.return_value = mock_result
         
         result = await vector_service.store_document("test/repo", "test documentation", "abc123")
         
         assert result["success"] is True
         assert result["chunks_stored"] == 2
-        vector_service.text_splitter.split_text.assert_called_once_with("test documentation")
+        vector_service.chunker.iter_chunks.assert_called_once_with("test documentation")
+
+    @pytest.mark.asyncio
+    async def test_store_document_batches_embeddings_and_upserts(self, vector_service):
+        """Embeddings are requested in batches and rows are written with bulk upserts"""
+        chunks = [f"chunk{i}" for i in range(5)]
+        vector_service.chunker.iter_chunks.return_value = chunks_of(chunks)
+        vector_service.embeddings.embed_documents = MagicMock(side_effect=lambda texts: [[0.1, 0.2]] * len(texts))
+        upsert = vector_service.supabase.table.return_value.upsert
+        upsert.return_value.execute.return_value = MagicMock(data=[{"id": "1"}])
+        vector_service.backend.upsert_batch_size = 2
+
+        with patch('app.services.vector_service.settings') as mock_settings:
+            mock_settings.EMBEDDING_BATCH_SIZE = 2
+            mock_settings.EMBEDDING_BATCH_MAX_TOKENS = 100000
+            mock_settings.EMBEDDING_CONCURRENCY = 2
+            result = await vector_service.store_document("test/repo", "doc", "abc123")
+
+        assert result == {"success": True, "chunks_stored": 5}
+        assert [c.args[0] for c in vector_service.embeddings.embed_documents.call_args_list] == [
+            ["chunk0", "chunk1"], ["chunk2", "chunk3"], ["chunk4"]
+        ]
+        upserted = [c.args[0] for c in upsert.call_args_list]
+        # Chunks are embedded and stored in groups of EMBEDDING_BATCH_SIZE * EMBEDDING_CONCURRENCY (4)
+        assert [len(rows) for rows in upserted] == [2, 2, 1]
+        assert [row["chunk_index"] for rows in upserted for row in rows] == [0, 1, 2, 3, 4]
+        assert upsert.call_args.kwargs["on_conflict"] == "repo_name,commit_hash,chunk_index"
+
+    @pytest.mark.asyncio
+    async def test_store_document_only_embeds_uncached_chunks(self, vector_service, tmp_path):
+        """Chunks already in the embedding cache are not sent to the provider again"""
+        from app.services.embedding_cache import DiskEmbeddingStore, EmbeddingCache
+        vector_service.embedding_cache = EmbeddingCache(DiskEmbeddingStore(str(tmp_path / "cache")))
+        vector_service.embedding_cache.set_many(vector_service.embedding_model, ["unchanged"], [[0.5, 0.5]])
+        vector_service.chunker.iter_chunks.return_value = chunks_of(["unchanged", "new", "new"])
+        vector_service.embeddings.embed_documents = MagicMock(side_effect=lambda texts: [[0.1, 0.2]] * len(texts))
+        vector_service.supabase.table.return_value.upsert.return_value.execute.return_value = MagicMock(data=[{"id": "1"}])
+
+        result = await vector_service.store_document("test/repo", "doc", "def456")
+
+        assert result["success"] is True
+        vector_service.embeddings.embed_documents.assert_called_once_with(["new"])
+        rows = vector_service.supabase.table.return_value.upsert.call_args.args[0]
+        assert rows[0]["embedding"] == [0.5, 0.5]
+        assert vector_service.embedding_cache.get_metrics()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cached_document_embeddings_never_call_the_provider(self, vector_service, tmp_path):
+        """MMR candidates are looked up in the embedding cache only; misses stay None"""
+        from app.services.embedding_cache import DiskEmbeddingStore, EmbeddingCache
+        vector_service.embedding_cache = EmbeddingCache(DiskEmbeddingStore(str(tmp_path / "cache")))
+        vector_service.embedding_cache.set_many(vector_service.embedding_cache_model, ["stored"], [[0.5, 0.5]])
+
+        vectors = await vector_service.cached_document_embeddings(["stored", "evicted"])
+
+        assert vectors[0] == pytest.approx([0.5, 0.5])
+        assert vectors[1] is None
+        vector_service.embeddings.embed_documents.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_store_document_failure(self, vector_service):
         """Test document storage failure"""
-        vector_service.text_splitter.split_text.return_value = ["chunk1"]
+        vector_service.chunker.iter_chunks.return_value = chunks_of(["chunk1"])
         
         # Mock asyncio.to_thread to raise exception
         with patch('asyncio.to_thread', side_effect=Exception("Embedding failed")):
@@ -59,8 +118,11 @@ class TestVectorService:
     @pytest.mark.asyncio
     async def test_search_similar_content_success(self, vector_service):
         """Test successful similarity search"""
-        with patch('asyncio.to_thread') as mock_to_thread:
-            mock_to_thread.return_value = [0.1, 0.2, 0.3]
+        async def to_thread(fn, *args, **kwargs):
+            # 질문 임베딩만 가짜 값으로, 나머지(검색 RPC)는 그대로 실행
+            return [0.1, 0.2, 0.3] if fn == vector_service._embed_query else fn(*args, **kwargs)
+
+        with patch('asyncio.to_thread', side_effect=to_thread):
             
             # Mock RPC call result
             mock_result = MagicMock()
@@ -80,8 +142,11 @@ class TestVectorService:
     @pytest.mark.asyncio
     async def test_search_similar_content_empty(self, vector_service):
         """Test similarity search with no results"""
-        with patch('asyncio.to_thread') as mock_to_thread:
-            mock_to_thread.return_value = [0.1, 0.2, 0.3]
+        async def to_thread(fn, *args, **kwargs):
+            # 질문 임베딩만 가짜 값으로, 나머지(검색 RPC)는 그대로 실행
+            return [0.1, 0.2, 0.3] if fn == vector_service._embed_query else fn(*args, **kwargs)
+
+        with patch('asyncio.to_thread', side_effect=to_thread):
             
             mock_result = MagicMock()
             mock_result.data = []
@@ -113,4 +178,99 @@ class TestVectorService:
         # Check for actual table name used in implementation
         assert "CREATE TABLE IF NOT EXISTS github_documents" in sql
         assert "embedding VECTOR(1536)" in sql
-        assert "CREATE INDEX IF NOT EXISTS github_documents_embedding_idx" in sql
\ No newline at end of file
+        assert "CREATE INDEX IF NOT EXISTS github_documents_embedding_idx" in sql
+    def test_shortened_embedding_dimensions(self):
+        """EMBEDDING_DIMENSIONS is passed to the provider, the schema and the cache key"""
+        with patch('app.services.vector_service.create_client'), \
+             patch('app.services.vector_service.get_llm_provider') as mock_get_provider, \
+             patch('app.services.vector_service.settings') as mock_settings:
+            mock_settings.EMBEDDING_DIMENSIONS = 256
+            service = VectorService()
+
+        mock_get_provider.return_value.embeddings.assert_called_once_with("text-embedding-3-small", dimensions=256)
+        assert service.embedding_cache_model == "text-embedding-3-small@256"
+        assert "embedding VECTOR(256)" in service.create_documents_table_sql()
+
+    @pytest.mark.asyncio
+    async def test_search_fuses_identifier_matches(self, vector_service):
+        """BM25 hits for exact identifiers are fused with the vector results"""
+        vector_service.embeddings.embed_query = MagicMock(return_value=[0.1, 0.2])
+        vector_service.backend = MagicMock()
+        vector_service.backend.search = AsyncMock(return_value=[
+            {"content": "Overview of the analysis pipeline", "similarity": 0.8}
+        ])
+        vector_service.backend.fetch_rows = AsyncMock(return_value=[
+            {"content": "Overview of the analysis pipeline"},
+            {"content": "def run_analysis_pipeline(task_id, repo_name)"},
+        ])
+
+        result = await vector_service.search_similar_content("what does run_analysis_pipeline do", "test/repo", limit=5)
+
+        assert [row["content"] for row in result] == [
+            "Overview of the analysis pipeline",
+            "def run_analysis_pipeline(task_id, repo_name)",
+        ]
+        assert result[0]["similarity"] == 0.8
+        assert result[1]["bm25_score"] > 0
+
+    @pytest.mark.asyncio
+    async def test_search_falls_back_to_vector_results(self, vector_service):
+        """Lexical index errors do not fail the search"""
+        vector_service.embeddings.embed_query = MagicMock(return_value=[0.1, 0.2])
+        vector_service.backend = MagicMock()
+        vector_service.backend.search = AsyncMock(return_value=[{"content": "vector hit"}])
+        vector_service.backend.fetch_rows = AsyncMock(side_effect=Exception("offline"))
+
+        result = await vector_service.search_similar_content("query", "test/repo")
+
+        assert result == [{"content": "vector hit"}]
+
+    @pytest.mark.asyncio
+    async def test_search_is_scoped_to_current_commit(self, vector_service):
+        """After the pointer moves, vector and lexical retrieval only see the current commit"""
+        vector_service.embeddings.embed_query = MagicMock(return_value=[0.1, 0.2])
+        vector_service.backend = MagicMock()
+        vector_service.backend.search = AsyncMock(return_value=[])
+        vector_service.backend.fetch_rows = AsyncMock(return_value=[])
+
+        await vector_service.set_current_commit("test/repo", "def456")
+        await vector_service.search_similar_content("query", "test/repo")
+
+        assert vector_service.backend.search.call_args.kwargs["commit_hash"] == "def456"
+        vector_service.backend.fetch_rows.assert_awaited_once_with("test/repo", "def456")
+
+    @pytest.mark.asyncio
+    async def test_deleting_current_commit_clears_pointer(self, vector_service):
+        """Deleting the current commit's documents falls back to repo-wide retrieval"""
+        vector_service.backend = MagicMock()
+        vector_service.backend.delete = AsyncMock(return_value=2)
+        await vector_service.set_current_commit("test/repo", "abc123")
+
+        await vector_service.delete_repo_documents("test/repo", "other")
+        assert (await vector_service.get_current_commit("test/repo"))["commit_hash"] == "abc123"
+
+        await vector_service.delete_repo_documents("test/repo", "abc123")
+        assert await vector_service.get_current_commit("test/repo") is None
+
+    @pytest.mark.asyncio
+    async def test_embed_query_is_cached_by_normalized_text(self, vector_service):
+        """Repeated questions differing only in case/whitespace are embedded once"""
+        vector_service.embeddings.embed_query = MagicMock(return_value=[0.1, 0.2])
+
+        first = await vector_service.embed_query("How do I install it?")
+        second = await vector_service.embed_query("  how do i   install it ")
+
+        assert first == second == [0.1, 0.2]
+        vector_service.embeddings.embed_query.assert_called_once_with("How do I install it?")
+
+    @pytest.mark.asyncio
+    async def test_embed_queries_batches_uncached_questions(self, vector_service):
+        """Questions not in the query cache are embedded with a single batch call"""
+        vector_service.embeddings.embed_query = MagicMock(return_value=[0.1, 0.2])
+        vector_service.embeddings.embed_documents = MagicMock(return_value=[[0.3, 0.4], [0.5, 0.6]])
+        await vector_service.embed_query("What is it?")
+
+        vectors = await vector_service.embed_queries(["what is it", "How to install?", "Where are tests?", "how to install"])
+
+        assert vectors == [[0.1, 0.2], [0.3, 0.4], [0.5, 0.6], [0.3, 0.4]]
+        vector_service.embeddings.embed_documents.assert_called_once_with(["How to install?", "Where are tests?"])
@@ -1,14 +1,19 @@
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
+from app.services.markdown_chunker import MarkdownChunk
 from app.services.vector_service import VectorService
 
+
+def chunks_of(texts):
+    return [MarkdownChunk(text, ("Overview",), len(text) // 4) for text in texts]
+
+
 class TestVectorServiceFixed:
     
     @pytest.fixture
     def vector_service(self):
         with patch('app.services.vector_service.create_client') as mock_create_client, \
-             patch('app.services.vector_service.OpenAIEmbeddings') as mock_embeddings, \
-             patch('app.services.vector_service.RecursiveCharacterTextSplitter') as mock_splitter:
+             patch('app.services.vector_service.get_llm_provider') as mock_get_provider:
             
             # Setup mock Supabase client with proper chain
             mock_supabase = MagicMock()
@@ -16,16 +21,12 @@ class TestVectorServiceFixed:
             
             # Setup mock embeddings
             mock_embeddings_instance = AsyncMock()
-            mock_embeddings.return_value = mock_embeddings_instance
-            
-            # Setup mock text splitter
-            mock_splitter_instance = MagicMock()
-            mock_splitter.return_value = mock_splitter_instance
+            mock_get_provider.return_value.embeddings.return_value = mock_embeddings_instance
             
             service = VectorService()
             service.supabase = mock_supabase
             service.embeddings = mock_embeddings_instance
-            service.text_splitter = mock_splitter_instance
+            service.chunker = MagicMock()
             
             return service
 
@@ -33,16 +34,16 @@ class TestVectorServiceFixed:
     async def test_store_document_success(self, vector_service):
         """Test successful document storage with proper mock configuration"""
         # Setup mocks
-        vector_service.text_splitter.split_text.return_value = ["chunk1", "chunk2"]
-        vector_service.embeddings.embed_query = AsyncMock(return_value=[0.1, 0.2, 0.3])
+        vector_service.chunker.iter_chunks.return_value = chunks_of(["chunk1", "chunk2"])
+        vector_service.embeddings.embed_documents = MagicMock(return_value=[[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]])
         
         # Setup Supabase table chain mock
         mock_result = MagicMock()
         mock_result.data = [{"id": "1"}, {"id": "2"}]
         
         mock_execute = MagicMock(return_value=mock_result)
-        mock_insert = MagicMock(return_value=MagicMock(execute=mock_execute))
-        mock_table = MagicMock(return_value=MagicMock(insert=mock_insert))
+        mock_upsert = MagicMock(return_value=MagicMock(execute=mock_execute))
+        mock_table = MagicMock(return_value=MagicMock(upsert=mock_upsert))
         
         vector_service.supabase.table = mock_table
         
@@ -50,14 +51,16 @@ class TestVectorServiceFixed:
         
         assert result["success"] is True
         assert result["chunks_stored"] == 2
-        vector_service.text_splitter.split_text.assert_called_once_with("test documentation")
+        vector_service.chunker.iter_chunks.assert_called_once_with("test documentation")
 
     @pytest.mark.asyncio 
     async def test_search_similar_content_success(self, vector_service):
         """Test similarity search with RPC call mocking"""
-        # Use asyncio.to_thread side_effect to properly mock the async call
-        with patch('asyncio.to_thread') as mock_to_thread:
-            mock_to_thread.return_value = [0.1, 0.2, 0.3]
+        async def to_thread(fn, *args, **kwargs):
+            # 질문 임베딩만 가짜 값으로, 나머지(검색 RPC)는 그대로 실행
+            return [0.1, 0.2, 0.3] if fn == vector_service._embed_query else fn(*args, **kwargs)
+
+        with patch('asyncio.to_thread', side_effect=to_thread):
             
             # Mock RPC call result
             mock_result = MagicMock()
@@ -85,8 +88,11 @@ class TestVectorServiceFixed:
     @pytest.mark.asyncio
     async def test_search_similar_content_empty(self, vector_service):
         """Test similarity search with no results"""
-        with patch('asyncio.to_thread') as mock_to_thread:
-            mock_to_thread.return_value = [0.1, 0.2, 0.3]
+        async def to_thread(fn, *args, **kwargs):
+            # 질문 임베딩만 가짜 값으로, 나머지(검색 RPC)는 그대로 실행
+            return [0.1, 0.2, 0.3] if fn == vector_service._embed_query else fn(*args, **kwargs)
+
+        with patch('asyncio.to_thread', side_effect=to_thread):
             
             mock_result = MagicMock()
             mock_result.data = []
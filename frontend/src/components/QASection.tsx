@@ -1,6 +1,7 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import axios from 'axios';
 import { Box, Typography, TextField, Button, CircularProgress, Chip, Alert } from '@mui/material';
+import { API_ENDPOINTS } from '../config/api';
 
 interface QASectionProps {
   repoName: string;
@@ -13,8 +14,22 @@ interface QAResponse {
     content: string;
     metadata: any;
   }>;
+  cached?: 'exact' | 'semantic';
 }
 
+// /api/ask/stream 이벤트: sources → token... → done (실패 시 error)
+type QAStreamEvent =
+  | { type: 'sources'; sources: QAResponse['sources'] }
+  | { type: 'token'; content: string }
+  | { type: 'done'; cached: QAResponse['cached'] | null }
+  | { type: 'error'; message: string };
+
+// 후속 질문이 이전 대화를 이어가도록 리포지토리마다 새 대화 세션을 사용
+const newSessionId = () =>
+  typeof crypto !== 'undefined' && 'randomUUID' in crypto
+    ? crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
 const QASection: React.FC<QASectionProps> = ({ repoName }) => {
   const [question, setQuestion] = useState('');
   const [answer, setAnswer] = useState('');
@@ -22,39 +37,120 @@ const QASection: React.FC<QASectionProps> = ({ repoName }) => {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [suggestions, setSuggestions] = useState<string[]>([]);
+  const [isCached, setIsCached] = useState(false);
+  // 이 화면에서 이미 받은 답변 (추천 질문을 다시 누르면 요청 없이 표시)
+  const answerCache = useRef<Map<string, QAResponse>>(new Map());
+  // 진행 중인 스트림 (새 질문이나 언마운트 시 중단하여 서버의 생성도 멈춤)
+  const streamController = useRef<AbortController | null>(null);
+  const sessionId = useRef<string>(newSessionId());
 
   React.useEffect(() => {
+    answerCache.current.clear();
+    sessionId.current = newSessionId();
     if (repoName) {
       loadSuggestions();
     }
   }, [repoName]);
 
+  React.useEffect(() => () => streamController.current?.abort(), []);
+
   const loadSuggestions = async () => {
     try {
-      const response = await axios.get(`/api/suggestions/${repoName}`);
+      const response = await axios.get(API_ENDPOINTS.SUGGESTIONS(repoName));
       setSuggestions(response.data.suggestions || []);
     } catch (err) {
       console.error('Failed to load suggestions:', err);
     }
   };
 
+  // 스트리밍으로 답변을 받음. 이벤트를 하나도 받지 못하면 false (일반 요청으로 재시도)
+  const streamAnswer = async (questionText: string, controller: AbortController): Promise<boolean> => {
+    let received = false;
+    try {
+      const response = await fetch(API_ENDPOINTS.ASK_STREAM, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ question: questionText, repo_name: repoName, session_id: sessionId.current }),
+        signal: controller.signal,
+      });
+      if (!response.ok || !response.body) return false;
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      const result: QAResponse = { success: true, answer: '', sources: [] };
+      let buffer = '';
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const messages = buffer.split('\n\n');
+        buffer = messages.pop() ?? '';
+        for (const message of messages) {
+          if (!message.startsWith('data: ')) continue;
+          const event = JSON.parse(message.slice('data: '.length)) as QAStreamEvent;
+          received = true;
+          if (event.type === 'sources') {
+            result.sources = event.sources;
+            setSources(event.sources || []);
+          } else if (event.type === 'token') {
+            result.answer += event.content;
+            setAnswer(result.answer);
+          } else if (event.type === 'done') {
+            result.cached = event.cached ?? undefined;
+            answerCache.current.set(questionText, result);
+            setIsCached(Boolean(event.cached));
+          } else {
+            setError(event.message);
+          }
+        }
+      }
+      return received;
+    } catch (err) {
+      if (controller.signal.aborted) return true;
+      if (received) {
+        console.error('Answer stream interrupted:', err);
+        setError('답변을 받는 중 연결이 끊어졌습니다. 다시 시도해주세요.');
+        return true;
+      }
+      return false;
+    }
+  };
+
   const handleAskQuestion = async (questionText: string = question) => {
     if (!questionText.trim() || !repoName) return;
 
-    setIsLoading(true);
     setError(null);
+    const known = answerCache.current.get(questionText);
+    if (known) {
+      setAnswer(known.answer);
+      setSources(known.sources || []);
+      setIsCached(true);
+      return;
+    }
+
+    streamController.current?.abort();
+    const controller = new AbortController();
+    streamController.current = controller;
+
+    setIsLoading(true);
     setAnswer('');
     setSources([]);
+    setIsCached(false);
 
     try {
-      const response = await axios.post<QAResponse>('/api/ask', {
+      if (await streamAnswer(questionText, controller)) return;
+
+      const response = await axios.post<QAResponse>(API_ENDPOINTS.ASK, {
         question: questionText,
-        repo_name: repoName
+        repo_name: repoName,
+        session_id: sessionId.current
       });
 
       if (response.data.success) {
+        answerCache.current.set(questionText, response.data);
         setAnswer(response.data.answer);
         setSources(response.data.sources || []);
+        setIsCached(Boolean(response.data.cached));
       } else {
         setError(response.data.answer);
       }
@@ -62,7 +158,10 @@ const QASection: React.FC<QASectionProps> = ({ repoName }) => {
       console.error('Failed to get answer:', err);
       setError('질문 처리 중 오류가 발생했습니다. 다시 시도해주세요.');
     } finally {
-      setIsLoading(false);
+      if (streamController.current === controller) {
+        streamController.current = null;
+        setIsLoading(false);
+      }
     }
   };
 
@@ -136,7 +235,14 @@ const QASection: React.FC<QASectionProps> = ({ repoName }) => {
 
       {answer && (
         <Box sx={{ p: 2, bgcolor: 'background.default', border: '1px solid', borderColor: 'divider', borderRadius: 1, mb: 2 }}>
-          <Typography variant="subtitle1" gutterBottom>🤖 답변</Typography>
+          <Typography variant="subtitle1" gutterBottom>
+            🤖 답변
+            {isCached && (
+              <Typography component="span" variant="caption" color="text.secondary" sx={{ ml: 1 }}>
+                (저장된 답변)
+              </Typography>
+            )}
+          </Typography>
           <Typography variant="body2" sx={{ whiteSpace: 'pre-wrap' }}>
             {answer}
           </Typography>
@@ -6,6 +6,7 @@ export const API_ENDPOINTS = {
   RESULT: (taskId: string) => `/api/result/${taskId}`,
   ANALYSES: '/api/analyses',
   ASK: '/api/ask',
+  ASK_STREAM: '/api/ask/stream',
   SUGGESTIONS: (repoName: string) => `/api/suggestions/${repoName}`,
   ARCHITECTURE: (taskId: string) => `/api/architecture/${taskId}`,
 } as const;
@@ -11,6 +11,26 @@ vi.mock('axios', () => ({
   },
 }));
 
+// /api/ask/stream 응답: SSE 메시지를 주어진 조각 단위로 읽어줌
+const streamResponse = (chunks: string[]) => {
+  const encoder = new TextEncoder();
+  const pending = [...chunks];
+  return {
+    ok: true,
+    body: {
+      getReader: () => ({
+        read: () => Promise.resolve(
+          pending.length > 0
+            ? { done: false, value: encoder.encode(pending.shift()) }
+            : { done: true, value: undefined }
+        ),
+      }),
+    },
+  } as unknown as Response;
+};
+
+const sse = (event: object) => `data: ${JSON.stringify(event)}\n\n`;
+
 describe('QASection', () => {
   beforeEach(() => {
     vi.clearAllMocks();
@@ -81,10 +101,11 @@ describe('QASection', () => {
 
     expect(vi.mocked(axios.post)).toHaveBeenCalledWith(
       '/api/ask',
-      {
+      expect.objectContaining({
         question: 'Test question',
-        repo_name: 'test/repo'
-      }
+        repo_name: 'test/repo',
+        session_id: expect.any(String)
+      })
     );
   });
 
@@ -132,13 +153,100 @@ describe('QASection', () => {
 
     expect(vi.mocked(axios.post)).toHaveBeenCalledWith(
       '/api/ask',
-      {
+      expect.objectContaining({
         question: 'What is this project?',
-        repo_name: 'test/repo'
-      }
+        repo_name: 'test/repo',
+        session_id: expect.any(String)
+      })
     );
   });
 
+  it('keeps one session id per repository', async () => {
+    vi.mocked(axios.get).mockResolvedValue({ data: { suggestions: [] } });
+    vi.mocked(axios.post).mockResolvedValue({ data: { success: true, answer: 'Answer', sources: [] } });
+
+    const { rerender } = render(<QASection repoName="test/repo" />);
+    const ask = async (text: string) => {
+      fireEvent.change(screen.getByPlaceholderText('궁금한 것을 질문해보세요...'), { target: { value: text } });
+      fireEvent.click(screen.getByRole('button', { name: '질문하기' }));
+      await waitFor(() => expect(screen.getByText('질문하기')).toBeInTheDocument());
+    };
+
+    await ask('First question');
+    await ask('Follow-up question');
+    rerender(<QASection repoName="other/repo" />);
+    await ask('Question about another repo');
+
+    const sessionIds = vi.mocked(axios.post).mock.calls.map(([, body]) => (body as { session_id: string }).session_id);
+    expect(sessionIds).toHaveLength(3);
+    expect(sessionIds[0]).toBe(sessionIds[1]);
+    expect(sessionIds[2]).not.toBe(sessionIds[0]);
+  });
+
+  it('streams the answer from the stream endpoint', async () => {
+    vi.mocked(axios.get).mockResolvedValue({ data: { suggestions: [] } });
+    vi.mocked(fetch).mockImplementationOnce(() => Promise.resolve(streamResponse([
+      sse({ type: 'sources', sources: [{ content: 'Source content', metadata: {} }] }),
+      sse({ type: 'token', content: 'Streamed ' }),
+      // 이벤트가 읽기 경계에 걸쳐 나뉘어 와도 이어 붙여 처리
+      sse({ type: 'token', content: 'answer' }).slice(0, 10),
+      sse({ type: 'token', content: 'answer' }).slice(10) + sse({ type: 'done', cached: 'exact' }),
+    ])));
+
+    render(<QASection repoName="test/repo" />);
+
+    fireEvent.change(screen.getByPlaceholderText('궁금한 것을 질문해보세요...'), { target: { value: 'Test question' } });
+    fireEvent.click(screen.getByRole('button', { name: '질문하기' }));
+
+    await waitFor(() => {
+      expect(screen.getByText('Streamed answer')).toBeInTheDocument();
+      expect(screen.getByText('📚 참조된 문서')).toBeInTheDocument();
+      expect(screen.getByText('(저장된 답변)')).toBeInTheDocument();
+    });
+
+    const [url, init] = vi.mocked(fetch).mock.calls[0];
+    expect(url).toBe('/api/ask/stream');
+    expect(JSON.parse(init?.body as string)).toEqual(expect.objectContaining({
+      question: 'Test question',
+      repo_name: 'test/repo',
+      session_id: expect.any(String)
+    }));
+    expect(vi.mocked(axios.post)).not.toHaveBeenCalled();
+  });
+
+  it('shows the error event of a stream', async () => {
+    vi.mocked(axios.get).mockResolvedValue({ data: { suggestions: [] } });
+    vi.mocked(fetch).mockImplementationOnce(() => Promise.resolve(streamResponse([
+      sse({ type: 'error', message: '답변 생성에 실패했습니다.' }),
+    ])));
+
+    render(<QASection repoName="test/repo" />);
+
+    fireEvent.change(screen.getByPlaceholderText('궁금한 것을 질문해보세요...'), { target: { value: 'Test question' } });
+    fireEvent.click(screen.getByRole('button', { name: '질문하기' }));
+
+    await waitFor(() => {
+      expect(screen.getByText('답변 생성에 실패했습니다.')).toBeInTheDocument();
+    });
+    expect(vi.mocked(axios.post)).not.toHaveBeenCalled();
+  });
+
+  it('falls back to a regular request when the stream is unavailable', async () => {
+    vi.mocked(axios.get).mockResolvedValue({ data: { suggestions: [] } });
+    vi.mocked(fetch).mockImplementationOnce(() => Promise.resolve({ ok: false, body: null } as Response));
+    vi.mocked(axios.post).mockResolvedValue({ data: { success: true, answer: 'Fallback answer', sources: [] } });
+
+    render(<QASection repoName="test/repo" />);
+
+    fireEvent.change(screen.getByPlaceholderText('궁금한 것을 질문해보세요...'), { target: { value: 'Test question' } });
+    fireEvent.click(screen.getByRole('button', { name: '질문하기' }));
+
+    await waitFor(() => {
+      expect(screen.getByText('Fallback answer')).toBeInTheDocument();
+    });
+    expect(vi.mocked(fetch)).toHaveBeenCalledTimes(1);
+  });
+
   it('disables button when question is empty', async () => {
     vi.mocked(axios.get).mockResolvedValue({ data: { suggestions: [] } });
 